@@ -11,6 +11,60 @@ class Settings:
     CARBON_DATA_DIR = DATA_DIR / 'carbon'
     OVERPASS_DATA_DIR = DATA_DIR / 'overpass'
     NATURAL_EARTH_DATA_DIR = DATA_DIR / 'natural_earth'
+    LGRIP_TILES_PATH = DATA_DIR / 'LGRIP30_v001_tiles.json'
+    LGRIP_TILE_DIR = DATA_DIR / 'lgrip30_files'
+    SENTINEL_TILES_PATH = DATA_DIR.parent.parent / 'sentinel_tiles.json'
+
+    # Background analysis jobs (per API worker process)
+    ANALYSIS_WORKERS = int(os.getenv('ANALYSIS_WORKERS', '2'))
+
+    # Per-tile processing pool shared by all jobs in a worker process
+    TILE_WORKERS = int(os.getenv('TILE_WORKERS', str(os.cpu_count() or 1)))
+    TILE_MEMORY_BUDGET_MB = int(os.getenv('TILE_MEMORY_BUDGET_MB', '2048'))
+
+    # Segmented tile downloads
+    DOWNLOAD_CONNECTIONS = int(os.getenv('DOWNLOAD_CONNECTIONS', '4'))
+    DOWNLOAD_SEGMENT_MB = int(os.getenv('DOWNLOAD_SEGMENT_MB', '64'))
+
+    # Shared NASA Earthdata client
+    EARTHDATA_POOL_SIZE = int(os.getenv('EARTHDATA_POOL_SIZE', '16'))
+    EARTHDATA_HEAD_TTL = float(os.getenv('EARTHDATA_HEAD_TTL', '3600'))
+
+    # Hosts that Earthdata credentials may follow a redirect to (besides URS)
+    EARTHDATA_AUTH_HOSTS = set(os.getenv('EARTHDATA_AUTH_HOSTS', 'e4ftl01.cr.usgs.gov,data.lpdaac.earthdatacloud.nasa.gov').split(','))
+
+    # Convert downloaded tiles to 512 px COGs with a per-chunk class index
+    LGRIP_INGEST = os.getenv('LGRIP_INGEST', '1') == '1'
+
+    # Disk budget for downloaded LGRIP30 tiles, least recently used evicted first
+    TILE_CACHE_MAX_GB = float(os.getenv('TILE_CACHE_MAX_GB', '200'))
+
+    # Finished analyses keyed by normalized geometry and dataset version
+    RESULT_CACHE_DIR = DATA_DIR / 'cache' / 'analysis'
+    RESULT_CACHE_ENTRIES = int(os.getenv('RESULT_CACHE_ENTRIES', '256'))
+
+    # Export all satellite visualizations as one stacked Earth Engine image
+    SATELLITE_COMBINED_EXPORT = os.getenv('SATELLITE_COMBINED_EXPORT', '1') == '1'
+
+    # Fetch satellite images up to this size directly instead of via Drive exports
+    SATELLITE_DIRECT_MAX_MB = int(os.getenv('SATELLITE_DIRECT_MAX_MB', '32'))
+
+    # Rendered Sentinel-2 images keyed by AOI, scene and visualization
+    SCENE_CACHE_DIR = DATA_DIR / 'cache' / 'sentinel'
+    SCENE_CACHE_TTL_HOURS = float(os.getenv('SCENE_CACHE_TTL_HOURS', '24'))
+    SCENE_CACHE_MAX_MB = float(os.getenv('SCENE_CACHE_MAX_MB', '2048'))
+
+    # Compute satellite visualizations locally from one raw band download
+    SATELLITE_LOCAL_INDICES = os.getenv('SATELLITE_LOCAL_INDICES', '0') == '1'
+
+    # Monte Carlo carbon uncertainty
+    CARBON_MC_DRAWS = int(os.getenv('CARBON_MC_DRAWS', '5000'))
+    CARBON_MC_SEED = int(os.getenv('CARBON_MC_SEED', '0'))
+    CARBON_MC_MEMORY_MB = float(os.getenv('CARBON_MC_MEMORY_MB', '256'))
+    CARBON_MC_WORKERS = int(os.getenv('CARBON_MC_WORKERS', str(os.cpu_count() or 1)))
+
+    # Monte Carlo confidence bounds in carbon.estimate instead of the fixed margin
+    CARBON_MC_ESTIMATE = os.getenv('CARBON_MC_ESTIMATE', '0') == '1'
 
 settings = Settings()
 
@@ -26,4 +26,8 @@ def get_db():
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+def ensure_tables(*tables):
+    """Create the given tables if they do not exist yet"""
+    Base.metadata.create_all(bind=engine, tables=list(tables), checkfirst=True)
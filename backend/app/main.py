@@ -21,6 +21,15 @@ from shapely.geometry import shape
 from datetime import datetime
 from app.routers.polygons import router as polygon_router
 from app.routers.satellite import router as satellite_router
+from app.routers.jobs import router as jobs_router
+from app.services.jobs import job_manager
+from app.services.tile_pool import shutdown_pool
+from app.services.carbon_uncertainty import shutdown_simulation_pool
+from app.services.tile_ingest import shutdown_ingest
+from app.services.ee_tasks import shutdown_task_poller
+from app.database import ensure_tables
+from app.models.job import AnalysisJob
+from app.models.analysis_cache import AnalysisCacheEntry
 # Load environment variables from the project's .env
 from pathlib import Path
 
@@ -96,6 +105,20 @@ async def add_trailing_slash(request: Request, call_next):
 # Include routers
 app.include_router(polygon_router, prefix="/polygons", tags=["polygons"])
 app.include_router(satellite_router, prefix="/satellite", tags=["satellite"])
+app.include_router(jobs_router, prefix="/jobs", tags=["jobs"])
+
+@app.on_event("startup")
+async def create_service_tables():
+    # Tables added after the initial schema, created on first start
+    ensure_tables(AnalysisJob.__table__, AnalysisCacheEntry.__table__)
+
+@app.on_event("shutdown")
+async def shutdown_jobs():
+    job_manager.shutdown()
+    shutdown_pool()
+    shutdown_simulation_pool()
+    shutdown_ingest()
+    shutdown_task_poller()
 
 # app.include_router(demo_table_router, prefix="/api/v1")
 
@@ -0,0 +1,16 @@
+# backend/app/models/analysis_cache.py
+from app.database import Base
+from sqlalchemy import Column, String, DateTime, JSON
+from sqlalchemy.sql import func
+
+class AnalysisCacheEntry(Base):
+    __tablename__ = "analysis_cache"
+
+    key = Column(String(64), primary_key=True)  # sha256 of dataset version + normalized geometry
+    dataset_version = Column(String, index=True)
+    analysis_status = Column(String)
+    cropland_data = Column(JSON)
+    raster_path = Column(String, nullable=True)
+
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    last_used_at = Column(DateTime(timezone=True), server_default=func.now())
@@ -0,0 +1,20 @@
+# backend/app/models/job.py
+from app.database import Base
+from sqlalchemy import Column, Integer, String, DateTime, Boolean, ForeignKey, JSON
+from sqlalchemy.sql import func
+
+class AnalysisJob(Base):
+    __tablename__ = "analysis_jobs"
+
+    id = Column(String(36), primary_key=True)  # uuid4
+    polygon_id = Column(Integer, ForeignKey('analysis_polygons.id', ondelete='CASCADE'), index=True)
+    kind = Column(String, default="cropland")
+    status = Column(String, default="queued")  # queued, running, succeeded, failed, cancelled
+    progress = Column(JSON, nullable=True)  # tiles_total, tiles_done, bytes_downloaded, stage
+    result = Column(JSON, nullable=True)
+    error = Column(String, nullable=True)
+    cancel_requested = Column(Boolean, default=False)
+
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    started_at = Column(DateTime(timezone=True), nullable=True)
+    finished_at = Column(DateTime(timezone=True), nullable=True)
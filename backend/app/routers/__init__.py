@@ -3,7 +3,7 @@
 # backend/app/routers/__init__.py
 from fastapi import APIRouter
 # from . import export, sentinel, carbon, polygons, vision
-from . import export, polygons, satellite
+from . import export, jobs, polygons, satellite
 
 router = APIRouter()
 
@@ -11,5 +11,6 @@ router.include_router(export.router, prefix="/export", tags=["export"])
 # router.include_router(sentinel.router, prefix="/sentinel", tags=["sentinel"])
 # router.include_router(carbon.router, prefix="/carbon", tags=["carbon"])
 router.include_router(polygons.router, prefix="/polygons", tags=["polygons"])
+router.include_router(jobs.router, prefix="/jobs", tags=["jobs"])
 router.include_router(satellite.router, prefix="/satellite", tags=["satellite"])
 # router.include_router(vision.router, prefix="/vision", tags=["vision"])
@@ -2,27 +2,21 @@
 # from fastapi import APIRouter, HTTPException
 # from app.services.raster_analysis import RasterAnalyzer
 # from typing import Dict, Any
-# import json
 # from shapely.geometry import shape
+# from app.services.tile_catalog import lgrip_catalog
 # router = APIRouter()
 
-# # Load tile reference
-# with open('app/data/LGRIP30_v001_tiles.json', 'r') as f:
-#     TILE_REFERENCE = json.load(f)
+# # Compiled tile index
+# TILE_CATALOG = lgrip_catalog()
 
 # @router.post("/analyze_polygon")
 # async def analyze_polygon(geometry: Dict[str, Any]):
 #     """Analyze LGRIP30 data for a polygon"""
 #     try:
-#         # Get bounds and find relevant tiles
-#         bounds = shape(geometry).bounds
-#         relevant_tiles = []
-        
-#         for tile_id, tile_info in TILE_REFERENCE['tiles'].items():
-#             tile_bounds = tile_info['bounds']
-#             if (bounds[0] < tile_bounds['maxx'] and bounds[2] > tile_bounds['minx'] and
-#                 bounds[1] < tile_bounds['maxy'] and bounds[3] > tile_bounds['miny']):
-#                 relevant_tiles.append(tile_info)
+#         # Find the tiles the polygon intersects
+#         relevant_tiles = [
+#             tile_info for _, tile_info in TILE_CATALOG.tiles_for_geometry(shape(geometry))
+#         ]
 
 #         # Analyze each relevant tile
 #         results = []
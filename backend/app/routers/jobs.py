@@ -0,0 +1,29 @@
+# backend/app/routers/jobs.py
+from fastapi import APIRouter, HTTPException
+import logging
+
+from app.services.jobs import job_manager
+
+router = APIRouter()
+logger = logging.getLogger(__name__)
+
+@router.get("/{job_id}")
+async def get_job(job_id: str):
+    """Get the status and progress of a background job"""
+    job = job_manager.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+@router.delete("/{job_id}")
+async def cancel_job(job_id: str):
+    """Request cancellation of a queued or running job"""
+    job = job_manager.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+
+    if not job_manager.cancel(job_id):
+        raise HTTPException(status_code=409, detail=f"Job already {job['status']}")
+
+    logger.info(f"Cancellation requested for job {job_id}")
+    return job_manager.get(job_id)
@@ -6,30 +6,44 @@ import os
 import traceback
 import asyncio
 import logging
-from app.services.satellite import process_spectral_band, task_statuses
+from app.core.config import settings
+from typing import List, Optional
+from app.services.satellite import process_local_indices, process_spectral_band, process_spectral_bands, task_statuses
+from app.services.spectral import COMPOSITES, INDICES
 
 logger = logging.getLogger(__name__)
 
+BAND_TYPES = ['TrueColor', 'NDWI', 'AgriColor', 'MSAVI2']
+
 DATA_DIR = Path(os.path.dirname(os.path.dirname(__file__))) / "data"
 
 class PolygonRequest(BaseModel):
     polygon_geojson: dict
 
+class SpectralIndexRequest(BaseModel):
+    polygon_geojson: dict
+    indices: Optional[List[str]] = None
+
 router = APIRouter()
 
 @router.post("/retrieve-satellite-image")
 async def retrieve_satellite_image(request: PolygonRequest):
     # try:
+    if settings.SATELLITE_LOCAL_INDICES:
+        # Band math on one raw download instead of server-side visualizations
+        png_files = await process_local_indices(request.polygon_geojson, BAND_TYPES)
+    elif settings.SATELLITE_COMBINED_EXPORT:
+        # One export with every visualization stacked, split locally
+        png_files = await process_spectral_bands(request.polygon_geojson, BAND_TYPES)
+    else:
         # Create tasks for each spectral band
-    spectral_tasks = [
-        process_spectral_band(request.polygon_geojson, 'TrueColor'),
-        process_spectral_band(request.polygon_geojson, 'NDWI'),
-        process_spectral_band(request.polygon_geojson, 'AgriColor'),
-        process_spectral_band(request.polygon_geojson, 'MSAVI2')
-    ]
-    
-    # Process all spectral bands concurrently
-    png_files = await asyncio.gather(*spectral_tasks, return_exceptions=True)
+        spectral_tasks = [
+            process_spectral_band(request.polygon_geojson, band_type)
+            for band_type in BAND_TYPES
+        ]
+
+        # Process all spectral bands concurrently
+        png_files = await asyncio.gather(*spectral_tasks, return_exceptions=True)
     
     # Filter out any errors and collect successful results
     successful_files = [f for f in png_files if isinstance(f, str) and f is not None]
@@ -43,6 +57,20 @@ async def retrieve_satellite_image(request: PolygonRequest):
     #     logger.error(f"Traceback: {traceback.format_exc()}")
     #     raise HTTPException(status_code=500, detail=str(e))
 
+@router.post("/spectral-indices")
+async def compute_spectral_indices(request: SpectralIndexRequest):
+    """Render any registered spectral indices or composites for a polygon"""
+    names = request.indices or list(INDICES)
+    unknown = [name for name in names if name not in INDICES and name not in COMPOSITES]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown spectral indices: {', '.join(unknown)}")
+
+    png_files = await process_local_indices(request.polygon_geojson, names)
+    files = {name: f for name, f in zip(names, png_files) if f}
+    if not files:
+        raise HTTPException(status_code=500, detail="Failed to compute spectral indices")
+    return {"message": "Spectral indices computed successfully", "files": files}
+
 @router.get("/task-status")
 async def get_task_status():
     return task_statuses
@@ -1,53 +1,188 @@
 # backend/app/services/carbon.py
-from typing import Dict, Any
+from typing import Dict, Any, List, Mapping, Optional, Sequence, Union
 import asyncio
 import traceback
 
+import numpy as np
+import pandas as pd
+
+from app.core.config import settings
+from app.services.carbon_uncertainty import PERCENTILES, column_name, monte_carlo
+
+MODEL_SOURCE = "carbon-model-v1"
+METHODOLOGY = "mock_ipcc_tier1"
+
+# Carbon density (tons/km²) per unit of mean NDVI
+DENSITY_PER_NDVI = 150.0
+
+# Share of the total in each carbon pool
+POOL_SHARES = {
+    "above_ground": 0.6,
+    "below_ground": 0.3,
+    "soil": 0.1
+}
+
+# Relative half-width of the confidence interval without Monte Carlo draws
+CONFIDENCE_MARGIN = 0.1
+
+# Percentiles bounding the 95% confidence interval
+CONFIDENCE_PERCENTILES = (2.5, 97.5)
+
+UNCERTAINTY_FACTORS = [
+    "seasonal_variation",
+    "measurement_error",
+    "model_assumptions"
+]
+
+Columns = Union[pd.DataFrame, Mapping[str, Any]]
+
+
+def batch_inputs(sentinel_results: Sequence[Dict[str, Any]]) -> Dict[str, np.ndarray]:
+    """Columnar carbon inputs from a list of ``sentinel.analyze`` results"""
+    def column(values):
+        return np.array([np.nan if v is None else v for v in values], dtype=np.float64)
+
+    return {
+        "area_km2": column(r.get("area_km2", 0) for r in sentinel_results),
+        "ndvi_mean": column(r.get("data", {}).get("ndvi_mean", 0) for r in sentinel_results),
+        "ndvi_std": column((r.get("data", {}).get("ndvi") or {}).get("std") for r in sentinel_results)
+    }
+
+
+def estimate_batch(
+    inputs: Columns,
+    class_areas_km2: Optional[np.ndarray] = None,
+    class_factors: Optional[np.ndarray] = None,
+    draws: int = 0,
+    seed: Optional[int] = None
+) -> Columns:
+    """
+    Carbon estimates for many polygons at once.
+
+    ``inputs`` holds one row per polygon with at least ``area_km2`` and
+    ``ndvi_mean`` columns (a DataFrame or a mapping of equal-length
+    arrays). Optionally ``class_areas_km2`` (polygons x classes) splits
+    each polygon's area by land class, with ``class_factors`` scaling the
+    carbon density of each class; without them the whole area has a
+    factor of 1.
+
+    With ``draws`` > 0 the confidence bounds are the 2.5th and 97.5th
+    percentiles of a Monte Carlo simulation of the inputs (see
+    ``monte_carlo_uncertainty``); otherwise they are ±CONFIDENCE_MARGIN.
+
+    Returns the carbon density, total, confidence bounds and per-pool
+    tons per row: a DataFrame on the input's index for DataFrame input,
+    otherwise a dict of arrays.
+    """
+    area = np.nan_to_num(np.asarray(inputs["area_km2"], dtype=np.float64))
+    ndvi = np.nan_to_num(np.asarray(inputs["ndvi_mean"], dtype=np.float64))
+
+    # Higher NDVI means more carbon per km²
+    base_density = DENSITY_PER_NDVI * ndvi
+    if class_areas_km2 is None:
+        effective_area = area
+    else:
+        class_areas_km2 = np.asarray(class_areas_km2, dtype=np.float64).reshape(len(area), -1)
+        factors = np.ones(class_areas_km2.shape[1]) if class_factors is None else np.asarray(class_factors, dtype=np.float64)
+        effective_area = class_areas_km2 @ factors
+
+    total = effective_area * base_density
+    with np.errstate(divide='ignore', invalid='ignore'):
+        density = np.where(area > 0, total / area, base_density)
+
+    if draws > 0:
+        simulated = monte_carlo_uncertainty(
+            inputs, class_areas_km2, class_factors, draws=draws, seed=seed,
+            percentiles=CONFIDENCE_PERCENTILES, workers=1
+        )["polygons"]
+        ci_low = np.asarray(simulated[column_name("total_carbon_tons", CONFIDENCE_PERCENTILES[0])])
+        ci_high = np.asarray(simulated[column_name("total_carbon_tons", CONFIDENCE_PERCENTILES[1])])
+    else:
+        ci_low = total * (1 - CONFIDENCE_MARGIN)
+        ci_high = total * (1 + CONFIDENCE_MARGIN)
+
+    result = {
+        "carbon_density_tons_per_km2": density,
+        "total_carbon_tons": total,
+        "ci_low": ci_low,
+        "ci_high": ci_high
+    }
+    for pool, share in POOL_SHARES.items():
+        result[pool] = total * share
+    if isinstance(inputs, pd.DataFrame):
+        return pd.DataFrame(result, index=inputs.index)
+    return result
+
+
+def monte_carlo_uncertainty(
+    inputs: Columns,
+    class_areas_km2: Optional[np.ndarray] = None,
+    class_factors: Optional[np.ndarray] = None,
+    draws: Optional[int] = None,
+    seed: Optional[int] = None,
+    percentiles: Sequence[float] = PERCENTILES,
+    workers: Optional[int] = None
+) -> Dict[str, Any]:
+    """
+    Percentile intervals of every carbon pool from Monte Carlo draws of
+    NDVI, class areas and the model coefficients. Draws, seed, memory
+    budget and workers default to the CARBON_MC_* settings.
+    """
+    return monte_carlo(
+        inputs,
+        DENSITY_PER_NDVI,
+        list(POOL_SHARES.values()),
+        class_areas_km2=class_areas_km2,
+        class_factors=class_factors,
+        draws=settings.CARBON_MC_DRAWS if draws is None else draws,
+        seed=settings.CARBON_MC_SEED if seed is None else seed,
+        percentiles=percentiles,
+        memory_budget_mb=settings.CARBON_MC_MEMORY_MB,
+        workers=settings.CARBON_MC_WORKERS if workers is None else workers
+    )
+
+
+def format_estimate(row: Mapping[str, Any], timestamp=None) -> Dict[str, Any]:
+    """Nested per-polygon result from one row of ``estimate_batch``"""
+    return {
+        "status": "success",
+        "timestamp": timestamp,
+        "source": MODEL_SOURCE,
+        "estimates": {
+            "total_carbon_tons": float(row["total_carbon_tons"]),
+            "carbon_density_tons_per_km2": float(row["carbon_density_tons_per_km2"]),
+            "confidence_interval": {
+                "low": float(row["ci_low"]),
+                "high": float(row["ci_high"])
+            }
+        },
+        "breakdown": {pool: float(row[pool]) for pool in POOL_SHARES},
+        "uncertainty_factors": list(UNCERTAINTY_FACTORS),
+        "methodology": METHODOLOGY
+    }
+
+
 async def estimate(geometry, sentinel_data: Dict[str, Any]) -> Dict[str, Any]:
     """
     Estimate carbon sequestration based on geometry and Sentinel data.
-    
+
     Args:
         geometry: PostGIS geometry object
         sentinel_data: Dictionary containing Sentinel analysis results
-        
+
     Returns:
         Dict containing carbon estimation results
     """
     try:
-        # Mock carbon estimation results
-        area_km2 = sentinel_data.get("area_km2", 0)
-        ndvi = sentinel_data.get("data", {}).get("ndvi_mean", 0)
-        
-        # Mock calculations based on area and NDVI
-        carbon_density = 150 * ndvi  # Mock formula: higher NDVI = more carbon
-        total_carbon = area_km2 * carbon_density
-        
-        return {
-            "status": "success",
-            "timestamp": sentinel_data.get("timestamp"),
-            "source": "carbon-model-v1",
-            "estimates": {
-                "total_carbon_tons": total_carbon,
-                "carbon_density_tons_per_km2": carbon_density,
-                "confidence_interval": {
-                    "low": total_carbon * 0.9,
-                    "high": total_carbon * 1.1
-                }
-            },
-            "breakdown": {
-                "above_ground": total_carbon * 0.6,
-                "below_ground": total_carbon * 0.3,
-                "soil": total_carbon * 0.1
-            },
-            "uncertainty_factors": [
-                "seasonal_variation",
-                "measurement_error",
-                "model_assumptions"
-            ],
-            "methodology": "mock_ipcc_tier1"
-        }
-            
+        # One-row batch
+        inputs = batch_inputs([sentinel_data])
+        if settings.CARBON_MC_ESTIMATE and settings.CARBON_MC_DRAWS > 0:
+            # The draws are CPU-bound, so keep them off the event loop
+            result = await asyncio.to_thread(estimate_batch, inputs, draws=settings.CARBON_MC_DRAWS)
+        else:
+            result = estimate_batch(inputs)
+        return format_estimate({column: values[0] for column, values in result.items()}, sentinel_data.get("timestamp"))
+
     except Exception as e:
         print(f"Error in carbon estimation: {str(e)}")
         print(traceback.format_exc())
@@ -55,11 +190,26 @@ async def estimate(geometry, sentinel_data: Dict[str, Any]) -> Dict[str, Any]:
 
 class CarbonEstimationService:
     def estimate_soc(self, polygon_data, sentinel_data):
-        """Estimate Soil Organic Carbon based on available data"""
-        # Initial implementation can be simple, expanded based on needs
-        pass
-
-    def calculate_uncertainty(self, estimates):
-        """Calculate uncertainty ranges for SOC estimates"""
-        pass
-    
\ No newline at end of file
+        """Estimate Soil Organic Carbon (tons) for one polygon"""
+        return float(estimate_batch(batch_inputs([sentinel_data]))["soil"][0])
+
+    def estimate_portfolio(self, sentinel_results: List[Dict[str, Any]]) -> pd.DataFrame:
+        """Columnar carbon estimates for many polygons' Sentinel results"""
+        return estimate_batch(pd.DataFrame(batch_inputs(sentinel_results)))
+
+    def calculate_uncertainty(
+        self,
+        estimates: Union[Columns, List[Dict[str, Any]]],
+        draws: Optional[int] = None,
+        seed: Optional[int] = None,
+        percentiles: Sequence[float] = PERCENTILES,
+        workers: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """
+        Monte Carlo uncertainty ranges of every carbon pool, SOC included,
+        per polygon and for the portfolio. ``estimates`` is a list of
+        Sentinel results or columnar inputs as for ``estimate_batch``.
+        """
+        if isinstance(estimates, list):
+            estimates = pd.DataFrame(batch_inputs(estimates))
+        return monte_carlo_uncertainty(estimates, draws=draws, seed=seed, percentiles=percentiles, workers=workers)
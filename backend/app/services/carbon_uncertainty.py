@@ -0,0 +1,292 @@
+# backend/app/services/carbon_uncertainty.py
+import logging
+import multiprocessing
+import threading
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from dataclasses import dataclass
+from typing import Any, Dict, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Per-draw outputs, in the order they are simulated
+POOLS = ("total_carbon_tons", "above_ground", "below_ground", "soil")
+
+PERCENTILES = (2.5, 50.0, 97.5)
+
+# Float64 rows of draws held per polygon while a chunk is simulated, on
+# top of one normal draw per land class: the NDVI draw, the effective area
+# (reused for the total), one pool, the copy np.percentile partitions and
+# headroom for its temporaries
+ARRAYS_PER_POLYGON = 6
+
+# Simulation processes, kept apart from the raster tile pool so carbon runs
+# neither queue behind tile work nor are capped by TILE_WORKERS
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_workers = 0
+_pool_lock = threading.Lock()
+
+
+@dataclass(frozen=True)
+class UncertaintyModel:
+    """
+    Spread of the carbon model's inputs.
+
+    A polygon's mean NDVI is drawn around the observed mean with a
+    standard deviation combining ``ndvi_error`` (sensor and atmosphere)
+    and ``ndvi_seasonal`` times the polygon's spatial NDVI std. Each land
+    class area gets an independent relative error of ``area_error``. The
+    NDVI-to-density coefficient (relative error ``density_error``) and the
+    pool shares (Dirichlet with ``pool_concentration``) are model
+    assumptions, so one draw of them applies to every polygon.
+    """
+    ndvi_error: float = 0.03
+    ndvi_seasonal: float = 0.25
+    area_error: float = 0.05
+    density_error: float = 0.15
+    pool_concentration: float = 200.0
+
+
+DEFAULT_MODEL = UncertaintyModel()
+
+
+def column_name(pool: str, q: float) -> str:
+    return f"{pool}_p{q:g}"
+
+
+def polygon_rng(seed: int, index: int) -> np.random.Generator:
+    """Generator of one polygon's draws, independent of chunking and workers"""
+    return np.random.default_rng(np.random.SeedSequence([seed, 1, index]))
+
+
+def coefficient_draws(
+    draws: int,
+    seed: int,
+    density_per_ndvi: float,
+    pool_shares: Sequence[float],
+    model: UncertaintyModel
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Shared model coefficients: density per NDVI (draws,) and pool shares (draws, pools)"""
+    rng = np.random.default_rng(np.random.SeedSequence([seed, 0]))
+    density = density_per_ndvi * (1 + model.density_error * rng.standard_normal(draws))
+    shares = rng.dirichlet(model.pool_concentration * np.asarray(pool_shares, dtype=np.float64), size=draws)
+    return density, shares
+
+
+def get_simulation_pool() -> ProcessPoolExecutor:
+    """Process-wide Monte Carlo pool of CARBON_MC_WORKERS processes, created on first use"""
+    global _pool, _pool_workers
+    with _pool_lock:
+        if _pool is None:
+            # spawn: jobs call this from threads, where forking is unsafe
+            _pool_workers = max(1, settings.CARBON_MC_WORKERS)
+            _pool = ProcessPoolExecutor(
+                max_workers=_pool_workers,
+                mp_context=multiprocessing.get_context('spawn')
+            )
+        return _pool
+
+
+def simulation_pool_size() -> int:
+    """Processes in the Monte Carlo pool, whether or not it exists yet"""
+    with _pool_lock:
+        return _pool_workers if _pool is not None else max(1, settings.CARBON_MC_WORKERS)
+
+
+def shutdown_simulation_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+            _pool = None
+
+
+def chunk_rows(draws: int, classes: int, memory_budget_mb: float) -> int:
+    """Polygons per chunk so one chunk's draws fit the memory budget"""
+    per_polygon = draws * 8 * (classes + ARRAYS_PER_POLYGON)
+    return int(max(1, memory_budget_mb * 1024 * 1024 // per_polygon))
+
+
+def simulate_chunk(
+    start: int,
+    ndvi_mean: np.ndarray,
+    ndvi_std: np.ndarray,
+    class_areas: np.ndarray,
+    class_factors: np.ndarray,
+    draws: int,
+    seed: int,
+    density_per_ndvi: float,
+    pool_shares: Sequence[float],
+    percentiles: Sequence[float],
+    model: UncertaintyModel
+) -> Dict[str, np.ndarray]:
+    """
+    Monte Carlo draws for polygons ``start .. start + len(ndvi_mean)``.
+
+    Runs in a worker process in multi-core mode, so it takes and returns
+    only arrays. Returns per-polygon ``mean`` (polygons, pools) and
+    ``percentiles`` (polygons, pools, percentiles), and the per-draw
+    ``sums`` (pools, draws) of the chunk for portfolio totals.
+    """
+    rows, classes = class_areas.shape
+    density, shares = coefficient_draws(draws, seed, density_per_ndvi, pool_shares, model)
+
+    noise = np.empty((rows, classes + 1, draws))
+    for i in range(rows):
+        polygon_rng(seed, start + i).standard_normal(out=noise[i])
+
+    sigma = np.sqrt(model.ndvi_error ** 2 + (model.ndvi_seasonal * np.nan_to_num(ndvi_std)) ** 2)
+    ndvi = noise[:, 0]
+    ndvi *= sigma[:, None]
+    ndvi += ndvi_mean[:, None]
+    np.clip(ndvi, -1.0, 1.0, out=ndvi)
+
+    # Area per class with its own relative error, weighted by class factor
+    area_noise = noise[:, 1:]
+    area_noise *= model.area_error
+    area_noise += 1
+    np.maximum(area_noise, 0, out=area_noise)
+    area_noise *= (class_areas * class_factors)[:, :, None]
+    effective_area = area_noise.sum(axis=1)
+
+    total = effective_area
+    total *= ndvi
+    total *= density
+
+    mean = np.empty((rows, len(POOLS)))
+    quantiles = np.empty((rows, len(POOLS), len(percentiles)))
+    sums = np.empty((len(POOLS), draws))
+    pool = np.empty((rows, draws))
+    for j in range(len(POOLS)):
+        if j == 0:
+            values = total
+        else:
+            np.multiply(total, shares[:, j - 1], out=pool)
+            values = pool
+        mean[:, j] = values.mean(axis=1)
+        quantiles[:, j] = np.percentile(values, percentiles, axis=1).T
+        sums[j] = values.sum(axis=0)
+
+    return {"mean": mean, "percentiles": quantiles, "sums": sums}
+
+
+def monte_carlo(
+    inputs,
+    density_per_ndvi: float,
+    pool_shares: Sequence[float],
+    class_areas_km2: Optional[np.ndarray] = None,
+    class_factors: Optional[np.ndarray] = None,
+    draws: int = 10000,
+    seed: int = 0,
+    percentiles: Sequence[float] = PERCENTILES,
+    memory_budget_mb: float = 256,
+    workers: int = 1,
+    model: UncertaintyModel = DEFAULT_MODEL
+) -> Dict[str, Any]:
+    """
+    Monte Carlo percentile intervals of the carbon pools.
+
+    ``inputs`` holds ``area_km2``, ``ndvi_mean`` and optionally
+    ``ndvi_std`` per polygon, as for ``carbon.estimate_batch``. Polygons
+    are simulated in chunks sized so the draws in flight stay within
+    ``memory_budget_mb`` in total. With ``workers`` > 1 the chunks fan out
+    across the Monte Carlo process pool, at most as many at once as the
+    pool has processes, each sized to its share of the budget. Each
+    polygon's draws come from its own seeded stream, so results are the
+    same for any chunk size or worker count.
+
+    Returns ``polygons``, with the mean and percentiles of each pool per
+    polygon (a DataFrame on the input's index for DataFrame input,
+    otherwise a dict of arrays), and ``portfolio``, the same for the sum
+    over all polygons with the shared model coefficients correlated
+    across them.
+    """
+    area = np.nan_to_num(np.asarray(inputs["area_km2"], dtype=np.float64))
+    ndvi_mean = np.nan_to_num(np.asarray(inputs["ndvi_mean"], dtype=np.float64))
+    if "ndvi_std" in inputs:
+        ndvi_std = np.asarray(inputs["ndvi_std"], dtype=np.float64)
+    else:
+        ndvi_std = np.zeros_like(ndvi_mean)
+
+    if class_areas_km2 is None:
+        class_areas = area[:, None]
+    else:
+        class_areas = np.asarray(class_areas_km2, dtype=np.float64).reshape(len(area), -1)
+    if class_factors is None:
+        factors = np.ones(class_areas.shape[1])
+    else:
+        factors = np.asarray(class_factors, dtype=np.float64)
+
+    percentiles = tuple(float(q) for q in percentiles)
+    if workers > 1:
+        # Chunks beyond the pool's processes would only queue, so split the budget by those
+        workers = min(workers, simulation_pool_size())
+    size = chunk_rows(draws, class_areas.shape[1], memory_budget_mb / max(1, workers))
+    chunks = [(start, min(start + size, len(area))) for start in range(0, len(area), size)]
+
+    def args(start, stop):
+        return (
+            start, ndvi_mean[start:stop], ndvi_std[start:stop], class_areas[start:stop], factors,
+            draws, seed, density_per_ndvi, tuple(pool_shares), percentiles, model
+        )
+
+    mean = np.empty((len(area), len(POOLS)))
+    quantiles = np.empty((len(area), len(POOLS), len(percentiles)))
+    sums = np.zeros((len(POOLS), draws))
+
+    def collect(start, stop, chunk):
+        mean[start:stop] = chunk["mean"]
+        quantiles[start:stop] = chunk["percentiles"]
+        sums[:] += chunk["sums"]
+
+    if workers <= 1 or len(chunks) <= 1:
+        for start, stop in chunks:
+            collect(start, stop, simulate_chunk(*args(start, stop)))
+    else:
+        logger.info(f"Simulating {len(area)} polygons x {draws} draws in {len(chunks)} chunks with {workers} workers")
+        pool = get_simulation_pool()
+        pending = {}
+        next_chunk = 0
+        try:
+            while next_chunk < len(chunks) or pending:
+                # Keep at most ``workers`` chunks of draws in memory at once
+                while next_chunk < len(chunks) and len(pending) < workers:
+                    start, stop = chunks[next_chunk]
+                    pending[pool.submit(simulate_chunk, *args(start, stop))] = chunks[next_chunk]
+                    next_chunk += 1
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    start, stop = pending.pop(future)
+                    collect(start, stop, future.result())
+        finally:
+            for future in pending:
+                future.cancel()
+
+    columns = {}
+    for j, pool_name in enumerate(POOLS):
+        columns[f"{pool_name}_mean"] = mean[:, j]
+        for k, q in enumerate(percentiles):
+            columns[column_name(pool_name, q)] = quantiles[:, j, k]
+    if isinstance(inputs, pd.DataFrame):
+        columns = pd.DataFrame(columns, index=inputs.index)
+
+    portfolio_quantiles = np.percentile(sums, percentiles, axis=1)
+    portfolio = {
+        pool_name: {
+            "mean": float(sums[j].mean()),
+            "percentiles": {f"{q:g}": float(portfolio_quantiles[k, j]) for k, q in enumerate(percentiles)}
+        }
+        for j, pool_name in enumerate(POOLS)
+    }
+
+    return {
+        "draws": draws,
+        "seed": seed,
+        "percentiles": list(percentiles),
+        "polygons": columns,
+        "portfolio": portfolio
+    }
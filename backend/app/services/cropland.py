@@ -0,0 +1,412 @@
+# backend/app/services/cropland.py
+from fastapi import HTTPException
+from sqlalchemy.orm import Session
+from sqlalchemy.sql import func
+from sqlalchemy import text
+from shapely.geometry import shape
+from shapely.validation import explain_validity
+from shapely.wkt import loads as wkt_loads
+from contextlib import ExitStack
+from typing import Dict, Any, Optional
+from pathlib import Path
+import logging
+import json
+
+import numpy as np
+
+from app.core.config import settings
+from app.database import engine
+from app.models.polygon import AnalysisPolygon
+from app.services.file_manager import LGRIPFileManager
+from app.services.jobs import JobCancelled, JobContext
+from app.services.mosaic import mosaic_arrays, write_cog
+from app.services.result_cache import dataset_version, geometry_key, result_cache
+from app.services.tile_pool import process_tiles
+from app.services.tile_catalog import lgrip_catalog
+from app.services.tile_store import tile_store
+
+logger = logging.getLogger(__name__)
+
+DATA_DIR = Path(settings.DATA_DIR)
+
+# Compiled LGRIP30 tile index (loaded once per process)
+TILE_CATALOG = lgrip_catalog()
+DATASET_VERSION = dataset_version(TILE_CATALOG.metadata)
+
+
+async def analyze_cropland(
+    polygon_id: int,
+    db: Session,
+    job: Optional[JobContext] = None
+) -> Dict[str, Any]:
+    """
+    Analyze a polygon's area for cropland and other features.
+
+    Runs inside a background job; ``job`` receives progress updates and is
+    checked for cancellation between tiles.
+    """
+    try:
+        polygon = db.query(AnalysisPolygon).filter(AnalysisPolygon.id == polygon_id).first()
+        if not polygon:
+            raise HTTPException(status_code=404, detail="Polygon not found")
+
+        # Convert GeoAlchemy geometry to dict/GeoJSON
+        geom_dict = db.scalar(func.ST_AsGeoJSON(polygon.geometry))
+        if not geom_dict:
+            raise HTTPException(status_code=400, detail="Invalid geometry")
+            
+        # Parse the GeoJSON string to dict
+        geom_dict = json.loads(geom_dict)
+        
+        # Create Shapely geometry
+        geom = shape(geom_dict)
+        logger.info(f"Geometry type: {geom.geom_type}")
+        logger.info(f"Is valid: {geom.is_valid}")
+
+        if not geom.is_valid:
+            logger.error(f"Geometry validation issue: {explain_validity(geom)}")
+            try:
+                # Try to fix the geometry
+                fixed = make_valid(geom)
+                if fixed.geom_type != 'Polygon':
+                    # If we get a MultiPolygon, take the largest polygon
+                    if fixed.geom_type == 'MultiPolygon':
+                        fixed = max(fixed.geoms, key=lambda x: x.area)
+                    # If we get a GeometryCollection, extract polygons and take the largest
+                    elif fixed.geom_type == 'GeometryCollection':
+                        polygons = [g for g in fixed.geoms if g.geom_type in ('Polygon', 'MultiPolygon')]
+                        if not polygons:
+                            raise ValueError("No valid polygons in geometry collection")
+                        fixed = max(polygons, key=lambda x: x.area)
+                        if fixed.geom_type == 'MultiPolygon':
+                            fixed = max(fixed.geoms, key=lambda x: x.area)
+
+                if fixed.geom_type != 'Polygon':
+                    raise ValueError(f"Could not convert to Polygon, got {fixed.geom_type}")
+
+                geom = fixed
+                logger.info(f"Successfully fixed geometry. New type: {geom.geom_type}")
+                
+                # Update the polygon with fixed geometry using proper SQL casting
+                polygon.geometry = db.scalar(func.ST_GeomFromText(geom.wkt, 4326))
+                
+            except Exception as e:
+                logger.error(f"Failed to fix geometry: {str(e)}")
+                raise HTTPException(
+                    status_code=400, 
+                    detail="Could not fix invalid geometry. Please redraw the polygon."
+                )
+
+        logger.info(f"Is simple: {geom.is_simple}")
+        logger.info(f"Bounds: {geom.bounds}")
+        logger.info(f"Area: {geom.area}")
+
+        # Reuse a finished analysis of the same geometry if there is one
+        cache_key = geometry_key(geom, DATASET_VERSION)
+        cached = result_cache.get(cache_key)
+        if cached is not None:
+            logger.info(f"Reusing cached analysis {cache_key} for polygon {polygon_id}")
+            result_cache.restore_raster(
+                cached,
+                DATA_DIR / str(polygon_id) / f"masked_raster_{polygon_id}.tif"
+            )
+            polygon.cropland_data = cached['cropland_data']
+            polygon.analysis_status = cached['analysis_status']
+            db.commit()
+            return {
+                "status": "success",
+                "message": "Analysis complete",
+                "cached": True
+            }
+
+        # Continue with the rest of the analysis...
+
+        # Find required tiles
+        try:
+            bounds = geom.bounds
+            logger.info(f"Finding tiles for bounds: {bounds}")
+            
+            # Debug: Check if bounds make sense
+            if bounds[0] < -180 or bounds[2] > 180 or bounds[1] < -90 or bounds[3] > 90:
+                logger.warning(f"Suspicious bounds for polygon {polygon_id}: {bounds}")
+            
+            required_tiles = TILE_CATALOG.tiles_for_geometry(geom)
+            
+            logger.info(f"Found {len(required_tiles)} required tiles")
+            if not required_tiles:
+                logger.error("No tiles found for polygon bounds!")
+                raise HTTPException(status_code=400, detail="No data available for this area")
+                
+        except Exception as e:
+            logger.error(f"Error finding tiles: {str(e)}")
+            raise HTTPException(status_code=500, detail=f"Error finding tiles: {str(e)}")
+
+        # Store masked datasets for merging
+        masked_datasets = []
+        results = []
+        missing_tiles = []
+        file_manager = LGRIPFileManager()
+        
+        # Process tiles with proper masking
+        total_tiles = len(required_tiles)
+        successful_tiles = 0
+        if job:
+            job.update(stage="fetching_tiles", tiles_total=total_tiles)
+        
+        pins = ExitStack()
+        with pins:
+            # Fetch tiles first; downloads are I/O bound and stay on this loop
+            available_tiles = []
+            for tile_id, tile_info in required_tiles:
+                if job:
+                    job.raise_if_cancelled()
+                try:
+                    # A second try covers a raw tile replaced by its ingested
+                    # copy (or evicted) between the lookup and the pin
+                    for attempt in range(2):
+                        file_path, status = await file_manager.get_file_path(
+                            tile_info,
+                            progress_callback=job.add_bytes if job else None
+                        )
+                        if not file_path:
+                            break
+                        # Keep the tile on disk until this job has read it
+                        pins.enter_context(tile_store.pin(file_path))
+                        if Path(file_path).exists():
+                            break
+                        logger.warning(f"Tile {tile_id} was removed before it could be pinned")
+                        file_path = None
+                    if not file_path:
+                        logger.warning(f"Tile {tile_id} not available")
+                        missing_tiles.append(tile_id)
+                        continue
+                    available_tiles.append((tile_id, file_path, tile_info))
+                except JobCancelled:
+                    raise
+                except Exception as e:
+                    logger.error(f"Error fetching tile {tile_id}: {str(e)}")
+                    missing_tiles.append(tile_id)
+
+            tiles_done = len(missing_tiles)
+
+            def on_tile_done(tile_id):
+                nonlocal tiles_done
+                tiles_done += 1
+                if job:
+                    job.update(tiles_done=tiles_done)
+                    job.raise_if_cancelled()
+
+            if job:
+                job.update(stage="processing_tiles", tiles_done=tiles_done)
+
+            # Mask and count tiles in parallel; outcomes keep the input order
+            outcomes = process_tiles(available_tiles, geom, on_tile_done=on_tile_done)
+
+        for outcome in outcomes:
+            if 'error' in outcome:
+                missing_tiles.append(outcome['tile_id'])
+                continue
+            if outcome['dataset'] is None:
+                logger.warning(f"Polygon does not overlap tile {outcome['tile_id']}")
+            else:
+                # Store masked dataset for merging
+                masked_datasets.append(outcome['dataset'])
+                results.append(outcome['result'])
+            successful_tiles += 1
+
+# Check if we have any successful tile processing
+        if not successful_tiles:
+            logger.warning(f"No valid tiles processed for polygon {polygon_id}")
+            # Store empty results in database
+            polygon.cropland_data = {
+                "areas": {
+                    "Ocean and Water bodies": {
+                        "area_m2": 0.0,
+                        "area_ha": 0.0,
+                        "area_km2": 0.0,
+                        "area_acres": 0.0,
+                        "area_sq_mile": 0.0,
+                        "percentage": 0.0
+                    },
+                    "Non-croplands": {
+                        "area_m2": 0.0,
+                        "area_ha": 0.0,
+                        "area_km2": 0.0,
+                        "area_acres": 0.0,
+                        "area_sq_mile": 0.0,
+                        "percentage": 0.0
+                    },
+                    "Irrigated croplands": {
+                        "area_m2": 0.0,
+                        "area_ha": 0.0,
+                        "area_km2": 0.0,
+                        "area_acres": 0.0,
+                        "area_sq_mile": 0.0,
+                        "percentage": 0.0
+                    },
+                    "Rainfed croplands": {
+                        "area_m2": 0.0,
+                        "area_ha": 0.0,
+                        "area_km2": 0.0,
+                        "area_acres": 0.0,
+                        "area_sq_mile": 0.0,
+                        "percentage": 0.0
+                    }
+                },
+                "total_area_km2": 0.0,
+                "total_area_sq_mile": 0.0,
+                "total_pixels": 0,
+                "valid_pixels": 0,
+                "missing_tiles": missing_tiles,
+                "coverage_percentage": 0.0
+            }
+            polygon.analysis_status = 'no_data'
+            db.commit()
+            
+            return {"status": "success", "message": "No data available for this area"}
+
+
+        # Merge masked rasters if we have data
+        if masked_datasets:
+            if job:
+                job.update(stage="merging")
+            polygon_dir = DATA_DIR / str(polygon_id)
+            polygon_dir.mkdir(exist_ok=True)
+            masked_path = polygon_dir / f"masked_raster_{polygon_id}.tif"
+
+            # Place the masked windows on the common grid in memory and
+            # write the mosaic once
+            mosaic, out_transform = mosaic_arrays(masked_datasets)
+            write_cog(
+                masked_path,
+                mosaic,
+                out_transform,
+                masked_datasets[0]['crs'],
+                masked_datasets[0]['nodata']
+            )
+
+        # Convert numpy types to Python native types
+        def convert_to_native(obj):
+            if isinstance(obj, np.integer):
+                return int(obj)
+            elif isinstance(obj, np.floating):
+                return float(obj)
+            elif isinstance(obj, np.ndarray):
+                return obj.tolist()
+            return obj
+        
+        # Combine results properly
+        total_areas = {
+            0: 0,  # Ocean/Water bodies/No data
+            1: 0,  # Non-croplands
+            2: 0,  # Irrigated croplands
+            3: 0   # Rainfed croplands
+        }
+
+
+        # Updated key map with proper descriptions
+        key_map = {
+            0: 'Ocean and Water bodies',
+            1: 'Non-croplands',
+            2: 'Irrigated croplands',
+            3: 'Rainfed croplands'
+        }
+
+        total_pixels = 0
+        valid_pixels = 0
+        
+        for result in results:
+            for key, area in result['areas'].items():
+                # Map 'no_data' to 0 and keep other values as is
+                mapped_key = 0 if key == 'no_data' else key
+                total_areas[mapped_key] += float(area)
+            total_pixels += int(result['total_pixels'])
+            valid_pixels += int(result['valid_pixels'])            
+
+        # Calculate total valid area (excluding ocean/water/no data)
+        total_valid_area = float(sum(v for k, v in total_areas.items() if k != 0))
+        
+        # Prevent division by zero when calculating percentages
+        formatted_results = {
+            'areas': {
+                key_map[k]: {
+                    'area_m2': float(v),
+                    'area_ha': float(v / 10000),
+                    'area_km2': float(v / 1000000),
+                    'area_acres': float(v / 4046.86),
+                    'area_sq_mile': float(v / 2589988.11),
+                    'percentage': float(v / total_valid_area * 100) if total_valid_area > 0 and k != 0 else 0.0
+                }
+                for k, v in total_areas.items()
+            },
+            'total_area_km2': float(total_valid_area / 1000000),
+            'total_area_sq_mile': float(total_valid_area / 2589988.11),
+            'total_pixels': int(total_pixels),
+            'valid_pixels': int(valid_pixels),
+            'missing_tiles': missing_tiles,
+            'coverage_percentage': float(successful_tiles / total_tiles * 100)
+        }
+        
+        # Update database
+        polygon.cropland_data = formatted_results
+        polygon.analysis_status = 'complete' if not missing_tiles else 'partial'
+        db.commit()
+
+        # Partial results may fill in once missing tiles become available
+        if polygon.analysis_status == 'complete':
+            result_cache.put(
+                cache_key,
+                DATASET_VERSION,
+                formatted_results,
+                polygon.analysis_status,
+                raster_path=DATA_DIR / str(polygon_id) / f"masked_raster_{polygon_id}.tif"
+            )
+
+        return {
+            "status": "success",
+            "message": "Analysis complete"
+        }
+        
+    except JobCancelled:
+        raise
+    except Exception as e:
+        logger.error(f"Analysis error: {str(e)}")
+        logger.exception(e)
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+def make_valid(geom):
+    """
+    Make a geometry valid using multiple strategies.
+    Returns a valid Shapely geometry.
+    """
+    # First try buffer(0)
+    try:
+        fixed = geom.buffer(0)
+        if fixed.is_valid and fixed.geom_type == 'Polygon':
+            return fixed
+    except Exception:
+        pass
+
+    # If buffer(0) fails or produces wrong type, try ST_MakeValid
+    try:
+        # Convert to WKT
+        wkt = geom.wkt
+        
+        # Create a database connection
+        # engine = create_engine(settings.SQLALCHEMY_DATABASE_URL)
+        with engine.connect() as connection:
+            # Use PostGIS ST_MakeValid
+            result = connection.execute(
+                text("SELECT ST_AsText(ST_MakeValid(:geom));"),
+                {"geom": wkt}
+            ).scalar()
+            
+            if result:
+                fixed = wkt_loads(result)
+                return fixed
+    except Exception as e:
+        logger.error(f"ST_MakeValid failed: {str(e)}")
+        raise
+
+    raise ValueError("Could not make geometry valid")
@@ -0,0 +1,110 @@
+# backend/app/services/earthdata.py
+import logging
+import os
+import threading
+import time
+from typing import Any, Dict, Optional, Tuple
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from app.core.config import settings
+from app.services.range_download import head_metadata
+
+logger = logging.getLogger(__name__)
+
+URS_HOST = 'urs.earthdata.nasa.gov'
+
+# How long a failed HEAD is remembered, so a missing tile is not re-probed
+# on every analysis but a transient error clears quickly
+NEGATIVE_TTL = 60.0
+
+
+class EarthdataSession(requests.Session):
+    """
+    Session that keeps Basic auth across the redirect to and from
+    Earthdata Login. requests drops the Authorization header whenever a
+    redirect changes host; URS needs it on the hop to urs.earthdata.nasa.gov,
+    and the cookies it sets then authorize every later request.
+
+    Credentials only follow https redirects to URS itself or to the
+    Earthdata data hosts in EARTHDATA_AUTH_HOSTS; every other redirect is
+    handled by requests, which strips them.
+    """
+
+    def rebuild_auth(self, prepared_request, response):
+        target = urlparse(prepared_request.url)
+        if 'Authorization' in prepared_request.headers and target.scheme == 'https' and (
+            target.hostname == URS_HOST or target.hostname in settings.EARTHDATA_AUTH_HOSTS
+        ):
+            return
+        super().rebuild_auth(prepared_request, response)
+
+
+class EarthdataClient:
+    """
+    Process-wide pooled HTTP client for NASA Earthdata.
+
+    One keep-alive session, sized for the parallel range downloader, is
+    shared by every analysis, so the URS login cookies are reused and the
+    OAuth redirect happens once per process. HEAD metadata (status, size,
+    ETag, Last-Modified, range support) is cached for ``head_ttl`` seconds.
+    """
+
+    def __init__(self, username: Optional[str], password: Optional[str], pool_size: int, head_ttl: float):
+        self.session = EarthdataSession()
+        self.session.auth = (username, password) if username else None
+        self.session.headers.update({
+            'Accept': 'application/json',
+            'User-Agent': 'geollm-backend/1.0'
+        })
+        adapter = HTTPAdapter(
+            pool_connections=4,
+            pool_maxsize=pool_size,
+            max_retries=Retry(total=3, backoff_factor=1, status_forcelist=(502, 503, 504), allowed_methods=('HEAD', 'GET'))
+        )
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+
+        self.head_ttl = head_ttl
+        self._heads: Dict[str, Tuple[float, Dict[str, Any]]] = {}
+        self._lock = threading.Lock()
+
+    def head(self, url: str) -> Dict[str, Any]:
+        """HEAD metadata for ``url``, from cache while fresh"""
+        now = time.monotonic()
+        with self._lock:
+            cached = self._heads.get(url)
+        if cached is not None and cached[0] > now:
+            return cached[1]
+
+        response = self.session.head(url, allow_redirects=True, timeout=60)
+        metadata = head_metadata(response)
+        ttl = self.head_ttl if metadata['status'] == 200 else NEGATIVE_TTL
+        with self._lock:
+            self._heads[url] = (now + ttl, metadata)
+        return metadata
+
+    def invalidate(self, url: str):
+        with self._lock:
+            self._heads.pop(url, None)
+
+
+_client: Optional[EarthdataClient] = None
+_client_lock = threading.Lock()
+
+
+def earthdata_client() -> EarthdataClient:
+    """Shared Earthdata client, created on first use"""
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = EarthdataClient(
+                os.getenv("NASA_EARTHDATA_USERNAME"),
+                os.getenv("NASA_EARTHDATA_PASSWORD"),
+                pool_size=max(settings.EARTHDATA_POOL_SIZE, settings.DOWNLOAD_CONNECTIONS),
+                head_ttl=settings.EARTHDATA_HEAD_TTL
+            )
+        return _client
@@ -0,0 +1,229 @@
+# backend/app/services/ee_tasks.py
+import asyncio
+import logging
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# UNKNOWN: the task no longer exists (or never did), so it will never finish
+TERMINAL_STATES = {'COMPLETED', 'FAILED', 'CANCELLED', 'UNKNOWN'}
+
+# Consecutive polls a task's operation may be missing (e.g. just after it
+# starts) before it is reported UNKNOWN
+MISSING_POLLS = 3
+
+# Operation metadata states as the task states the rest of the app uses
+OPERATION_STATES = {
+    'PENDING': 'READY',
+    'RUNNING': 'RUNNING',
+    'CANCELLING': 'CANCEL_REQUESTED',
+    'SUCCEEDED': 'COMPLETED',
+    'CANCELLED': 'CANCELLED',
+    'FAILED': 'FAILED'
+}
+
+# Longest a waiter waits for a task to finish (seconds)
+DEFAULT_TIMEOUT = 3600.0
+
+
+def operation_status(operation: Dict[str, Any]) -> Dict[str, Any]:
+    """Task status dict (``id``, ``name``, ``state``, ...) of an Earth Engine operation"""
+    metadata = operation.get('metadata', {})
+    status = {
+        'id': operation['name'].rsplit('/', 1)[-1],
+        'name': operation['name'],
+        'state': OPERATION_STATES.get(metadata.get('state'), 'UNKNOWN'),
+        'description': metadata.get('description')
+    }
+    if operation.get('done') and 'error' in operation:
+        status['error_message'] = operation['error'].get('message')
+    return status
+
+
+class EarthEngineTaskClient:
+    """
+    Blocking Earth Engine calls used by the poller. Swap in any object with
+    the same ``statuses`` method (e.g. a local fake) via ``set_task_client``.
+    """
+
+    def statuses(self, operation_names: List[str]) -> Dict[str, Dict[str, Any]]:
+        """
+        Status dicts (with at least ``state``) of the given operations
+        (``Task.operation_name``), fetched one by one. Operations that
+        cannot be fetched are left out; if none can, the last error is
+        raised.
+        """
+        import ee
+
+        from app.services.satellite import init_earth_engine
+
+        init_earth_engine()
+        statuses = {}
+        error = None
+        for name in operation_names:
+            try:
+                statuses[name] = operation_status(ee.data.getOperation(name))
+            except ee.EEException as e:
+                logger.warning(f"Could not fetch Earth Engine operation {name}: {str(e)}")
+                error = e
+        if error is not None and not statuses:
+            raise error
+        return statuses
+
+
+class TaskPoller:
+    """
+    One background poller for every outstanding Earth Engine export task
+    in the process.
+
+    Waiters register a task's operation name and await a future; a single
+    thread checks all outstanding tasks with one status call per poll and
+    resolves each future with the final status dict once its task reaches
+    a terminal state. A task missing from ``missing_polls`` consecutive
+    polls resolves as UNKNOWN. The poll interval starts at ``min_interval`` and backs off
+    by ``backoff`` up to ``max_interval`` while nothing changes; a new task
+    or a state change resets it.
+    """
+
+    def __init__(
+        self,
+        client=None,
+        min_interval: float = 2.0,
+        max_interval: float = 30.0,
+        backoff: float = 1.5,
+        missing_polls: int = MISSING_POLLS
+    ):
+        self.client = client or EarthEngineTaskClient()
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.backoff = backoff
+        self.missing_polls = missing_polls
+
+        self._futures: Dict[str, Future] = {}
+        self._states: Dict[str, str] = {}
+        self._missing: Dict[str, int] = {}
+        self._wake = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self._stopped = False
+        self._interval = min_interval
+
+    def watch(self, task_id: str) -> Future:
+        """Future resolved with the task's terminal status dict"""
+        with self._wake:
+            future = self._futures.get(task_id)
+            if future is None:
+                future = Future()
+                self._futures[task_id] = future
+                self._interval = self.min_interval
+                self._ensure_thread()
+                self._wake.notify()
+            return future
+
+    async def wait(self, task_id: str, timeout: Optional[float] = DEFAULT_TIMEOUT) -> Dict[str, Any]:
+        """
+        Await a task's terminal status without blocking the event loop.
+        Raises asyncio.TimeoutError after ``timeout`` seconds.
+        """
+        # Shielded so a timed-out waiter does not cancel the future other waiters share
+        return await asyncio.wait_for(asyncio.shield(asyncio.wrap_future(self.watch(task_id))), timeout)
+
+    def state(self, task_id: str) -> Optional[str]:
+        """Last polled state of a task"""
+        return self._states.get(task_id)
+
+    def shutdown(self):
+        with self._wake:
+            self._stopped = True
+            self._wake.notify()
+
+    def _ensure_thread(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name="ee-task-poller", daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            with self._wake:
+                while not self._futures and not self._stopped:
+                    self._wake.wait()
+                if self._stopped:
+                    return
+                task_ids = list(self._futures)
+
+            changed = self._poll(task_ids)
+
+            with self._wake:
+                if changed:
+                    self._interval = self.min_interval
+                else:
+                    self._interval = min(self.max_interval, self._interval * self.backoff)
+                if self._futures and not self._stopped:
+                    self._wake.wait(self._interval)
+
+    def _poll(self, task_ids: List[str]) -> bool:
+        started = time.monotonic()
+        try:
+            statuses = self.client.statuses(task_ids)
+        except Exception as e:
+            logger.error(f"Error polling {len(task_ids)} Earth Engine tasks: {str(e)}")
+            return False
+
+        changed = False
+        for task_id in task_ids:
+            status = statuses.get(task_id)
+            if status is None:
+                self._missing[task_id] = self._missing.get(task_id, 0) + 1
+                if self._missing[task_id] < self.missing_polls:
+                    continue
+                logger.warning(f"Earth Engine task {task_id} not found in {self.missing_polls} polls")
+                status = {'id': task_id, 'state': 'UNKNOWN', 'error_message': 'Task not found'}
+            else:
+                self._missing.pop(task_id, None)
+            state = status.get('state')
+            if self._states.get(task_id) != state:
+                changed = True
+                self._states[task_id] = state
+            if state in TERMINAL_STATES:
+                with self._wake:
+                    waiter = self._futures.pop(task_id, None)
+                self._states.pop(task_id, None)
+                self._missing.pop(task_id, None)
+                if waiter is not None and not waiter.done():
+                    waiter.set_result(status)
+
+        logger.debug(f"Polled {len(task_ids)} Earth Engine tasks in {time.monotonic() - started:.2f}s")
+        return changed
+
+
+_poller: Optional[TaskPoller] = None
+_poller_lock = threading.Lock()
+
+
+def task_poller() -> TaskPoller:
+    """Process-wide task poller, started on first use"""
+    global _poller
+    with _poller_lock:
+        if _poller is None:
+            _poller = TaskPoller()
+        return _poller
+
+
+def set_task_client(client):
+    """Replace the Earth Engine client (e.g. with a local fake), restarting the poller"""
+    global _poller
+    with _poller_lock:
+        if _poller is not None:
+            _poller.shutdown()
+        _poller = TaskPoller(client=client)
+        return _poller
+
+
+def shutdown_task_poller():
+    global _poller
+    with _poller_lock:
+        if _poller is not None:
+            _poller.shutdown()
+            _poller = None
@@ -1,24 +1,62 @@
 # backend/app/services/file_manager.py
+import asyncio
+import fcntl
 import os
+import threading
 import requests
-from typing import Optional, Tuple
+from concurrent.futures import Future
+from typing import Callable, Dict, List, Optional, Tuple
 from pathlib import Path
 import logging
 from fastapi import HTTPException
 from dotenv import load_dotenv
-from tqdm import tqdm
 import netrc
 import time
 
+from app.core.config import settings
+from app.services.earthdata import earthdata_client
+from app.services.range_download import RangeDownloader
+from app.services.tile_ingest import ingested_path, is_ingested, remove_raw, schedule_ingest
+from app.services.tile_store import tile_store
+
 
 
 load_dotenv()
 
 logger = logging.getLogger(__name__)
 
+
+class _Flight:
+    """One in-flight tile download and everyone waiting on it"""
+
+    def __init__(self):
+        self.future: Future = Future()
+        self.callbacks: List[Callable[[int], None]] = []
+        self._lock = threading.Lock()
+
+    def subscribe(self, callback: Callable[[int], None]):
+        with self._lock:
+            self.callbacks.append(callback)
+
+    def report(self, count: int):
+        with self._lock:
+            callbacks = list(self.callbacks)
+        for callback in callbacks:
+            try:
+                callback(count)
+            except Exception as e:
+                logger.warning(f"Download progress callback failed: {str(e)}")
+
+
+# Downloads in progress in this process, by file name. Jobs run in
+# separate threads and event loops, so this is guarded by a thread lock.
+_inflight: Dict[str, _Flight] = {}
+_inflight_lock = threading.Lock()
+
+
 class LGRIPFileManager:
     def __init__(self):
-        self.local_dir = Path("app/data/lgrip30_files")
+        self.local_dir = Path(settings.LGRIP_TILE_DIR)
         self.nasa_username = os.getenv("NASA_EARTHDATA_USERNAME")
         self.nasa_password = os.getenv("NASA_EARTHDATA_PASSWORD")
         self.session = None
@@ -51,34 +89,36 @@ machine e4ftl01.cr.usgs.gov login {self.nasa_username} password {self.nasa_passw
             logger.info("Created .netrc file for NASA Earthdata authentication")
 
     async def get_session(self) -> Optional[requests.Session]:
-        """Create authenticated session for NASA Earthdata"""
+        """Shared, pooled session for NASA Earthdata"""
         try:
-            session = requests.Session()
-            
-            # Use .netrc authentication
-            session.auth = (self.nasa_username, self.nasa_password)
-            
-            # Add required headers
-            session.headers.update({
-                'Accept': 'application/json',
-                'User-Agent': 'geollm-backend/1.0'
-            })
-            
-            self.session = session
-            return session
-                
+            self.session = earthdata_client().session
+            return self.session
         except Exception as e:
             logger.error(f"Error creating NASA Earthdata session: {str(e)}")
             return None
 
-    async def get_file_path(self, tile_info: dict) -> Tuple[Optional[str], str]:
+    async def get_file_path(
+        self,
+        tile_info: dict,
+        progress_callback: Optional[Callable[[int], None]] = None
+    ) -> Tuple[Optional[str], str]:
         """Check for file locally, then remotely."""
         filename = os.path.basename(tile_info['path'])
         local_path = self.local_dir / filename
         
+        # Prefer the ingested copy (512 px COG + chunk index)
+        if is_ingested(local_path):
+            ingested = ingested_path(local_path)
+            tile_store.touch(ingested)
+            # The raw tile was still in use when its ingest finished
+            remove_raw(local_path)
+            return str(ingested), "ingested"
+
         # Check local file first
         if local_path.exists():
             if local_path.stat().st_size > 0:
+                tile_store.touch(local_path)
+                schedule_ingest(local_path)
                 return str(local_path), "local"
             else:
                 local_path.unlink()
@@ -90,63 +130,120 @@ machine e4ftl01.cr.usgs.gov login {self.nasa_username} password {self.nasa_passw
                 return None, "auth_failed"
         
         try:
-            # Check if remote file exists
-            head_response = self.session.head(tile_info['path'])
-            if head_response.status_code == 200:
+            # Check if remote file exists; cached per process
+            metadata = earthdata_client().head(tile_info['path'])
+            if metadata['status'] == 200:
                 # Try to download the file
-                file_path = await self.download_file(tile_info)
+                file_path = await self.download_file(tile_info, progress_callback)
                 if file_path:
+                    schedule_ingest(file_path)
                     return file_path, "downloaded"
                 return None, "download_failed"
             else:
-                return None, f"remote_error_{head_response.status_code}"
+                return None, f"remote_error_{metadata['status']}"
                 
         except Exception as e:
             logger.error(f"Error checking remote file: {str(e)}")
             return None, "remote_error"
 
-    async def download_file(self, tile_info: dict) -> Optional[str]:
-        """Download file from NASA Earthdata"""
-        try:
-            if not self.session:
-                self.session = await self.get_session()
+    async def download_file(
+        self,
+        tile_info: dict,
+        progress_callback: Optional[Callable[[int], None]] = None
+    ) -> Optional[str]:
+        """
+        Download file from NASA Earthdata, reporting bytes written to progress_callback.
+
+        Concurrent requests for the same tile share one download: the first
+        caller fetches it and later callers await the same result and get
+        its progress from then on. Across worker processes a lock file next
+        to the tile serializes the download.
+        """
+        filename = os.path.basename(tile_info['path'])
+        local_path = self.local_dir / filename
+
+        with _inflight_lock:
+            flight = _inflight.get(filename)
+            leader = flight is None
+            if leader:
+                flight = _Flight()
+                _inflight[filename] = flight
+            if progress_callback:
+                flight.subscribe(progress_callback)
+
+        if leader:
+            try:
                 if not self.session:
-                    return None
-                    
-            filename = os.path.basename(tile_info['path'])
-            local_path = self.local_dir / filename
-            
-            # Get file size first
-            head_response = self.session.head(tile_info['path'])
-            total_size = int(head_response.headers.get('content-length', 0))
-            
-            logger.info(f"Starting download of {filename} ({total_size/1024/1024:.1f} MB)")
-            
-            # Stream download with progress tracking
-            with self.session.get(tile_info['path'], stream=True) as r:
-                r.raise_for_status()
-                
-                with open(local_path, 'wb') as f:
-                    with tqdm(total=total_size, unit='iB', unit_scale=True) as pbar:
-                        for chunk in r.iter_content(chunk_size=8192):
-                            if chunk:
-                                size = f.write(chunk)
-                                pbar.update(size)
-            
-            # Verify file size after download
-            if local_path.stat().st_size == total_size:
-                logger.info(f"Successfully downloaded {filename}")
-                return str(local_path)
-            else:
-                logger.error(f"Downloaded file size mismatch for {filename}")
-                local_path.unlink()
-                return None
-            
+                    self.session = await self.get_session()
+                    if not self.session:
+                        raise RuntimeError("Could not create NASA Earthdata session")
+                path = await asyncio.to_thread(self._download_exclusive, tile_info, local_path, flight.report)
+                flight.future.set_result(path)
+            except BaseException as e:
+                flight.future.set_exception(e)
+            finally:
+                with _inflight_lock:
+                    _inflight.pop(filename, None)
+        else:
+            logger.info(f"Waiting for in-flight download of {filename}")
+
+        try:
+            return await asyncio.wrap_future(flight.future)
         except Exception as e:
-            logger.error(f"Error downloading file: {str(e)}")
-            if local_path.exists():
-                local_path.unlink()
+            logger.error(f"Error downloading {filename}: {str(e)}")
             return None
 
+    def _download_exclusive(
+        self,
+        tile_info: dict,
+        local_path: Path,
+        progress_callback: Callable[[int], None]
+    ) -> str:
+        """
+        Download under an exclusive lock on ``{tile}.lock``, so only one
+        worker process fetches a tile. Blocking; runs in a worker thread.
+
+        Segments are fetched concurrently with Range requests. A failed or
+        interrupted download leaves its .part file and manifest in place
+        and resumes on the next call.
+        """
+        lock_path = local_path.with_name(local_path.name + '.lock')
+        with open(lock_path, 'a') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                # Another process may have finished it while we waited
+                if local_path.exists() and local_path.stat().st_size > 0:
+                    logger.info(f"{local_path.name} was downloaded by another worker")
+                    return str(local_path)
+
+                # Make room for the new tile before fetching it; a resumed
+                # download only needs room for what it has not written yet
+                tile_store.ensure_space(
+                    int(tile_info.get('file_size_gb', 0) * 1024 ** 3),
+                    partial=local_path.with_name(local_path.name + '.part')
+                )
+
+                downloader = RangeDownloader(
+                    self.session,
+                    segment_size=settings.DOWNLOAD_SEGMENT_MB * 1024 * 1024,
+                    connections=settings.DOWNLOAD_CONNECTIONS
+                )
+                logger.info(f"Starting download of {local_path.name}")
+                client = earthdata_client()
+                try:
+                    return str(downloader.download(
+                        tile_info['path'],
+                        local_path,
+                        checksum=tile_info.get('checksum'),
+                        progress_callback=progress_callback,
+                        metadata=client.head(tile_info['path'])
+                    ))
+                except Exception:
+                    # The remote file may have changed; re-check next time
+                    client.invalidate(tile_info['path'])
+                    raise
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
 
 # https://e4ftl01.cr.usgs.gov//DP109/COMMUNITY/LGRIP30.001/2014.01.01/LGRIP30_2015_N00E30_001_2023014175240.tif?_ga=2.233075934.1710895569.1734132909-1600426111.1734132909
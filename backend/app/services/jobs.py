@@ -0,0 +1,246 @@
+# backend/app/services/jobs.py
+import asyncio
+import logging
+import threading
+import time
+import traceback
+import uuid
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from app.core.config import settings
+from app.database import SessionLocal
+from app.models.job import AnalysisJob
+
+logger = logging.getLogger(__name__)
+
+TERMINAL_STATES = {"succeeded", "failed", "cancelled"}
+
+
+class JobCancelled(Exception):
+    """Raised inside a running job once cancellation has been requested"""
+
+
+class JobContext:
+    """
+    Handle passed to a running job for reporting progress and checking
+    for cancellation. Progress is written to the ``analysis_jobs`` row at
+    most once per ``flush_interval`` seconds, so other workers polling
+    ``GET /jobs/{id}`` see it, and the same write picks up a cancel request
+    made from another worker.
+    """
+
+    def __init__(self, job_id: str, cancel_event: threading.Event, flush_interval: float = 1.0):
+        self.job_id = job_id
+        self.cancel_event = cancel_event
+        self.flush_interval = flush_interval
+        self.progress: Dict[str, Any] = {
+            "stage": "queued",
+            "tiles_total": 0,
+            "tiles_done": 0,
+            "bytes_downloaded": 0
+        }
+        self._lock = threading.Lock()
+        self._last_flush = 0.0
+
+    def update(self, **fields):
+        """Merge progress fields and persist them"""
+        with self._lock:
+            self.progress.update(fields)
+        self._flush(force=True)
+
+    def add_bytes(self, count: int):
+        """Record downloaded bytes; safe to call from download threads"""
+        with self._lock:
+            self.progress["bytes_downloaded"] += count
+        self._flush()
+
+    @property
+    def cancelled(self) -> bool:
+        return self.cancel_event.is_set()
+
+    def raise_if_cancelled(self):
+        if self.cancel_event.is_set():
+            raise JobCancelled(f"Job {self.job_id} was cancelled")
+
+    def _flush(self, force: bool = False):
+        now = time.monotonic()
+        if not force and now - self._last_flush < self.flush_interval:
+            return
+        self._last_flush = now
+
+        with self._lock:
+            progress = dict(self.progress)
+
+        db = SessionLocal()
+        try:
+            job = db.get(AnalysisJob, self.job_id)
+            if job is None:
+                return
+            job.progress = progress
+            if job.cancel_requested:
+                self.cancel_event.set()
+            db.commit()
+        except Exception as e:
+            logger.error(f"Error saving progress for job {self.job_id}: {str(e)}")
+            db.rollback()
+        finally:
+            db.close()
+
+
+JobFunction = Callable[[JobContext], Awaitable[Dict[str, Any]]]
+
+
+class JobManager:
+    """
+    In-process background job runner.
+
+    Jobs are coroutine functions executed on a thread pool, each in its own
+    event loop, so blocking rasterio/requests calls never stall the API's
+    event loop. Job state lives in the ``analysis_jobs`` table.
+    """
+
+    def __init__(self, max_workers: int):
+        self.max_workers = max_workers
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="analysis-job")
+        self._futures: Dict[str, Future] = {}
+        self._cancel_events: Dict[str, threading.Event] = {}
+        self._lock = threading.Lock()
+
+    def submit(self, polygon_id: int, fn: JobFunction, kind: str = "cropland") -> str:
+        """Queue ``fn(job_context)`` and return the new job id"""
+        job_id = str(uuid.uuid4())
+
+        db = SessionLocal()
+        try:
+            db.add(AnalysisJob(
+                id=job_id,
+                polygon_id=polygon_id,
+                kind=kind,
+                status="queued",
+                progress={"stage": "queued", "tiles_total": 0, "tiles_done": 0, "bytes_downloaded": 0}
+            ))
+            db.commit()
+        finally:
+            db.close()
+
+        cancel_event = threading.Event()
+        with self._lock:
+            self._cancel_events[job_id] = cancel_event
+            self._futures[job_id] = self._executor.submit(self._run, job_id, fn, cancel_event)
+
+        logger.info(f"Queued {kind} job {job_id} for polygon {polygon_id}")
+        return job_id
+
+    def _run(self, job_id: str, fn: JobFunction, cancel_event: threading.Event):
+        context = JobContext(job_id, cancel_event)
+        try:
+            if self._is_cancel_requested(job_id):
+                raise JobCancelled(f"Job {job_id} was cancelled")
+
+            self._set_state(job_id, status="running", started_at=datetime.now(timezone.utc))
+            context.update(stage="running")
+
+            result = asyncio.run(fn(context))
+
+            context.update(stage="done")
+            self._set_state(job_id, status="succeeded", result=result, finished_at=datetime.now(timezone.utc))
+        except JobCancelled:
+            logger.info(f"Job {job_id} cancelled")
+            context.update(stage="cancelled")
+            self._set_state(job_id, status="cancelled", finished_at=datetime.now(timezone.utc))
+        except Exception as e:
+            detail = getattr(e, "detail", None) or str(e)
+            logger.error(f"Job {job_id} failed: {detail}")
+            logger.error(traceback.format_exc())
+            context.update(stage="failed")
+            self._set_state(job_id, status="failed", error=str(detail), finished_at=datetime.now(timezone.utc))
+        finally:
+            with self._lock:
+                self._futures.pop(job_id, None)
+                self._cancel_events.pop(job_id, None)
+
+    def cancel(self, job_id: str) -> bool:
+        """
+        Request cancellation. Queued jobs are dropped immediately; running
+        jobs stop at their next cancellation check. Returns False if the job
+        does not exist or has already finished.
+        """
+        db = SessionLocal()
+        try:
+            job = db.get(AnalysisJob, job_id)
+            if job is None or job.status in TERMINAL_STATES:
+                return False
+            job.cancel_requested = True
+            db.commit()
+        finally:
+            db.close()
+
+        with self._lock:
+            event = self._cancel_events.get(job_id)
+            future = self._futures.get(job_id)
+        if event is not None:
+            event.set()
+        if future is not None and future.cancel():
+            # Never started, so _run won't clean up after it
+            with self._lock:
+                self._futures.pop(job_id, None)
+                self._cancel_events.pop(job_id, None)
+            self._set_state(job_id, status="cancelled", finished_at=datetime.now(timezone.utc))
+        return True
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        db = SessionLocal()
+        try:
+            job = db.get(AnalysisJob, job_id)
+            if job is None:
+                return None
+            return {
+                "id": job.id,
+                "polygon_id": job.polygon_id,
+                "kind": job.kind,
+                "status": job.status,
+                "progress": job.progress or {},
+                "result": job.result,
+                "error": job.error,
+                "cancel_requested": bool(job.cancel_requested),
+                "created_at": job.created_at.isoformat() if job.created_at else None,
+                "started_at": job.started_at.isoformat() if job.started_at else None,
+                "finished_at": job.finished_at.isoformat() if job.finished_at else None
+            }
+        finally:
+            db.close()
+
+    def shutdown(self):
+        with self._lock:
+            events = list(self._cancel_events.values())
+        for event in events:
+            event.set()
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def _is_cancel_requested(self, job_id: str) -> bool:
+        db = SessionLocal()
+        try:
+            job = db.get(AnalysisJob, job_id)
+            return bool(job and job.cancel_requested)
+        finally:
+            db.close()
+
+    def _set_state(self, job_id: str, **fields):
+        db = SessionLocal()
+        try:
+            job = db.get(AnalysisJob, job_id)
+            if job is None:
+                return
+            for key, value in fields.items():
+                setattr(job, key, value)
+            db.commit()
+        except Exception as e:
+            logger.error(f"Error updating job {job_id}: {str(e)}")
+            db.rollback()
+        finally:
+            db.close()
+
+
+job_manager = JobManager(max_workers=settings.ANALYSIS_WORKERS)
@@ -0,0 +1,135 @@
+# backend/app/services/mosaic.py
+import logging
+from contextlib import ExitStack
+from typing import Any, Dict, List, Tuple
+
+import numpy as np
+import rasterio
+import rasterio.shutil
+from affine import Affine
+from rasterio.io import MemoryFile
+from rasterio.merge import merge
+
+logger = logging.getLogger(__name__)
+
+# Largest sub-pixel misalignment tolerated before falling back to resampling
+GRID_TOLERANCE = 0.01
+
+
+def _grid_offsets(datasets: List[Dict[str, Any]]):
+    """
+    Integer (row, col) offsets of each dataset on the first dataset's grid,
+    or None if the datasets do not share one.
+    """
+    ref = datasets[0]['transform']
+    if ref.b != 0 or ref.d != 0:
+        return None
+
+    offsets = []
+    for dataset in datasets:
+        t = dataset['transform']
+        if t.b != 0 or t.d != 0:
+            return None
+        if not (np.isclose(t.a, ref.a, rtol=1e-9) and np.isclose(t.e, ref.e, rtol=1e-9)):
+            return None
+        col = (t.c - ref.c) / ref.a
+        row = (t.f - ref.f) / ref.e
+        if abs(col - round(col)) > GRID_TOLERANCE or abs(row - round(row)) > GRID_TOLERANCE:
+            return None
+        offsets.append((int(round(row)), int(round(col))))
+    return offsets
+
+
+def mosaic_arrays(datasets: List[Dict[str, Any]]) -> Tuple[np.ndarray, Affine]:
+    """
+    Merge masked tile windows ({'data', 'transform', 'nodata', 'crs'}) into
+    one array, first valid pixel wins (rasterio.merge method='first').
+
+    Windows read from LGRIP30 tiles all sit on the same 1 arc-second grid,
+    so they are copied into a preallocated output by array offsets. Only if
+    the grids disagree are they wrapped in MemoryFiles and resampled
+    through rasterio.merge.
+    """
+    nodata = datasets[0]['nodata']
+    offsets = _grid_offsets(datasets)
+
+    if offsets is None:
+        logger.warning("Tile windows are not on a common grid, resampling with rasterio.merge")
+        return _merge_in_memory(datasets)
+
+    row_min = min(row for row, _ in offsets)
+    col_min = min(col for _, col in offsets)
+    height = max(row + d['data'].shape[0] for (row, _), d in zip(offsets, datasets)) - row_min
+    width = max(col + d['data'].shape[1] for (_, col), d in zip(offsets, datasets)) - col_min
+
+    mosaic = np.full((height, width), nodata, dtype=datasets[0]['data'].dtype)
+    for (row, col), dataset in zip(offsets, datasets):
+        data = dataset['data']
+        r0, c0 = row - row_min, col - col_min
+        target = mosaic[r0:r0 + data.shape[0], c0:c0 + data.shape[1]]
+        # Fill only pixels no earlier dataset has claimed
+        np.copyto(target, data, where=(target == nodata) & (data != dataset['nodata']))
+
+    ref = datasets[0]['transform']
+    transform = ref * Affine.translation(col_min, row_min)
+    return mosaic, transform
+
+
+def _merge_in_memory(datasets: List[Dict[str, Any]]) -> Tuple[np.ndarray, Affine]:
+    with ExitStack() as stack:
+        sources = []
+        for dataset in datasets:
+            memfile = stack.enter_context(MemoryFile())
+            with memfile.open(
+                driver='GTiff',
+                dtype=dataset['data'].dtype,
+                nodata=dataset['nodata'],
+                width=dataset['data'].shape[1],
+                height=dataset['data'].shape[0],
+                count=1,
+                crs=dataset['crs'],
+                transform=dataset['transform']
+            ) as dst:
+                dst.write(dataset['data'], 1)
+            sources.append(stack.enter_context(memfile.open()))
+
+        ref = datasets[0]['transform']
+        mosaic, transform = merge(
+            sources,
+            res=(abs(ref.a), abs(ref.e)),
+            method='first',
+            nodata=datasets[0]['nodata']
+        )
+    return mosaic[0], transform
+
+
+def write_cog(path, data: np.ndarray, transform: Affine, crs, nodata) -> None:
+    """
+    Write a single-band class raster to ``path`` as a Cloud-Optimized
+    GeoTIFF with 512 px internal tiles, LZW compression and internal
+    overviews. Overviews use nearest resampling so they keep valid class
+    codes. The raster is staged in memory and written to disk once.
+    """
+    profile = {
+        'driver': 'GTiff',
+        'dtype': data.dtype,
+        'nodata': nodata,
+        'width': data.shape[1],
+        'height': data.shape[0],
+        'count': 1,
+        'crs': crs,
+        'transform': transform
+    }
+    with MemoryFile() as memfile:
+        with memfile.open(**profile) as staging:
+            staging.write(data, 1)
+        with memfile.open() as staging:
+            rasterio.shutil.copy(
+                staging,
+                str(path),
+                driver='COG',
+                compress='LZW',
+                blocksize=512,
+                overviews='AUTO',
+                overview_resampling='NEAREST'
+            )
@@ -0,0 +1,194 @@
+# backend/app/services/ndvi_stats.py
+import logging
+import os
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import rasterio
+from rasterio.errors import RasterioIOError
+from rasterio.features import geometry_mask
+from rasterio.warp import transform_bounds, transform_geom
+from shapely.geometry import box, mapping, shape
+
+from app.core.config import settings
+from app.services.raster_analysis import polygon_window
+from app.services.spectral import INDICES, REFLECTANCE_SCALE
+
+logger = logging.getLogger(__name__)
+
+PERCENTILES = (5, 10, 25, 75, 90, 95)
+
+# NDVI histogram: 20 bins of 0.1 over -1..1
+HISTOGRAM_EDGES = np.linspace(-1.0, 1.0, 21)
+
+# Sentinel-2 scene classification (SCL) codes
+SCL_NO_DATA = (0, 1)  # no data, saturated or defective
+SCL_CLOUD = (3, 8, 9, 10)  # cloud shadow, medium and high cloud, cirrus
+
+# (path, band numbers by name, scene timestamp)
+RasterSource = Tuple[Path, Dict[str, int], Optional[str]]
+
+
+def scene_timestamp(image_id: Optional[str]) -> Optional[str]:
+    """Acquisition time from a Sentinel-2 image id (``20230612T080611_...``)"""
+    if not image_id:
+        return None
+    try:
+        acquired = datetime.strptime(image_id[:15], '%Y%m%dT%H%M%S')
+    except ValueError:
+        return None
+    return acquired.replace(tzinfo=timezone.utc).isoformat().replace('+00:00', 'Z')
+
+
+def band_numbers(src, names: Optional[List[str]] = None) -> Dict[str, int]:
+    """Band numbers by name, from the band descriptions or an explicit list"""
+    names = names or list(src.descriptions)
+    return {name: i + 1 for i, name in enumerate(names) if name}
+
+
+def local_sentinel_rasters(geom) -> List[RasterSource]:
+    """
+    Locally cached Sentinel-2 rasters that may cover a lon/lat geometry,
+    newest first: raw band downloads in the scene cache, then tiles of the
+    Sentinel reference catalog that have been downloaded to
+    SENTINEL_DATA_DIR.
+    """
+    from app.services.scene_cache import scene_cache
+    from app.services.tile_catalog import sentinel_catalog
+
+    sources = []
+    for entry in scene_cache.entries('raw'):
+        sources.append((Path(entry['files']['tif']), None, scene_timestamp(entry['image_id'])))
+
+    if Path(settings.SENTINEL_TILES_PATH).exists():
+        for tile_id, info in sentinel_catalog().tiles_for_geometry(geom):
+            path = Path(settings.SENTINEL_DATA_DIR) / os.path.basename(info.get('path', f"{tile_id}.tif"))
+            if path.exists():
+                timestamp = info.get('datetime') or scene_timestamp(info.get('image_id'))
+                sources.append((path, info.get('bands'), timestamp))
+
+    covering = []
+    for path, names, timestamp in sources:
+        try:
+            with rasterio.open(path) as src:
+                footprint = box(*transform_bounds(src.crs, 'EPSG:4326', *src.bounds))
+                bands = band_numbers(src, names)
+        except RasterioIOError as e:
+            logger.warning(f"Skipping unreadable Sentinel-2 raster {path.name}: {str(e)}")
+            continue
+        if footprint.intersects(geom) and {'B4', 'B8'} <= set(bands):
+            covering.append((path, bands, timestamp, footprint))
+
+    covering.sort(key=lambda s: s[2] or '', reverse=True)
+    return [(path, bands, timestamp) for path, bands, timestamp, _ in covering]
+
+
+def polygon_ndvi(src, geom, bands: Dict[str, int]) -> Tuple[np.ndarray, int, int]:
+    """
+    NDVI of the clear pixels of one raster under a lon/lat polygon.
+
+    Reads only the B4/B8 (and SCL, if present) blocks of the polygon's
+    window, masks with the rasterized polygon and, where SCL is available,
+    drops cloud, shadow and no-data pixels. Returns (ndvi values,
+    polygon pixel count, cloudy pixel count).
+    """
+    if src.crs and src.crs.to_epsg() != 4326:
+        geom = shape(transform_geom('EPSG:4326', src.crs, mapping(geom)))
+
+    window = polygon_window(src, geom.bounds)
+    if window is None:
+        return np.empty(0, dtype=np.float32), 0, 0
+
+    transform = src.window_transform(window)
+    red, nir = src.read([bands['B4'], bands['B8']], window=window)
+    inside = ~geometry_mask([mapping(geom)], out_shape=red.shape, transform=transform, all_touched=False)
+
+    nodata = src.nodata if src.nodata is not None else 0
+    valid = inside & (red != nodata) & (nir != nodata)
+    cloudy = 0
+    if 'SCL' in bands:
+        scl = src.read(bands['SCL'], window=window)
+        cloud = inside & np.isin(scl, SCL_CLOUD)
+        cloudy = int(np.count_nonzero(cloud))
+        valid &= ~cloud & ~np.isin(scl, SCL_NO_DATA)
+
+    reflectance = {
+        'B4': red[valid].astype(np.float32) / REFLECTANCE_SCALE,
+        'B8': nir[valid].astype(np.float32) / REFLECTANCE_SCALE
+    }
+    ndvi = INDICES['NDVI'].formula(reflectance)
+    return ndvi[np.isfinite(ndvi)], int(np.count_nonzero(inside)), cloudy
+
+
+def summarize_ndvi(values: np.ndarray, polygon_pixels: int, cloudy_pixels: int) -> Dict[str, Any]:
+    """Summary statistics of the NDVI values under a polygon"""
+    stats = {
+        'pixel_count': int(polygon_pixels),
+        'valid_pixel_count': int(values.size),
+        'valid_pixel_fraction': float(values.size / polygon_pixels) if polygon_pixels else 0.0,
+        'cloud_fraction': float(cloudy_pixels / polygon_pixels) if polygon_pixels else 0.0,
+        'histogram': {
+            'edges': HISTOGRAM_EDGES.round(2).tolist(),
+            'counts': np.histogram(np.clip(values, -1, 1), bins=HISTOGRAM_EDGES)[0].tolist()
+        }
+    }
+    if values.size == 0:
+        stats.update({'mean': None, 'median': None, 'std': None, 'min': None, 'max': None,
+                      'percentiles': {str(p): None for p in PERCENTILES}})
+        return stats
+
+    values = values.astype(np.float64)
+    quantiles = np.percentile(values, (50,) + PERCENTILES)
+    stats.update({
+        'mean': float(values.mean()),
+        'median': float(quantiles[0]),
+        'std': float(values.std()),
+        'min': float(values.min()),
+        'max': float(values.max()),
+        'percentiles': {str(p): float(q) for p, q in zip(PERCENTILES, quantiles[1:])}
+    })
+    return stats
+
+
+def zonal_ndvi(geom, sources: Optional[List[RasterSource]] = None) -> Optional[Dict[str, Any]]:
+    """
+    NDVI statistics of a lon/lat polygon from locally cached Sentinel-2
+    rasters, or None if none covers it. Where rasters overlap, each part of
+    the polygon is taken from the newest one. Blocking.
+    """
+    if sources is None:
+        sources = local_sentinel_rasters(geom)
+
+    remaining = geom
+    parts = []
+    polygon_pixels = 0
+    cloudy_pixels = 0
+    timestamps = []
+    used = []
+    for path, bands, timestamp in sources:
+        if remaining.is_empty:
+            break
+        with rasterio.open(path) as src:
+            footprint = box(*transform_bounds(src.crs, 'EPSG:4326', *src.bounds))
+            part = remaining.intersection(footprint)
+            if part.is_empty or part.area == 0:
+                continue
+            values, pixels, cloudy = polygon_ndvi(src, part, bands)
+        remaining = remaining.difference(footprint)
+        parts.append(values)
+        polygon_pixels += pixels
+        cloudy_pixels += cloudy
+        used.append(path.name)
+        if timestamp:
+            timestamps.append(timestamp)
+
+    if not used:
+        return None
+
+    stats = summarize_ndvi(np.concatenate(parts), polygon_pixels, cloudy_pixels)
+    stats['coverage_fraction'] = float(1 - remaining.area / geom.area) if geom.area else 1.0
+    stats['sources'] = used
+    stats['timestamp'] = max(timestamps) if timestamps else None
+    return stats
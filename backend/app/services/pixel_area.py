@@ -0,0 +1,59 @@
+# backend/app/services/pixel_area.py
+import math
+from functools import lru_cache
+from typing import Tuple
+
+import numpy as np
+from pyproj import Geod
+
+# WGS84 ellipsoid
+WGS84_A = 6378137.0
+WGS84_F = 1 / 298.257223563
+WGS84_E2 = WGS84_F * (2 - WGS84_F)
+WGS84_E = math.sqrt(WGS84_E2)
+
+GEOD = Geod(ellps='WGS84')
+
+
+def _authalic_q(lat_rad: np.ndarray) -> np.ndarray:
+    """q(φ) term of the ellipsoidal zone area between the equator and φ"""
+    sin_lat = np.sin(lat_rad)
+    return (1 - WGS84_E2) * (
+        sin_lat / (1 - WGS84_E2 * sin_lat ** 2)
+        - np.log((1 - WGS84_E * sin_lat) / (1 + WGS84_E * sin_lat)) / (2 * WGS84_E)
+    )
+
+
+def cell_areas(lat_edges: np.ndarray, lon_width_deg: float) -> np.ndarray:
+    """
+    Exact WGS84 area in m² of cells spanning ``lon_width_deg`` of longitude
+    between consecutive latitudes in ``lat_edges`` (degrees).
+    """
+    q = _authalic_q(np.radians(np.asarray(lat_edges, dtype=np.float64)))
+    return WGS84_A ** 2 * math.radians(abs(lon_width_deg)) / 2 * np.abs(np.diff(q))
+
+
+@lru_cache(maxsize=256)
+def _row_areas(transform: Tuple[float, ...], height: int) -> np.ndarray:
+    a, b, c, d, e, f = transform
+    if b != 0 or d != 0:
+        raise ValueError("Row areas need a north-up (unrotated) geographic transform")
+    areas = cell_areas(f + e * np.arange(height + 1), a)
+    areas.setflags(write=False)
+    return areas
+
+
+def row_areas(transform, height: int) -> np.ndarray:
+    """
+    Area in m² of one pixel in each of ``height`` rows of an EPSG:4326
+    raster with the given affine transform. Pixels in a row share an area,
+    so this vector is all a weighted histogram needs. Cached per
+    (transform, height); the returned array is read-only.
+    """
+    return _row_areas(tuple(float(v) for v in tuple(transform)[:6]), int(height))
+
+
+def geometry_area_m2(geom) -> float:
+    """Geodesic area in m² of a lon/lat geometry on the WGS84 ellipsoid"""
+    area, _ = GEOD.geometry_area_perimeter(geom)
+    return abs(area)
@@ -0,0 +1,147 @@
+# backend/app/services/png_stream.py
+import logging
+import struct
+import zlib
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+import numpy as np
+import rasterio
+from rasterio.windows import Window
+
+logger = logging.getLogger(__name__)
+
+PNG_SIGNATURE = b'\x89PNG\r\n\x1a\n'
+
+# PNG colour type by band count: grey, grey+alpha, RGB, RGBA
+COLOR_TYPES = {1: 0, 2: 4, 3: 2, 4: 6}
+
+# Longest side of the decimated read used for band statistics
+STATS_SIZE = 1024
+
+# Rows converted per window
+STRIP_ROWS = 256
+
+
+class PNGStreamWriter:
+    """
+    Write an 8-bit PNG one row strip at a time.
+
+    Rows are "Up"-filtered and pushed through a single zlib stream, and
+    each compressed piece goes out as its own IDAT chunk, so memory stays
+    at one strip whatever the image size.
+    """
+
+    def __init__(self, file, width: int, height: int, channels: int, level: int = 6):
+        if channels not in COLOR_TYPES:
+            raise ValueError(f"Cannot write {channels} channels to PNG")
+        self.file = file
+        self.width = width
+        self.height = height
+        self.channels = channels
+        self.rows_written = 0
+        self._compressor = zlib.compressobj(level)
+        self._previous = np.zeros(width * channels, dtype=np.uint8)
+
+        self.file.write(PNG_SIGNATURE)
+        self._chunk(b'IHDR', struct.pack('>IIBBBBB', width, height, 8, COLOR_TYPES[channels], 0, 0, 0))
+
+    def write_rows(self, rows: np.ndarray):
+        """Append rows shaped (n, width, channels) or (n, width), uint8"""
+        rows = np.ascontiguousarray(rows, dtype=np.uint8).reshape(len(rows), self.width * self.channels)
+        # Up filter: each row minus the one above, modulo 256
+        previous = np.vstack([self._previous[None, :], rows[:-1]])
+        filtered = np.empty((len(rows), rows.shape[1] + 1), dtype=np.uint8)
+        filtered[:, 0] = 2
+        np.subtract(rows, previous, out=filtered[:, 1:])
+        self._previous = rows[-1].copy()
+        self.rows_written += len(rows)
+
+        data = self._compressor.compress(filtered.tobytes())
+        if data:
+            self._chunk(b'IDAT', data)
+
+    def close(self):
+        if self.rows_written != self.height:
+            raise ValueError(f"PNG expects {self.height} rows, got {self.rows_written}")
+        self._chunk(b'IDAT', self._compressor.flush())
+        self._chunk(b'IEND', b'')
+
+    def _chunk(self, kind: bytes, data: bytes):
+        self.file.write(struct.pack('>I', len(data)))
+        self.file.write(kind)
+        self.file.write(data)
+        self.file.write(struct.pack('>I', zlib.crc32(data, zlib.crc32(kind)) & 0xffffffff))
+
+
+def band_stretches(src, bands: List[int], percentiles: Tuple[float, float] = (2, 98)) -> List[Optional[Tuple[float, float]]]:
+    """
+    Per-band (low, high) stretch limits from a decimated read of at most
+    STATS_SIZE pixels on a side, ignoring nodata. None for uint8 bands,
+    which are already display values and pass through unchanged.
+    """
+    scale = max(1, max(src.width, src.height) / STATS_SIZE)
+    out_shape = (max(1, int(src.height / scale)), max(1, int(src.width / scale)))
+
+    stretches = []
+    for band in bands:
+        if src.dtypes[band - 1] == 'uint8':
+            stretches.append(None)
+            continue
+        sample = src.read(band, out_shape=out_shape, masked=True)
+        values = sample.compressed()
+        values = values[np.isfinite(values)]
+        if values.size == 0:
+            stretches.append((0.0, 1.0))
+            continue
+        low, high = np.percentile(values, percentiles)
+        if high <= low:
+            high = low + 1
+        stretches.append((float(low), float(high)))
+    return stretches
+
+
+def stretch_to_uint8(data: np.ma.MaskedArray, stretch: Optional[Tuple[float, float]]) -> np.ndarray:
+    """One band of a strip to 0-255, masked pixels as 0"""
+    if stretch is None:
+        return np.ma.filled(data, 0).astype(np.uint8)
+    low, high = stretch
+    scaled = (np.ma.filled(data, low).astype(np.float32) - low) * (255.0 / (high - low))
+    scaled = np.nan_to_num(scaled, nan=0.0)
+    out = np.clip(scaled, 0, 255).astype(np.uint8)
+    out[np.ma.getmaskarray(data)] = 0
+    return out
+
+
+def geotiff_to_png(
+    tif_path,
+    png_path,
+    percentiles: Tuple[float, float] = (2, 98),
+    strip_rows: int = STRIP_ROWS
+) -> Path:
+    """
+    Convert a GeoTIFF to PNG in row strips. Bands 1-4 map to grey, grey +
+    alpha, RGB or RGBA; bands beyond the fourth are dropped. Non-byte
+    bands get a per-band percentile stretch. Peak memory is one strip of
+    ``strip_rows`` rows plus the statistics sample. Blocking.
+    """
+    png_path = Path(png_path)
+    tmp_path = png_path.with_name(png_path.name + '.tmp')
+
+    with rasterio.open(tif_path) as src:
+        bands = list(range(1, min(src.count, 4) + 1))
+        stretches = band_stretches(src, bands, percentiles)
+
+        with open(tmp_path, 'wb') as f:
+            writer = PNGStreamWriter(f, src.width, src.height, len(bands))
+            for top in range(0, src.height, strip_rows):
+                height = min(strip_rows, src.height - top)
+                strip = src.read(bands, window=Window(0, top, src.width, height), masked=True)
+                rows = np.empty((height, src.width, len(bands)), dtype=np.uint8)
+                for i, stretch in enumerate(stretches):
+                    rows[:, :, i] = stretch_to_uint8(strip[i], stretch)
+                writer.write_rows(rows)
+            writer.close()
+
+    tmp_path.replace(png_path)
+    return png_path
@@ -0,0 +1,244 @@
+# backend/app/services/range_download.py
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+import requests
+
+logger = logging.getLogger(__name__)
+
+
+class DownloadError(Exception):
+    """Raised when a download cannot be completed or fails verification"""
+
+
+def head_metadata(response: requests.Response) -> Dict:
+    """The parts of a HEAD response a download depends on"""
+    headers = response.headers
+    return {
+        'status': response.status_code,
+        'size': int(headers.get('content-length', 0)),
+        'etag': headers.get('etag'),
+        'last_modified': headers.get('last-modified'),
+        'accept_ranges': headers.get('accept-ranges', '').lower() == 'bytes'
+    }
+
+
+class RangeDownloader:
+    """
+    Resumable, segmented HTTP downloader.
+
+    The file is split into fixed-size segments fetched concurrently with
+    ``Range`` requests into a preallocated ``{dest}.part`` file. Progress
+    per segment is recorded in a ``{dest}.part.json`` manifest, so an
+    interrupted download (crash, restart, dropped connection) resumes where
+    it stopped as long as the remote file's size and ETag are unchanged.
+    The finished file is verified and atomically renamed into place.
+
+    Servers that ignore ``Range`` are fetched as a single stream.
+    Blocking; run it off the event loop.
+    """
+
+    def __init__(
+        self,
+        session: requests.Session,
+        segment_size: int = 64 * 1024 * 1024,
+        connections: int = 4,
+        chunk_size: int = 1024 * 1024,
+        max_retries: int = 5,
+        timeout: float = 60.0,
+        manifest_interval: float = 2.0
+    ):
+        self.session = session
+        self.segment_size = segment_size
+        self.connections = max(1, connections)
+        self.chunk_size = chunk_size
+        self.max_retries = max_retries
+        self.timeout = timeout
+        self.manifest_interval = manifest_interval
+
+    def download(
+        self,
+        url: str,
+        dest,
+        checksum: Optional[str] = None,
+        progress_callback: Optional[Callable[[int], None]] = None,
+        metadata: Optional[Dict] = None
+    ) -> Path:
+        """
+        Download ``url`` to ``dest`` and return the final path.
+
+        ``checksum`` is an optional ``"<algorithm>:<hexdigest>"`` (any
+        hashlib algorithm, e.g. ``sha256:…``) checked before the rename.
+        ``progress_callback`` receives byte counts as they are written and
+        may be called from worker threads. ``metadata`` is a cached
+        ``head_metadata`` result; without it the file is HEADed first.
+        """
+        dest = Path(dest)
+        part_path = dest.with_name(dest.name + '.part')
+        manifest_path = dest.with_name(dest.name + '.part.json')
+
+        if metadata is None:
+            head = self.session.head(url, allow_redirects=True, timeout=self.timeout)
+            head.raise_for_status()
+            metadata = head_metadata(head)
+        size = metadata['size']
+        etag = metadata['etag'] or metadata['last_modified']
+        ranged = size > 0 and metadata['accept_ranges']
+
+        if not ranged:
+            logger.info(f"Server does not support ranges for {dest.name}, streaming in one request")
+            self._download_stream(url, part_path, progress_callback)
+        else:
+            manifest = self._load_manifest(manifest_path, url, size, etag)
+            if manifest is None or not part_path.exists() or part_path.stat().st_size != size:
+                manifest = self._new_manifest(url, size, etag)
+                with open(part_path, 'wb') as f:
+                    f.truncate(size)
+                self._save_manifest(manifest_path, manifest)
+            else:
+                done = sum(manifest['done'])
+                logger.info(f"Resuming {dest.name} at {done / 1024 / 1024:.1f} of {size / 1024 / 1024:.1f} MB")
+                if progress_callback and done:
+                    progress_callback(done)
+
+            self._download_segments(url, part_path, manifest_path, manifest, progress_callback)
+
+        actual = part_path.stat().st_size
+        if size and actual != size:
+            raise DownloadError(f"Size mismatch for {dest.name}: expected {size}, got {actual}")
+        if checksum:
+            self._verify_checksum(part_path, checksum)
+
+        os.replace(part_path, dest)
+        if manifest_path.exists():
+            manifest_path.unlink()
+        logger.info(f"Downloaded {dest.name} ({actual / 1024 / 1024:.1f} MB)")
+        return dest
+
+    def _new_manifest(self, url: str, size: int, etag: Optional[str]) -> Dict:
+        count = max(1, -(-size // self.segment_size))
+        return {
+            'url': url,
+            'size': size,
+            'etag': etag,
+            'segment_size': self.segment_size,
+            'done': [0] * count
+        }
+
+    @staticmethod
+    def _load_manifest(path: Path, url: str, size: int, etag: Optional[str]) -> Optional[Dict]:
+        if not path.exists():
+            return None
+        try:
+            with open(path, 'r') as f:
+                manifest = json.load(f)
+        except (OSError, ValueError):
+            return None
+        # The remote file changed since the partial download started
+        if manifest.get('size') != size or manifest.get('etag') != etag or manifest.get('url') != url:
+            return None
+        return manifest
+
+    @staticmethod
+    def _save_manifest(path: Path, manifest: Dict):
+        tmp_path = path.with_name(path.name + '.tmp')
+        with open(tmp_path, 'w') as f:
+            json.dump(manifest, f)
+        os.replace(tmp_path, path)
+
+    def _download_segments(
+        self,
+        url: str,
+        part_path: Path,
+        manifest_path: Path,
+        manifest: Dict,
+        progress_callback: Optional[Callable[[int], None]]
+    ):
+        size = manifest['size']
+        segment_size = manifest['segment_size']
+        done: List[int] = manifest['done']
+        lock = threading.Lock()
+        last_save = [time.monotonic()]
+
+        def record(idx: int, count: int):
+            with lock:
+                done[idx] += count
+                if time.monotonic() - last_save[0] >= self.manifest_interval:
+                    last_save[0] = time.monotonic()
+                    self._save_manifest(manifest_path, manifest)
+            if progress_callback:
+                progress_callback(count)
+
+        def fetch(idx: int):
+            start = idx * segment_size
+            end = min(start + segment_size, size) - 1
+            for attempt in range(self.max_retries + 1):
+                offset = start + done[idx]
+                if offset > end:
+                    return
+                try:
+                    self._fetch_range(url, part_path, offset, end, lambda n: record(idx, n))
+                    return
+                except (requests.RequestException, DownloadError) as e:
+                    if attempt == self.max_retries:
+                        raise
+                    delay = min(30.0, 2 ** attempt)
+                    logger.warning(f"Segment {idx} of {part_path.name} failed ({str(e)}), retrying in {delay:.0f}s")
+                    time.sleep(delay)
+
+        pending = [idx for idx, count in enumerate(done) if idx * segment_size + count < min((idx + 1) * segment_size, size)]
+        try:
+            with ThreadPoolExecutor(max_workers=min(self.connections, max(1, len(pending)))) as executor:
+                for future in [executor.submit(fetch, idx) for idx in pending]:
+                    future.result()
+        finally:
+            with lock:
+                self._save_manifest(manifest_path, manifest)
+
+    def _fetch_range(self, url: str, part_path: Path, start: int, end: int, on_bytes: Callable[[int], None]):
+        headers = {'Range': f"bytes={start}-{end}"}
+        with self.session.get(url, headers=headers, stream=True, timeout=self.timeout) as r:
+            r.raise_for_status()
+            if r.status_code != 206:
+                raise DownloadError(f"Expected 206 for range {start}-{end}, got {r.status_code}")
+            with open(part_path, 'r+b') as f:
+                f.seek(start)
+                position = start
+                for chunk in r.iter_content(chunk_size=self.chunk_size):
+                    if not chunk:
+                        continue
+                    if position + len(chunk) > end + 1:
+                        chunk = chunk[:end + 1 - position]
+                    f.write(chunk)
+                    position += len(chunk)
+                    on_bytes(len(chunk))
+                    if position > end:
+                        break
+            if position <= end:
+                raise DownloadError(f"Range {start}-{end} ended early at {position}")
+
+    def _download_stream(self, url: str, part_path: Path, progress_callback: Optional[Callable[[int], None]]):
+        with self.session.get(url, stream=True, timeout=self.timeout) as r:
+            r.raise_for_status()
+            with open(part_path, 'wb') as f:
+                for chunk in r.iter_content(chunk_size=self.chunk_size):
+                    if chunk:
+                        f.write(chunk)
+                        if progress_callback:
+                            progress_callback(len(chunk))
+
+    def _verify_checksum(self, path: Path, checksum: str):
+        algorithm, _, expected = checksum.partition(':')
+        digest = hashlib.new(algorithm.lower())
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(self.chunk_size), b''):
+                digest.update(block)
+        if digest.hexdigest().lower() != expected.lower():
+            raise DownloadError(f"Checksum mismatch for {path.name}")
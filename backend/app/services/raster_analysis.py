@@ -1,13 +1,295 @@
 # backend/app/services/raster_analysis.py
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, Tuple
+import math
 import rasterio
-from rasterio.mask import mask
+from rasterio.features import geometry_mask
+from rasterio.windows import Window
+from affine import Affine
 import numpy as np
+import shapely
 from shapely.geometry import shape, mapping
 import logging
 
+from app.services.pixel_area import row_areas
+
 logger = logging.getLogger(__name__)
 
+# LGRIP30 class codes
+LGRIP_CLASS_NAMES = {
+    0: 'Ocean and Water bodies',
+    1: 'Non-croplands',
+    2: 'Irrigated croplands',
+    3: 'Rainfed croplands'
+}
+
+# RGBA display colours per class code
+LGRIP_CLASS_COLORS = {
+    0: (31, 120, 180, 255),
+    1: (217, 217, 217, 255),
+    2: (26, 188, 156, 255),
+    3: (244, 208, 63, 255)
+}
+
+
+def class_palette(nodata=None) -> np.ndarray:
+    """
+    256 x 4 RGBA lookup table for LGRIP class codes. Codes without a colour,
+    and ``nodata``, are fully transparent.
+    """
+    lut = np.zeros((256, 4), dtype=np.uint8)
+    for code, color in LGRIP_CLASS_COLORS.items():
+        lut[code] = color
+    if nodata is not None and 0 <= nodata < 256:
+        lut[int(nodata)] = (0, 0, 0, 0)
+    return lut
+
+
+def polygon_window(src, bounds) -> Optional[Window]:
+    """
+    Pixel window of ``src`` covering ``bounds`` (minx, miny, maxx, maxy),
+    snapped outwards to whole pixels and clipped to the raster extent.
+    Returns None if the bounds fall outside the raster.
+    """
+    minx, miny, maxx, maxy = bounds
+    inverse = ~src.transform
+    col_a, row_a = inverse * (minx, maxy)
+    col_b, row_b = inverse * (maxx, miny)
+
+    col_start = max(0, math.floor(min(col_a, col_b)))
+    row_start = max(0, math.floor(min(row_a, row_b)))
+    col_stop = min(src.width, math.ceil(max(col_a, col_b)))
+    row_stop = min(src.height, math.ceil(max(row_a, row_b)))
+
+    if col_stop <= col_start or row_stop <= row_start:
+        return None
+    return Window(col_start, row_start, col_stop - col_start, row_stop - row_start)
+
+
+def read_polygon_window(
+    src,
+    geom,
+    nodata=None,
+    all_touched: bool = True
+) -> Optional[Tuple[np.ndarray, Any, Any]]:
+    """
+    Read band 1 of ``src`` for the pixels under a polygon.
+
+    Only the GeoTIFF blocks intersecting the polygon's bounding window are
+    read; the polygon is then rasterized into that window and every pixel
+    outside it is set to ``nodata``. Memory and I/O scale with the polygon,
+    not with the tile.
+
+    Returns (data, transform, nodata), or None if the polygon misses the raster.
+    """
+    if nodata is None:
+        nodata = src.nodata if src.nodata is not None else 0
+
+    window = polygon_window(src, geom.bounds)
+    if window is None:
+        return None
+
+    data = src.read(1, window=window)
+    transform = src.window_transform(window)
+
+    outside = geometry_mask(
+        [mapping(geom)],
+        out_shape=data.shape,
+        transform=transform,
+        all_touched=all_touched
+    )
+    data[outside] = nodata
+    return data, transform, nodata
+
+
+def _bincount_uint8(flat: np.ndarray) -> np.ndarray:
+    """
+    256-bin histogram of a flat uint8 array. Pairs of bytes are counted as
+    one uint16 code and folded back, which halves the elements np.bincount
+    has to widen to intp.
+    """
+    paired = flat.size // 2 * 2
+    joint = np.bincount(flat[:paired].view(np.uint16), minlength=65536).reshape(256, 256)
+    counts = joint.sum(axis=0) + joint.sum(axis=1)
+    if paired < flat.size:
+        counts[flat[-1]] += 1
+    return counts
+
+
+def class_histogram(
+    data: np.ndarray,
+    row_weights: Optional[np.ndarray] = None,
+    chunk_pixels: int = 1 << 22
+) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+    """
+    Pixel count (and optionally weighted area) of every class code in one pass.
+
+    ``data`` is a 2D raster of non-negative integer class codes (uint8 for
+    LGRIP30). Counting is a single np.bincount per chunk of rows, so no
+    per-class boolean arrays are built and temporary memory is bounded by
+    ``chunk_pixels`` regardless of raster size.
+
+    If ``row_weights`` (one value per row, e.g. cell area in m²) is given,
+    areas are accumulated from per-row counts, which keeps them exact for
+    rasters whose pixel area varies with latitude.
+
+    Returns (counts, areas); both are indexed by class code and ``areas``
+    is None without weights.
+    """
+    if data.ndim != 2:
+        raise ValueError(f"Expected a 2D class raster, got shape {data.shape}")
+    if data.dtype.kind not in 'ui':
+        raise ValueError(f"Class raster must be integer typed, got {data.dtype}")
+
+    # Always at least 256 bins so callers can index any uint8 class code
+    n_bins = 256
+    if data.dtype != np.uint8 and data.size:
+        if int(data.min()) < 0:
+            raise ValueError("Class codes must be non-negative")
+        n_bins = max(n_bins, int(data.max()) + 1)
+
+    height, width = data.shape
+    chunk_rows = max(1, chunk_pixels // max(width, 1))
+
+    counts = np.zeros(n_bins, dtype=np.int64)
+    areas = None
+    if row_weights is not None:
+        row_weights = np.asarray(row_weights, dtype=np.float64)
+        if row_weights.shape != (height,):
+            raise ValueError(f"Expected {height} row weights, got {row_weights.shape}")
+        areas = np.zeros(n_bins, dtype=np.float64)
+        row_offsets = np.arange(chunk_rows, dtype=np.intp)[:, None] * n_bins
+
+    for row in range(0, height, chunk_rows):
+        chunk = data[row:row + chunk_rows]
+        if row_weights is None:
+            if data.dtype == np.uint8:
+                counts += _bincount_uint8(np.ascontiguousarray(chunk).ravel())
+            else:
+                counts += np.bincount(chunk.ravel(), minlength=n_bins)
+            continue
+
+        # Offset each row's codes into its own block of bins to get
+        # per-row counts from the same single bincount
+        rows = chunk.shape[0]
+        codes = chunk + row_offsets[:rows]
+        per_row = np.bincount(codes.ravel(), minlength=rows * n_bins).reshape(rows, n_bins)
+        counts += per_row.sum(axis=0)
+        areas += row_weights[row:row + rows] @ per_row
+
+    return counts, areas
+
+
+def class_areas(data: np.ndarray, transform) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Pixel counts and ellipsoidal areas (m²) per class code of an EPSG:4326
+    class raster, in one weighted histogram pass.
+    """
+    return class_histogram(data, row_areas(transform, data.shape[0]))
+
+
+def _pad_bins(values: np.ndarray, n_bins: int) -> np.ndarray:
+    if len(values) >= n_bins:
+        return values
+    return np.concatenate([values, np.zeros(n_bins - len(values), dtype=values.dtype)])
+
+
+def read_polygon_window_summarized(
+    src,
+    geom,
+    index: Dict[str, np.ndarray],
+    nodata=None
+) -> Optional[Tuple[np.ndarray, Any, Any, np.ndarray, np.ndarray]]:
+    """
+    read_polygon_window plus class_areas, using a tile's per-chunk summary
+    index (``counts``/``areas`` per chunk and class, see tile_ingest).
+
+    Chunks lying wholly inside the polygon take their counts and areas from
+    the index, chunks clear of it are all nodata, and only chunks crossing
+    the polygon outline are rasterized and counted. Results match the brute-force path (all
+    touched pixels) exactly for counts and to float rounding for areas.
+
+    Returns (data, transform, nodata, counts, areas), or None if the
+    polygon misses the raster.
+    """
+    if nodata is None:
+        nodata = src.nodata if src.nodata is not None else 0
+
+    window = polygon_window(src, geom.bounds)
+    if window is None:
+        return None
+
+    data = src.read(1, window=window)
+    transform = src.window_transform(window)
+    height, width = data.shape
+    row_off, col_off = int(window.row_off), int(window.col_off)
+    chunk = int(index['chunk'])
+
+    # Tile-pixel extents of the chunks overlapping the window
+    chunk_rows = np.arange(row_off // chunk, (row_off + height - 1) // chunk + 1)
+    chunk_cols = np.arange(col_off // chunk, (col_off + width - 1) // chunk + 1)
+    grid_rows, grid_cols = np.meshgrid(chunk_rows, chunk_cols, indexing='ij')
+    top = grid_rows * chunk
+    left = grid_cols * chunk
+    bottom = np.minimum(top + chunk, src.height)
+    right = np.minimum(left + chunk, src.width)
+
+    t = src.transform
+    boxes = shapely.box(t.c + left * t.a, t.f + bottom * t.e, t.c + right * t.a, t.f + top * t.e)
+    shapely.prepare(geom)
+    within_window = (top >= row_off) & (bottom <= row_off + height) & (left >= col_off) & (right <= col_off + width)
+    interior = shapely.contains(geom, boxes) & within_window
+    edge = shapely.intersects(geom, boxes) & ~interior
+
+    # Window-relative slices of each chunk, clipped to the window
+    r0 = np.maximum(top, row_off) - row_off
+    r1 = np.minimum(bottom, row_off + height) - row_off
+    c0 = np.maximum(left, col_off) - col_off
+    c1 = np.minimum(right, col_off + width) - col_off
+
+    inside = np.zeros(data.shape, dtype=bool)
+    for i, j in zip(*np.nonzero(interior)):
+        inside[r0[i, j]:r1[i, j], c0[i, j]:c1[i, j]] = True
+    for i, j in zip(*np.nonzero(edge)):
+        out_shape = (int(r1[i, j] - r0[i, j]), int(c1[i, j] - c0[i, j]))
+        inside[r0[i, j]:r1[i, j], c0[i, j]:c1[i, j]] = ~geometry_mask(
+            [mapping(geom)],
+            out_shape=out_shape,
+            transform=transform * Affine.translation(int(c0[i, j]), int(r0[i, j])),
+            all_touched=True
+        )
+    data[~inside] = nodata
+
+    # Interior chunks straight from the index
+    n_bins = 256
+    counts = np.zeros(n_bins, dtype=np.int64)
+    areas = np.zeros(n_bins, dtype=np.float64)
+    if interior.any():
+        sel_rows, sel_cols = grid_rows[interior], grid_cols[interior]
+        counts += _pad_bins(index['counts'][sel_rows, sel_cols].sum(axis=0).astype(np.int64), n_bins)
+        areas += _pad_bins(index['areas'][sel_rows, sel_cols].sum(axis=0), n_bins)
+
+    # Chunks clear of the polygon are all nodata after masking
+    weights = row_areas(transform, height)
+    nodata_bin = int(nodata) if 0 <= nodata < n_bins else None
+    for i, j in zip(*np.nonzero(~interior & ~edge)):
+        if nodata_bin is not None:
+            counts[nodata_bin] += int((r1[i, j] - r0[i, j]) * (c1[i, j] - c0[i, j]))
+            areas[nodata_bin] += float(weights[r0[i, j]:r1[i, j]].sum()) * int(c1[i, j] - c0[i, j])
+
+    # Edge chunks are counted, one strip of chunk rows at a time
+    for i in range(len(chunk_rows)):
+        rs, re = int(r0[i, 0]), int(r1[i, 0])
+        spans = [(int(c0[i, j]), int(c1[i, j])) for j in range(len(chunk_cols)) if edge[i, j]]
+        if not spans or re <= rs:
+            continue
+        part = np.hstack([data[rs:re, a:b] for a, b in spans])
+        part_counts, part_areas = class_histogram(part, weights[rs:re])
+        counts += part_counts[:n_bins]
+        areas += part_areas[:n_bins]
+
+    return data, transform, nodata, counts, areas
+
+
 class RasterAnalyzer:
     def __init__(self, file_path: str):
         self.file_path = file_path
@@ -30,24 +312,24 @@ class RasterAnalyzer:
                        raster_bounds.bottom < geom_bounds[3]):
                     return None
 
-                # Mask raster with geometry
-                masked_data, transform = mask(src, [mapping(geom)], 
-                                           crop=True, 
-                                           all_touched=True,
-                                           nodata=0)
+                # Read only the window under the polygon
+                windowed = read_polygon_window(src, geom, nodata=0)
+                if windowed is None:
+                    return None
                 
                 # Analyze masked data
-                valid_data = masked_data[0]  # Get first band
-                unique, counts = np.unique(valid_data[valid_data != 0], 
-                                         return_counts=True)
+                valid_data, transform, _ = windowed
+                counts, class_area = class_areas(valid_data, transform)
                 
-                # Calculate areas (approximate)
-                pixel_area = abs(transform[0] * transform[4])  # in square degrees
+                # Ellipsoidal areas, weighted per raster row
                 areas = {}
                 
-                for val, count in zip(unique, counts):
+                for val in np.flatnonzero(counts):
                     val_int = int(val)
-                    area_sqkm = count * pixel_area * 12321  # rough conversion to km2
+                    if val_int == 0:
+                        continue
+                    count = counts[val_int]
+                    area_sqkm = class_area[val_int] / 1_000_000
                     areas[val_int] = {
                         "pixel_count": int(count),
                         "area_km2": float(area_sqkm),
@@ -64,7 +346,7 @@ class RasterAnalyzer:
                     },
                     "pixel_stats": {
                         "total": int(valid_data.size),
-                        "valid": int(np.sum(valid_data != 0))
+                        "valid": int(valid_data.size - counts[0])
                     },
                     "areas": areas,
                     "metadata": {
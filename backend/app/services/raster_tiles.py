@@ -0,0 +1,142 @@
+# backend/app/services/raster_tiles.py
+import io
+import logging
+import math
+from functools import lru_cache
+from pathlib import Path
+from typing import Optional, Tuple
+
+import numpy as np
+import rasterio
+from PIL import Image
+from rasterio.enums import Resampling
+from rasterio.transform import from_bounds
+from rasterio.vrt import WarpedVRT
+
+from app.services.raster_analysis import class_palette
+
+logger = logging.getLogger(__name__)
+
+TILE_SIZE = 256
+
+# Longest side of a preview image in pixels
+PREVIEW_SIZE = 1024
+
+# Half the width of the EPSG:3857 world in metres
+ORIGIN_SHIFT = 20037508.342789244
+
+
+def tile_bounds_lonlat(z: int, x: int, y: int) -> Tuple[float, float, float, float]:
+    """(west, south, east, north) of an XYZ tile in degrees"""
+    n = 2 ** z
+
+    def lat(row):
+        return math.degrees(math.atan(math.sinh(math.pi * (1 - 2 * row / n))))
+
+    return x / n * 360.0 - 180.0, lat(y + 1), (x + 1) / n * 360.0 - 180.0, lat(y)
+
+
+def tile_bounds_mercator(z: int, x: int, y: int) -> Tuple[float, float, float, float]:
+    """(minx, miny, maxx, maxy) of an XYZ tile in EPSG:3857 metres"""
+    size = 2 * ORIGIN_SHIFT / 2 ** z
+    minx = -ORIGIN_SHIFT + x * size
+    maxy = ORIGIN_SHIFT - y * size
+    return minx, maxy - size, minx + size, maxy
+
+
+def _overview_level(src, target_res: float) -> Optional[int]:
+    """
+    Index of the coarsest overview whose pixels are still no larger than
+    ``target_res`` (source CRS units), or None for full resolution.
+    """
+    level = None
+    for idx, factor in enumerate(src.overviews(1)):
+        if abs(src.res[0]) * factor <= target_res:
+            level = idx
+    return level
+
+
+@lru_cache(maxsize=1)
+def empty_tile() -> bytes:
+    """Fully transparent tile, served where the raster has no data"""
+    buffer = io.BytesIO()
+    Image.new('RGBA', (TILE_SIZE, TILE_SIZE), (0, 0, 0, 0)).save(buffer, 'PNG')
+    return buffer.getvalue()
+
+
+def render_tile(raster_path, z: int, x: int, y: int) -> bytes:
+    """
+    Render one 256 px XYZ tile of an LGRIP class raster as an RGBA PNG.
+
+    Picks the internal overview closest to the tile's zoom, then warps
+    only the part of it under the tile to Web Mercator with nearest
+    resampling, so class codes survive and a zoomed-out tile never reads
+    the full-resolution raster. Blocking; call it off the event loop.
+    """
+    west, south, east, north = tile_bounds_lonlat(z, x, y)
+
+    with rasterio.open(raster_path) as src:
+        left, bottom, right, top = src.bounds
+        if west >= right or east <= left or south >= top or north <= bottom:
+            return empty_tile()
+        nodata = src.nodata if src.nodata is not None else 0
+        level = _overview_level(src, (east - west) / TILE_SIZE)
+
+    open_kwargs = {'overview_level': level} if level is not None else {}
+    with rasterio.open(raster_path, **open_kwargs) as src:
+        with WarpedVRT(
+            src,
+            crs='EPSG:3857',
+            transform=from_bounds(*tile_bounds_mercator(z, x, y), TILE_SIZE, TILE_SIZE),
+            width=TILE_SIZE,
+            height=TILE_SIZE,
+            resampling=Resampling.nearest,
+            src_nodata=nodata,
+            nodata=nodata
+        ) as vrt:
+            data = vrt.read(1)
+
+    if not np.any(data != nodata):
+        return empty_tile()
+
+    rgba = class_palette(nodata)[data.astype(np.uint8, copy=False)]
+    buffer = io.BytesIO()
+    Image.fromarray(rgba, 'RGBA').save(buffer, 'PNG', optimize=False)
+    return buffer.getvalue()
+
+
+def preview_shape(height: int, width: int, max_size: int = PREVIEW_SIZE) -> Tuple[int, int]:
+    """Output shape that fits ``max_size`` on the long side, never upsampled"""
+    scale = min(1.0, max_size / max(height, width, 1))
+    return max(1, round(height * scale)), max(1, round(width * scale))
+
+
+@lru_cache(maxsize=32)
+def _render_preview(raster_path: str, mtime_ns: int, max_size: int) -> bytes:
+    with rasterio.open(raster_path) as src:
+        nodata = src.nodata if src.nodata is not None else 0
+        # A decimated read is served from the closest overview
+        data = src.read(
+            1,
+            out_shape=preview_shape(src.height, src.width, max_size),
+            resampling=Resampling.nearest
+        )
+
+    lut = class_palette(nodata)
+    rgb = lut[:, :3].copy()
+    rgb[lut[:, 3] == 0] = 255  # JPEG has no alpha, show nodata as white
+
+    buffer = io.BytesIO()
+    Image.fromarray(rgb[data.astype(np.uint8, copy=False)], 'RGB').save(buffer, 'JPEG', quality=85)
+    return buffer.getvalue()
+
+
+def render_preview(raster_path, max_size: int = PREVIEW_SIZE) -> bytes:
+    """
+    JPEG preview of an LGRIP class raster, at most ``max_size`` px on the
+    long side and coloured with the class palette. Memoized by file
+    modification time, so re-running an analysis produces a fresh image.
+    Blocking; call it off the event loop.
+    """
+    mtime_ns = Path(raster_path).stat().st_mtime_ns
+    return _render_preview(str(raster_path), mtime_ns, max_size)
@@ -0,0 +1,164 @@
+# backend/app/services/result_cache.py
+import hashlib
+import logging
+import os
+import shutil
+import threading
+from collections import OrderedDict
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+import shapely
+
+from app.core.config import settings
+from app.database import SessionLocal
+from app.models.analysis_cache import AnalysisCacheEntry
+
+logger = logging.getLogger(__name__)
+
+# LGRIP30 pixel size in degrees; geometries are snapped to this grid
+RES = 0.000277778
+
+
+def dataset_version(metadata: Dict[str, Any]) -> str:
+    """Version string of a tile reference, from its ``metadata`` block"""
+    return f"{metadata.get('version', '')}:{metadata.get('date_updated', '')}"
+
+
+def geometry_key(geom, version: str, resolution: float = RES) -> str:
+    """
+    Content address of an analysis: sha256 over the dataset version and
+    the geometry's normalized WKB after snapping coordinates to the raster
+    grid. Redrawing the same field, or drawing it with a different start
+    vertex or winding, yields the same key.
+    """
+    snapped = shapely.set_precision(geom, grid_size=resolution)
+    if snapped.is_empty:
+        # Smaller than a pixel; keep the exact shape rather than collide
+        snapped = geom
+    snapped = shapely.normalize(snapped)
+    digest = hashlib.sha256()
+    digest.update(version.encode())
+    digest.update(b'\0')
+    digest.update(shapely.to_wkb(snapped, output_dimension=2, byte_order=1))
+    return digest.hexdigest()
+
+
+class ResultCache:
+    """
+    Two-tier cache of finished cropland analyses.
+
+    Entries are looked up in a small in-process LRU first, then in the
+    ``analysis_cache`` table, which all workers share and which survives
+    restarts. The masked raster of each entry is kept under
+    ``cache_dir/{key}.tif`` so a new polygon can reuse it.
+    """
+
+    def __init__(self, cache_dir: Path, max_entries: int = 256):
+        self.cache_dir = Path(cache_dir)
+        self.max_entries = max_entries
+        self._memory: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Cached entry ({'cropland_data', 'analysis_status', 'raster_path'}) or None"""
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                self._memory.move_to_end(key)
+        if entry is not None and self._raster_ok(entry):
+            return entry
+
+        db = SessionLocal()
+        try:
+            row = db.get(AnalysisCacheEntry, key)
+            if row is None:
+                return None
+            entry = {
+                'cropland_data': row.cropland_data,
+                'analysis_status': row.analysis_status,
+                'raster_path': row.raster_path
+            }
+            if not self._raster_ok(entry):
+                # Raster was cleaned up, the entry is no longer complete
+                db.delete(row)
+                db.commit()
+                self._forget(key)
+                return None
+            row.last_used_at = datetime.now(timezone.utc)
+            db.commit()
+        except Exception as e:
+            logger.error(f"Error reading analysis cache entry {key}: {str(e)}")
+            db.rollback()
+            return None
+        finally:
+            db.close()
+
+        self._remember(key, entry)
+        return entry
+
+    def put(self, key: str, version: str, cropland_data: Dict[str, Any], analysis_status: str, raster_path=None):
+        """Store a finished analysis, copying its masked raster into the cache"""
+        cached_raster = None
+        if raster_path is not None and Path(raster_path).exists():
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            cached_raster = self.cache_dir / f"{key}.tif"
+            tmp_path = cached_raster.with_suffix('.tif.tmp')
+            shutil.copyfile(raster_path, tmp_path)
+            os.replace(tmp_path, cached_raster)
+
+        entry = {
+            'cropland_data': cropland_data,
+            'analysis_status': analysis_status,
+            'raster_path': str(cached_raster) if cached_raster else None
+        }
+
+        db = SessionLocal()
+        try:
+            row = db.get(AnalysisCacheEntry, key)
+            if row is None:
+                row = AnalysisCacheEntry(key=key)
+                db.add(row)
+            row.dataset_version = version
+            row.cropland_data = cropland_data
+            row.analysis_status = analysis_status
+            row.raster_path = entry['raster_path']
+            row.last_used_at = datetime.now(timezone.utc)
+            db.commit()
+        except Exception as e:
+            logger.error(f"Error writing analysis cache entry {key}: {str(e)}")
+            db.rollback()
+        finally:
+            db.close()
+
+        self._remember(key, entry)
+
+    def restore_raster(self, entry: Dict[str, Any], target_path: Path) -> bool:
+        """Place the cached raster at ``target_path``; False if the entry has none"""
+        if not entry.get('raster_path'):
+            return False
+        target_path = Path(target_path)
+        target_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = target_path.with_suffix('.tif.tmp')
+        shutil.copyfile(entry['raster_path'], tmp_path)
+        os.replace(tmp_path, target_path)
+        return True
+
+    @staticmethod
+    def _raster_ok(entry: Dict[str, Any]) -> bool:
+        return not entry.get('raster_path') or Path(entry['raster_path']).exists()
+
+    def _remember(self, key: str, entry: Dict[str, Any]):
+        with self._lock:
+            self._memory[key] = entry
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_entries:
+                self._memory.popitem(last=False)
+
+    def _forget(self, key: str):
+        with self._lock:
+            self._memory.pop(key, None)
+
+
+result_cache = ResultCache(Path(settings.RESULT_CACHE_DIR), max_entries=settings.RESULT_CACHE_ENTRIES)
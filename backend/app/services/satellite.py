@@ -14,6 +14,7 @@ import io
 import pickle
 import rasterio
 from rasterio.plot import reshape_as_image
+from rasterio.windows import Window
 from PIL import Image
 import numpy as np
 import logging
@@ -23,12 +24,21 @@ import pyproj
 from functools import partial
 from shapely.ops import transform
 from pathlib import Path
+from contextlib import ExitStack
+import threading
+import requests
 
 
 
 from google.oauth2 import service_account
 from googleapiclient.discovery import build
 
+from app.core.config import settings
+from app.services.ee_tasks import task_poller
+from app.services.png_stream import STRIP_ROWS, PNGStreamWriter, geotiff_to_png
+from app.services.scene_cache import aoi_key, quantize_bounds, scene_cache, scene_key
+from app.services.spectral import COMPOSITES, INDICES, compute_indices, required_bands
+
 # Dictionary to track task statuses
 task_statuses = {}
 
@@ -36,6 +46,11 @@ logger = logging.getLogger(__name__)
 
 # Constants
 OUTPUT_DIR = Path(os.path.dirname(os.path.dirname(__file__))) / "data" / "saved_images"
+EXPORT_SCALE = 10
+
+# getDownloadURL limits: longest side in pixels, and request timeout in seconds
+DIRECT_MAX_DIMENSION = 10000
+DIRECT_TIMEOUT = 300
 
 
 # Visualization configurations for different band types
@@ -82,6 +97,21 @@ visualizations = {
     }
 }
 
+_ee_initialized = False
+_ee_init_lock = threading.Lock()
+
+
+def init_earth_engine():
+    """Initialize the Earth Engine SDK once per process (blocking)."""
+    global _ee_initialized
+    with _ee_init_lock:
+        if not _ee_initialized:
+            credentials = service_account.Credentials.from_service_account_file(
+                'google-ee-credentials.json',
+                scopes=['https://www.googleapis.com/auth/earthengine'])
+            ee.Initialize(credentials)
+            _ee_initialized = True
+
 def calculate_area_in_sq_km(polygon_geojson):
     """Calculate the area of a GeoJSON polygon in square kilometers."""
     # Convert GeoJSON to Shapely geometry
@@ -183,7 +213,7 @@ async def find_and_download_file(file_name: str, folder_name: str, max_retries:
     return None
 
 def convert_tif_to_png(tif_path, output_dir="app/data/saved_images"):
-    """Convert GeoTIFF to PNG and save it."""
+    """Convert GeoTIFF to PNG and save it (blocking, run it in a worker thread)."""
     try:
         # Create output directory if it doesn't exist
         if not os.path.exists(output_dir):
@@ -193,18 +223,9 @@ def convert_tif_to_png(tif_path, output_dir="app/data/saved_images"):
         png_filename = os.path.basename(tif_path).replace('.tif', '.png')
         png_path = os.path.join(output_dir, png_filename)
         
-        # Read the GeoTIFF
-        with rasterio.open(tif_path) as src:
-            # Read all bands and reshape for PIL
-            image_array = src.read()
-            image_array = reshape_as_image(image_array)
-            
-            # Normalize the data to 0-255 range
-            image_array = ((image_array - image_array.min()) * (255.0 / (image_array.max() - image_array.min()))).astype(np.uint8)
-            
-            # Convert to PIL Image and save as PNG
-            image = Image.fromarray(image_array)
-            image.save(png_path)
+        # Stream the GeoTIFF to PNG in row strips; byte bands pass through,
+        # others get a per-band percentile stretch
+        geotiff_to_png(tif_path, png_path)
             
         print(f"Converted {tif_path} to {png_path}")
         return png_path
@@ -213,6 +234,111 @@ def convert_tif_to_png(tif_path, output_dir="app/data/saved_images"):
         print(f"Error converting {tif_path} to PNG: {str(e)}")
         return None
 
+def least_cloudy_sentinel(region):
+    """The most recent cloud-free Sentinel-2 image over a region"""
+    return (ee.ImageCollection('COPERNICUS/S2_SR_HARMONIZED')
+            .filterBounds(region)
+            .filter(ee.Filter.lt('CLOUDY_PIXEL_PERCENTAGE', 20))
+            .sort('CLOUDY_PIXEL_PERCENTAGE')
+            .first())
+
+def direct_download_fits(bounds, band_count, scale=EXPORT_SCALE):
+    """
+    Whether an 8-bit export of ``bounds`` is small enough to fetch directly
+    with getDownloadURL instead of a Drive export
+    """
+    minx, miny, maxx, maxy = bounds
+    meters_per_degree = 111_320
+    width = (maxx - minx) * meters_per_degree * np.cos(np.radians((miny + maxy) / 2)) / scale
+    height = (maxy - miny) * meters_per_degree / scale
+    if max(width, height) > DIRECT_MAX_DIMENSION:
+        return False
+    return bool(width * height * band_count <= settings.SATELLITE_DIRECT_MAX_MB * 1024 * 1024)
+
+def download_direct(image, region, file_name, scale=EXPORT_SCALE, session=None, output_dir=OUTPUT_DIR):
+    """
+    Fetch a rendered image straight from Earth Engine as a GeoTIFF
+    (blocking). The pixels are streamed into memory and written once.
+    """
+    url = image.getDownloadURL({
+        'region': region,
+        'scale': scale,
+        'format': 'GEO_TIFF'
+    })
+    session = session or requests
+    buffer = io.BytesIO()
+    with session.get(url, stream=True, timeout=DIRECT_TIMEOUT) as r:
+        r.raise_for_status()
+        for chunk in r.iter_content(chunk_size=1024 * 1024):
+            buffer.write(chunk)
+
+    output_path = Path(output_dir) / file_name
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    output_path.write_bytes(buffer.getbuffer())
+    logger.info(f"Downloaded {file_name} directly ({buffer.tell() / 1024 / 1024:.1f} MB)")
+    return str(output_path)
+
+async def fetch_geotiff(image, region, bounds, band_count, file_name, folder_name, mark):
+    """
+    Render ``image`` over ``region`` to a local GeoTIFF and return its path.
+
+    Small AOIs are fetched synchronously with getDownloadURL; larger ones,
+    or direct downloads Earth Engine rejects, go through a Drive export.
+    ``mark(status, error=None)`` records progress in task_statuses.
+    """
+    if direct_download_fits(bounds, band_count):
+        try:
+            tif_path = await asyncio.to_thread(download_direct, image, region, file_name)
+            mark('completed')
+            return tif_path
+        except Exception as e:
+            logger.warning(f"Direct download of {file_name} failed ({str(e)}), falling back to export")
+
+    task = ee.batch.Export.image.toDrive(
+        image=image,
+        description=Path(file_name).stem,
+        folder=folder_name,
+        scale=EXPORT_SCALE,
+        region=region,
+        fileFormat='GeoTIFF',
+        maxPixels=1e9
+    )
+    await asyncio.to_thread(task.start)
+
+    # Wait for task completion; one shared poller checks every outstanding task
+    try:
+        status = await task_poller().wait(task.operation_name)
+    except asyncio.TimeoutError:
+        logger.error(f"Export task {task.id} for {file_name} did not finish in time, cancelling it")
+        try:
+            await asyncio.to_thread(task.cancel)
+        except Exception as e:
+            logger.warning(f"Could not cancel export task {task.id}: {str(e)}")
+        mark('failed', 'Export timed out')
+        return None
+    if status['state'] != 'COMPLETED':
+        mark('failed', status.get('error_message'))
+        return None
+
+    mark('completed')
+    return await find_and_download_file(file_name, folder_name)
+
+def restore_cached_scene(band_type, entry):
+    """Place a cached PNG in OUTPUT_DIR, record it in task_statuses and return its name"""
+    png_name = f"sentinel_{band_type.lower()}_{entry['key'][:16]}.png"
+    if not scene_cache.restore(entry, 'png', OUTPUT_DIR / png_name):
+        return None
+    task_statuses[band_type] = {
+        'status': 'completed',
+        'fileName': png_name.replace('.png', '.tif'),
+        'cached': True
+    }
+    return png_name
+
+def selected_image_id(sentinel):
+    """Earth Engine id of the selected Sentinel-2 image (blocking)"""
+    return sentinel.get('system:index').getInfo()
+
 async def process_spectral_band(polygon_geojson, band_type):
     """Process a single spectral band and return the file path"""
     try:
@@ -223,30 +349,33 @@ async def process_spectral_band(polygon_geojson, band_type):
 
         OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
 
+        # Get visualization config for the specific band
+        vis_config = visualizations[band_type]
+
+        # Bounding box of the polygon, snapped to the cache grid
+        bounds = quantize_bounds(shape(polygon_geojson).bounds)
+        aoi = aoi_key(bounds, band_type, vis_config['vis_params'])
+
+        # Same AOI rendered recently: no Earth Engine calls at all
+        cached = await asyncio.to_thread(scene_cache.lookup, aoi)
+        if cached:
+            return restore_cached_scene(band_type, cached)
 
-        credentials = service_account.Credentials.from_service_account_file(
-            'google-ee-credentials.json',
-            scopes=['https://www.googleapis.com/auth/earthengine'])
-        ee.Initialize(credentials)
+        await asyncio.to_thread(init_earth_engine)
 
-        # Convert GeoJSON to Shapely geometry
-        polygon = shape(polygon_geojson)
-        # Get the bounding box of the polygon
-        minx, miny, maxx, maxy = polygon.bounds
-        region = ee.Geometry.Rectangle([minx, miny, maxx, maxy])
+        region = ee.Geometry.Rectangle(list(bounds))
 
         timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
 
-        # Get the most recent cloud-free Sentinel-2 image
-        sentinel = (ee.ImageCollection('COPERNICUS/S2_SR_HARMONIZED')
-                    .filterBounds(region)
-                    .filter(ee.Filter.lt('CLOUDY_PIXEL_PERCENTAGE', 20))
-                    .sort('CLOUDY_PIXEL_PERCENTAGE')
-                    .first())
+        sentinel = least_cloudy_sentinel(region)
+
+        # Same scene rendered before for this AOI
+        image_id = await asyncio.to_thread(selected_image_id, sentinel)
+        key = scene_key(bounds, image_id, band_type, vis_config['vis_params'])
+        cached = await asyncio.to_thread(scene_cache.get, key, aoi)
+        if cached:
+            return restore_cached_scene(band_type, cached)
 
-        # Get visualization config for the specific band
-        vis_config = visualizations[band_type]
-        
         folder_name = f"earthbanc_exports_{timestamp}_{band_type}"
         file_name = f'sentinel_{band_type.lower()}_{timestamp}.tif'
         
@@ -254,41 +383,25 @@ async def process_spectral_band(polygon_geojson, band_type):
         image = vis_config['image'](sentinel)
         image_rgb = image.visualize(**vis_config['vis_params'])
         
-        task = ee.batch.Export.image.toDrive(
-            image=image_rgb,
-            description=f'sentinel_{band_type.lower()}_{timestamp}',
-            folder=folder_name,
-            scale=10,
-            region=region,
-            fileFormat='GeoTIFF',
-            maxPixels=1e9
-        )
-        task.start()
-
         # Update task status
         task_statuses[band_type] = {
             'status': 'processing',
             'fileName': file_name
         }
 
-        # Wait for task completion and process the result
-        while True:
-            status = task.status()
-            if status['state'] == 'COMPLETED':
-                task_statuses[band_type]['status'] = 'completed'
-                
-                # Download and convert the file
-                tif_path = await find_and_download_file(file_name, folder_name)
-                
-                if tif_path:
-                    png_path = convert_tif_to_png(tif_path)
-                    if png_path:
-                        return os.path.basename(png_path)
-                break
-            elif status['state'] == 'FAILED':
-                task_statuses[band_type]['status'] = 'failed'
-                break
-            await asyncio.sleep(5)
+        def mark(status, error=None):
+            task_statuses[band_type]['status'] = status
+            if error:
+                task_statuses[band_type]['error'] = error
+
+        tif_path = await fetch_geotiff(image_rgb, region, bounds, 3, file_name, folder_name, mark)
+        if tif_path:
+            png_path = await asyncio.to_thread(convert_tif_to_png, tif_path)
+            if png_path:
+                await asyncio.to_thread(
+                    scene_cache.put, key, aoi, image_id, band_type, {'png': png_path, 'tif': tif_path}
+                )
+                return os.path.basename(png_path)
 
         return None
 
@@ -296,3 +409,220 @@ async def process_spectral_band(polygon_geojson, band_type):
         logger.error(f"Error processing {band_type}: {str(e)}")
         task_statuses[band_type] = {'status': 'failed', 'error': str(e)}
         return None
+
+def split_visualizations(tif_path, band_types, output_dir=OUTPUT_DIR):
+    """
+    Split a stacked visualization GeoTIFF (three 8-bit RGB bands per
+    visualization, in ``band_types`` order) into one PNG per visualization.
+    Returns the PNG paths in the same order.
+    """
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    stem = Path(tif_path).stem
+
+    png_paths = [
+        str(output_dir / f"{stem.replace('combined', band_type.lower())}.png") for band_type in band_types
+    ]
+    with rasterio.open(tif_path) as src, ExitStack() as files:
+        if src.count != 3 * len(band_types):
+            raise ValueError(f"Expected {3 * len(band_types)} bands in {tif_path}, found {src.count}")
+        writers = [
+            PNGStreamWriter(files.enter_context(open(path, 'wb')), src.width, src.height, 3)
+            for path in png_paths
+        ]
+        # Visualized bands are already display RGB, so no stretch; all
+        # PNGs are written together one row strip at a time
+        for top in range(0, src.height, STRIP_ROWS):
+            height = min(STRIP_ROWS, src.height - top)
+            strip = src.read(window=Window(0, top, src.width, height))
+            for i, writer in enumerate(writers):
+                writer.write_rows(reshape_as_image(strip[3 * i:3 * i + 3]))
+        for writer in writers:
+            writer.close()
+
+    logger.info(f"Split {tif_path} into {len(png_paths)} PNGs")
+    return png_paths
+
+async def process_spectral_bands(polygon_geojson, band_types):
+    """
+    Process several visualizations with a single Earth Engine export.
+
+    Each visualization is rendered to RGB and stacked as three bands of one
+    image, which is exported and downloaded once and split locally into
+    per-visualization PNGs. Visualizations already in the scene cache are
+    left out of the export. Returns the PNG file names in ``band_types``
+    order, None for any that failed.
+    """
+    try:
+        area = calculate_area_in_sq_km(polygon_geojson)
+        if area > 200:
+            raise ValueError(f"Area too large: {area:.2f} km². Maximum allowed area is 200 km².")
+
+        OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
+
+        bounds = quantize_bounds(shape(polygon_geojson).bounds)
+        aois = {
+            band_type: aoi_key(bounds, band_type, visualizations[band_type]['vis_params'])
+            for band_type in band_types
+        }
+
+        results = {}
+        for band_type in band_types:
+            cached = await asyncio.to_thread(scene_cache.lookup, aois[band_type])
+            if cached:
+                results[band_type] = restore_cached_scene(band_type, cached)
+        missing = [band_type for band_type in band_types if not results.get(band_type)]
+        if not missing:
+            return [results[band_type] for band_type in band_types]
+
+        await asyncio.to_thread(init_earth_engine)
+
+        region = ee.Geometry.Rectangle(list(bounds))
+
+        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        sentinel = least_cloudy_sentinel(region)
+
+        image_id = await asyncio.to_thread(selected_image_id, sentinel)
+        keys = {
+            band_type: scene_key(bounds, image_id, band_type, visualizations[band_type]['vis_params'])
+            for band_type in missing
+        }
+        for band_type in list(missing):
+            cached = await asyncio.to_thread(scene_cache.get, keys[band_type], aois[band_type])
+            if cached:
+                results[band_type] = restore_cached_scene(band_type, cached)
+        missing = [band_type for band_type in band_types if not results.get(band_type)]
+        if not missing:
+            return [results[band_type] for band_type in band_types]
+
+        layers = []
+        for band_type in missing:
+            vis_config = visualizations[band_type]
+            image_rgb = vis_config['image'](sentinel).visualize(**vis_config['vis_params'])
+            prefix = band_type.lower()
+            layers.append(image_rgb.rename([f'{prefix}_r', f'{prefix}_g', f'{prefix}_b']))
+        stacked = ee.Image.cat(layers)
+
+        folder_name = f"earthbanc_exports_{timestamp}_combined"
+        file_name = f'sentinel_combined_{timestamp}.tif'
+
+        for band_type in missing:
+            task_statuses[band_type] = {
+                'status': 'processing',
+                'fileName': f'sentinel_{band_type.lower()}_{timestamp}.tif'
+            }
+
+        def mark(status, error=None):
+            for band_type in missing:
+                task_statuses[band_type]['status'] = status
+                if error:
+                    task_statuses[band_type]['error'] = error
+
+        tif_path = await fetch_geotiff(
+            stacked, region, bounds, 3 * len(missing), file_name, folder_name, mark
+        )
+        if tif_path:
+            png_paths = await asyncio.to_thread(split_visualizations, tif_path, missing)
+            for band_type, png_path in zip(missing, png_paths):
+                await asyncio.to_thread(
+                    scene_cache.put, keys[band_type], aois[band_type], image_id, band_type, {'png': png_path}
+                )
+                results[band_type] = os.path.basename(png_path)
+
+        return [results.get(band_type) for band_type in band_types]
+
+    except Exception as e:
+        logger.error(f"Error processing {', '.join(band_types)}: {str(e)}")
+        for band_type in band_types:
+            task_statuses[band_type] = {'status': 'failed', 'error': str(e)}
+        return [None] * len(band_types)
+
+def name_bands(tif_path, bands):
+    """Record band names as GeoTIFF band descriptions (exports do not keep them)"""
+    with rasterio.open(tif_path, 'r+') as dst:
+        for i, band in enumerate(bands, start=1):
+            dst.set_band_description(i, band)
+
+async def fetch_raw_bands(bounds, bands):
+    """
+    Raw Sentinel-2 bands (uint16 digital numbers) over ``bounds`` as one
+    GeoTIFF, from the scene cache when possible. Returns (path, image id).
+    """
+    raw_params = {'bands': bands}
+    aoi = aoi_key(bounds, 'raw', raw_params)
+    cached = await asyncio.to_thread(scene_cache.lookup, aoi)
+    if cached:
+        return cached['files']['tif'], cached['image_id']
+
+    await asyncio.to_thread(init_earth_engine)
+    region = ee.Geometry.Rectangle(list(bounds))
+    sentinel = least_cloudy_sentinel(region)
+
+    image_id = await asyncio.to_thread(selected_image_id, sentinel)
+    key = scene_key(bounds, image_id, 'raw', raw_params)
+    cached = await asyncio.to_thread(scene_cache.get, key, aoi)
+    if cached:
+        return cached['files']['tif'], image_id
+
+    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+    file_name = f'sentinel_raw_{timestamp}.tif'
+    folder_name = f"earthbanc_exports_{timestamp}_raw"
+
+    def mark(status, error=None):
+        if error:
+            logger.error(f"Raw band export {file_name} {status}: {error}")
+
+    # Two bytes per uint16 band
+    tif_path = await fetch_geotiff(
+        sentinel.select(bands).toUint16(), region, bounds, 2 * len(bands), file_name, folder_name, mark
+    )
+    if not tif_path:
+        return None, image_id
+
+    await asyncio.to_thread(name_bands, tif_path, bands)
+    entry = await asyncio.to_thread(scene_cache.put, key, aoi, image_id, 'raw', {'tif': tif_path})
+    os.remove(tif_path)
+    return entry['files']['tif'], image_id
+
+async def process_local_indices(polygon_geojson, names):
+    """
+    Render spectral indices and composites locally from one raw band
+    download per AOI.
+
+    The raw download covers every band the index registry uses, so any
+    registered index is computed without another Earth Engine request.
+    Returns the PNG file names in ``names`` order, None for any that failed.
+    """
+    try:
+        area = calculate_area_in_sq_km(polygon_geojson)
+        if area > 200:
+            raise ValueError(f"Area too large: {area:.2f} km². Maximum allowed area is 200 km².")
+
+        bounds = quantize_bounds(shape(polygon_geojson).bounds)
+        # SCL (scene classification) rides along for cloud masking in zonal stats
+        bands = required_bands(list(INDICES) + list(COMPOSITES)) + ['SCL']
+
+        for name in names:
+            task_statuses[name] = {'status': 'processing'}
+
+        raw_path, image_id = await fetch_raw_bands(bounds, bands)
+        if not raw_path:
+            for name in names:
+                task_statuses[name] = {'status': 'failed'}
+            return [None] * len(names)
+
+        stem = f"sentinel_{scene_key(bounds, image_id, 'raw', {'bands': bands})[:16]}"
+        outputs = await asyncio.to_thread(compute_indices, raw_path, names, OUTPUT_DIR, stem)
+
+        results = []
+        for name in names:
+            png_name = os.path.basename(outputs[name]['png'])
+            task_statuses[name] = {'status': 'completed', 'fileName': png_name.replace('.png', '.tif')}
+            results.append(png_name)
+        return results
+
+    except Exception as e:
+        logger.error(f"Error computing {', '.join(names)} locally: {str(e)}")
+        for name in names:
+            task_statuses[name] = {'status': 'failed', 'error': str(e)}
+        return [None] * len(names)
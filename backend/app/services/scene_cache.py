@@ -0,0 +1,215 @@
+# backend/app/services/scene_cache.py
+import fcntl
+import hashlib
+import json
+import logging
+import math
+import os
+import shutil
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# AOI bounding boxes are snapped outward to this grid (degrees, ~10 m)
+BBOX_GRID = 0.0001
+
+
+def quantize_bounds(bounds, grid: float = BBOX_GRID) -> Tuple[float, float, float, float]:
+    """Snap (minx, miny, maxx, maxy) outward to the grid"""
+    minx, miny, maxx, maxy = bounds
+    return (
+        round(math.floor(minx / grid) * grid, 6),
+        round(math.floor(miny / grid) * grid, 6),
+        round(math.ceil(maxx / grid) * grid, 6),
+        round(math.ceil(maxy / grid) * grid, 6)
+    )
+
+
+def vis_hash(vis_params: Dict[str, Any]) -> str:
+    return hashlib.sha256(json.dumps(vis_params, sort_keys=True).encode()).hexdigest()[:16]
+
+
+def aoi_key(bounds, band_type: str, vis_params: Dict[str, Any]) -> str:
+    """Key of a request before the Sentinel-2 scene is known"""
+    parts = [repr(quantize_bounds(bounds)), band_type, vis_hash(vis_params)]
+    return hashlib.sha256('\0'.join(parts).encode()).hexdigest()
+
+
+def scene_key(bounds, image_id: str, band_type: str, vis_params: Dict[str, Any]) -> str:
+    """Key of a rendered scene: AOI, Sentinel-2 image id, band type and visualization"""
+    parts = [repr(quantize_bounds(bounds)), image_id, band_type, vis_hash(vis_params)]
+    return hashlib.sha256('\0'.join(parts).encode()).hexdigest()
+
+
+class SceneCache:
+    """
+    Disk cache of rendered Sentinel-2 images.
+
+    ``index.json`` maps scene keys to their stored PNG/GeoTIFF files and
+    maps each AOI key to the scene it last resolved to. A fresh AOI entry
+    answers a request without touching Earth Engine. Once that expires,
+    the selected image id is looked up again and the scene is reused if it
+    is unchanged. Entries older than ``ttl`` seconds are dropped and the
+    least recently used go first once files exceed ``max_bytes``. The index
+    is guarded by an flock so every worker process shares it.
+    """
+
+    def __init__(self, root: Path, ttl: float, max_bytes: int):
+        self.root = Path(root)
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.index_path = self.root / 'index.json'
+        self._lock = threading.Lock()
+
+    def lookup(self, aoi: str) -> Optional[Dict[str, Any]]:
+        """Fresh scene last rendered for an AOI key, or None"""
+        with self._index() as index:
+            alias = index['aoi'].get(aoi)
+            if alias is None or time.time() - alias['resolved_at'] > self.ttl:
+                return None
+            return self._use(index, alias['scene'])
+
+    def get(self, key: str, aoi: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """Scene by key, re-pointing ``aoi`` at it on a hit"""
+        with self._index() as index:
+            entry = self._use(index, key)
+            if entry is not None and aoi is not None:
+                index['aoi'][aoi] = {'scene': key, 'resolved_at': time.time()}
+            return entry
+
+    def entries(self, band_type: str) -> List[Dict[str, Any]]:
+        """Unexpired entries of one band type whose files are all present"""
+        now = time.time()
+        with self._index() as index:
+            return [
+                entry for entry in index['scenes'].values()
+                if entry['band_type'] == band_type and now - entry['created_at'] <= self.ttl
+                and all(Path(p).exists() for p in entry['files'].values())
+            ]
+
+    def put(self, key: str, aoi: str, image_id: str, band_type: str, files: Dict[str, str]) -> Dict[str, Any]:
+        """Copy rendered files (e.g. {'png': ..., 'tif': ...}) into the cache and index them"""
+        self.root.mkdir(parents=True, exist_ok=True)
+        stored = {}
+        size = 0
+        for kind, path in files.items():
+            if not path or not Path(path).exists():
+                continue
+            target = self.root / f"{key}{Path(path).suffix}"
+            tmp_path = target.with_name(target.name + '.tmp')
+            shutil.copyfile(path, tmp_path)
+            os.replace(tmp_path, target)
+            stored[kind] = str(target)
+            size += target.stat().st_size
+
+        now = time.time()
+        entry = {
+            'key': key,
+            'image_id': image_id,
+            'band_type': band_type,
+            'files': stored,
+            'bytes': size,
+            'created_at': now,
+            'last_used_at': now
+        }
+        with self._index() as index:
+            index['scenes'][key] = entry
+            index['aoi'][aoi] = {'scene': key, 'resolved_at': now}
+            self._evict(index)
+        return entry
+
+    def restore(self, entry: Dict[str, Any], kind: str, target_path) -> bool:
+        """Copy a cached file to ``target_path``; False if the entry lacks it"""
+        source = entry['files'].get(kind)
+        if not source or not Path(source).exists():
+            return False
+        target_path = Path(target_path)
+        target_path.parent.mkdir(parents=True, exist_ok=True)
+        if not target_path.exists():
+            tmp_path = target_path.with_name(target_path.name + '.tmp')
+            shutil.copyfile(source, tmp_path)
+            os.replace(tmp_path, target_path)
+        return True
+
+    @contextmanager
+    def _index(self):
+        self.root.mkdir(parents=True, exist_ok=True)
+        with self._lock, open(self.root / 'index.lock', 'a') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                index = self._load()
+                before = json.dumps(index, sort_keys=True)
+                yield index
+                if json.dumps(index, sort_keys=True) != before:
+                    self._save(index)
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _load(self) -> Dict[str, Any]:
+        try:
+            with open(self.index_path, 'r') as f:
+                index = json.load(f)
+        except FileNotFoundError:
+            index = {}
+        except (OSError, ValueError) as e:
+            logger.error(f"Discarding unreadable scene cache index: {str(e)}")
+            index = {}
+        index.setdefault('scenes', {})
+        index.setdefault('aoi', {})
+        return index
+
+    def _save(self, index: Dict[str, Any]):
+        tmp_path = self.index_path.with_name(self.index_path.name + '.tmp')
+        with open(tmp_path, 'w') as f:
+            json.dump(index, f)
+        os.replace(tmp_path, self.index_path)
+
+    def _use(self, index: Dict[str, Any], key: str) -> Optional[Dict[str, Any]]:
+        entry = index['scenes'].get(key)
+        if entry is None:
+            return None
+        expired = time.time() - entry['created_at'] > self.ttl
+        if expired or not all(Path(p).exists() for p in entry['files'].values()):
+            self._drop(index, key)
+            return None
+        entry['last_used_at'] = time.time()
+        return entry
+
+    def _evict(self, index: Dict[str, Any]):
+        now = time.time()
+        for key in [k for k, e in index['scenes'].items() if now - e['created_at'] > self.ttl]:
+            self._drop(index, key)
+
+        total = sum(e['bytes'] for e in index['scenes'].values())
+        for key in sorted(index['scenes'], key=lambda k: index['scenes'][k]['last_used_at']):
+            if total <= self.max_bytes:
+                break
+            total -= index['scenes'][key]['bytes']
+            logger.info(f"Evicting cached scene {key}")
+            self._drop(index, key)
+
+    @staticmethod
+    def _drop(index: Dict[str, Any], key: str):
+        entry = index['scenes'].pop(key, None)
+        if entry is None:
+            return
+        for path in entry['files'].values():
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+        for aoi in [a for a, alias in index['aoi'].items() if alias['scene'] == key]:
+            del index['aoi'][aoi]
+
+
+scene_cache = SceneCache(
+    settings.SCENE_CACHE_DIR,
+    ttl=settings.SCENE_CACHE_TTL_HOURS * 3600,
+    max_bytes=int(settings.SCENE_CACHE_MAX_MB * 1024 * 1024)
+)
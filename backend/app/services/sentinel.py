@@ -5,6 +5,9 @@ from geoalchemy2.shape import to_shape
 import asyncio
 import traceback
 
+from app.services.ndvi_stats import zonal_ndvi
+from app.services.pixel_area import geometry_area_m2
+
 async def analyze(geometry) -> Dict[str, Any]:
     """
     Analyze a polygon using Sentinel data.
@@ -23,9 +26,14 @@ async def analyze(geometry) -> Dict[str, Any]:
         geom = to_shape(geometry)
         print(f"Shapely geometry: {geom}")
             
-        # Mock data for now
         bounds = geom.bounds
-        area = geom.area
+
+        # Zonal NDVI statistics from locally cached Sentinel-2 rasters
+        stats = await asyncio.to_thread(zonal_ndvi, geom)
+        if stats is None:
+            raise ValueError("No cached Sentinel-2 imagery covers this polygon")
+        if stats['mean'] is None:
+            raise ValueError("No cloud-free Sentinel-2 pixels inside this polygon")
         
         return {
             "bounds": {
@@ -34,14 +42,15 @@ async def analyze(geometry) -> Dict[str, Any]:
                 "maxx": bounds[2],
                 "maxy": bounds[3]
             },
-            "area_km2": area * 111.32 * 111.32,  # Rough conversion to km²
+            "area_km2": geometry_area_m2(geom) / 1_000_000,  # Geodesic WGS84 area
             "status": "success",
             "source": "sentinel-2",
-            "timestamp": "2024-01-16T00:00:00Z",
+            "timestamp": stats['timestamp'],
             "data": {
-                "ndvi_mean": 0.65,
-                "cloud_cover": 0.1,
-                "bands": ["B02", "B03", "B04", "B08"]
+                "ndvi_mean": stats['mean'],
+                "cloud_cover": stats['cloud_fraction'],
+                "bands": ["B04", "B08", "SCL"],
+                "ndvi": stats
             }
         }
             
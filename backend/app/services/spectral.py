@@ -0,0 +1,209 @@
+# backend/app/services/spectral.py
+import logging
+from contextlib import ExitStack
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Dict, List, Sequence, Tuple
+
+import numpy as np
+import rasterio
+from PIL import ImageColor
+from rasterio.windows import Window
+
+from app.services.png_stream import PNGStreamWriter
+
+logger = logging.getLogger(__name__)
+
+# Sentinel-2 L2A digital numbers per unit of surface reflectance
+REFLECTANCE_SCALE = 10000.0
+
+# Rows of every band held in memory at once
+CHUNK_ROWS = 512
+
+Bands = Dict[str, np.ndarray]
+
+
+@dataclass(frozen=True)
+class SpectralIndex:
+    """
+    A per-pixel index over Sentinel-2 reflectance. ``formula`` receives
+    float32 reflectance arrays keyed by band name and returns the index;
+    ``palette`` colours (any PIL colour string) are spread evenly over
+    ``vmin``..``vmax`` when rendering.
+    """
+    name: str
+    bands: Tuple[str, ...]
+    formula: Callable[[Bands], np.ndarray]
+    vmin: float = -1.0
+    vmax: float = 1.0
+    palette: Tuple[str, ...] = ('red', 'yellow', 'green')
+
+
+@dataclass(frozen=True)
+class Composite:
+    """A false- or true-colour composite of three bands stretched over vmin..vmax (digital numbers)"""
+    name: str
+    bands: Tuple[str, str, str]
+    vmin: float = 0.0
+    vmax: float = 3000.0
+
+
+def normalized_difference(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return (a - b) / (a + b)
+
+
+def _msavi2(b: Bands) -> np.ndarray:
+    nir, red = b['B8'], b['B4']
+    with np.errstate(invalid='ignore'):
+        return (2 * nir + 1 - np.sqrt((2 * nir + 1) ** 2 - 8 * (nir - red))) / 2
+
+
+def _evi(b: Bands) -> np.ndarray:
+    nir, red, blue = b['B8'], b['B4'], b['B2']
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return 2.5 * (nir - red) / (nir + 6 * red - 7.5 * blue + 1)
+
+
+def _savi(b: Bands) -> np.ndarray:
+    nir, red = b['B8'], b['B4']
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return 1.5 * (nir - red) / (nir + red + 0.5)
+
+
+# Adding an index is one entry here; the engine fetches whatever bands the
+# requested entries name
+INDICES: Dict[str, SpectralIndex] = {
+    index.name: index for index in (
+        SpectralIndex('NDVI', ('B8', 'B4'), lambda b: normalized_difference(b['B8'], b['B4'])),
+        SpectralIndex('NDWI', ('B3', 'B8'), lambda b: normalized_difference(b['B3'], b['B8']),
+                      palette=('red', 'yellow', 'green', 'cyan', 'blue')),
+        SpectralIndex('MSAVI2', ('B8', 'B4'), _msavi2),
+        SpectralIndex('EVI', ('B8', 'B4', 'B2'), _evi),
+        SpectralIndex('SAVI', ('B8', 'B4'), _savi),
+        SpectralIndex('NDMI', ('B8', 'B11'), lambda b: normalized_difference(b['B8'], b['B11']),
+                      palette=('brown', 'yellow', 'cyan', 'blue')),
+    )
+}
+
+COMPOSITES: Dict[str, Composite] = {
+    composite.name: composite for composite in (
+        Composite('TrueColor', ('B4', 'B3', 'B2')),
+        Composite('AgriColor', ('B8', 'B4', 'B3')),
+    )
+}
+
+
+def required_bands(names: Sequence[str]) -> List[str]:
+    """Bands to download for a set of index/composite names, in a stable order"""
+    bands = set()
+    for name in names:
+        if name in INDICES:
+            bands.update(INDICES[name].bands)
+        elif name in COMPOSITES:
+            bands.update(COMPOSITES[name].bands)
+        else:
+            raise ValueError(f"Unknown spectral index: {name}")
+    return sorted(bands, key=lambda b: int(b[1:].rstrip('A')) + (0.5 if b.endswith('A') else 0))
+
+
+def palette_lut(palette: Sequence[str]) -> np.ndarray:
+    """256 x 4 RGBA lookup table interpolating the palette colours evenly"""
+    stops = np.array([ImageColor.getrgb(color)[:3] for color in palette], dtype=np.float32)
+    positions = np.linspace(0, 255, len(stops))
+    lut = np.empty((256, 4), dtype=np.uint8)
+    for channel in range(3):
+        lut[:, channel] = np.interp(np.arange(256), positions, stops[:, channel]).round()
+    lut[:, 3] = 255
+    return lut
+
+
+def _to_bytes(values: np.ndarray, vmin: float, vmax: float) -> np.ndarray:
+    scaled = (values - vmin) * (255.0 / (vmax - vmin))
+    return np.clip(np.nan_to_num(scaled, nan=0.0), 0, 255).astype(np.uint8)
+
+
+def compute_indices(
+    raw_path,
+    names: Sequence[str],
+    out_dir,
+    stem: str,
+    chunk_rows: int = CHUNK_ROWS,
+    write_geotiff: bool = True
+) -> Dict[str, Dict[str, str]]:
+    """
+    Compute indices and composites from one raw multi-band Sentinel-2
+    GeoTIFF (band descriptions name the bands, e.g. ``B8``).
+
+    The raster is processed in strips of ``chunk_rows`` rows. Every
+    requested output is written from the same strip: a palette-rendered
+    RGBA PNG (transparent where the index is undefined or one of its own
+    bands is nodata) and, for indices, a float32 GeoTIFF of the values. Returns
+    ``{name: {'png': path, 'tif': path}}``. Blocking.
+    """
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    outputs = {name: {'png': str(out_dir / f"{stem}_{name.lower()}.png")} for name in names}
+    luts = {name: palette_lut(INDICES[name].palette) for name in names if name in INDICES}
+
+    with rasterio.open(raw_path) as src:
+        band_index = {desc: i + 1 for i, desc in enumerate(src.descriptions) if desc}
+        needed = required_bands(names)
+        missing = [b for b in needed if b not in band_index]
+        if missing:
+            raise ValueError(f"{Path(raw_path).name} lacks bands {', '.join(missing)}")
+
+        positions = {name: [needed.index(b) for b in required_bands([name])] for name in names}
+
+        profile = src.profile.copy()
+        profile.update(driver='GTiff', count=1, dtype='float32', nodata=np.nan,
+                       compress='deflate', tiled=True, blockxsize=256, blockysize=256)
+
+        with ExitStack() as files:
+            writers = {}
+            rasters = {}
+            for name in names:
+                writers[name] = PNGStreamWriter(
+                    files.enter_context(open(outputs[name]['png'], 'wb')), src.width, src.height, 4
+                )
+                if write_geotiff and name in INDICES:
+                    outputs[name]['tif'] = str(out_dir / f"{stem}_{name.lower()}.tif")
+                    rasters[name] = files.enter_context(rasterio.open(outputs[name]['tif'], 'w', **profile))
+
+            for top in range(0, src.height, chunk_rows):
+                height = min(chunk_rows, src.height - top)
+                window = Window(0, top, src.width, height)
+                raw = src.read([band_index[b] for b in needed], window=window)
+                band_valid = raw != (src.nodata if src.nodata is not None else 0)
+                reflectance = {
+                    band: raw[i].astype(np.float32) / REFLECTANCE_SCALE for i, band in enumerate(needed)
+                }
+
+                for name in names:
+                    valid = np.all(band_valid[positions[name]], axis=0)
+                    rgba = np.empty((height, src.width, 4), dtype=np.uint8)
+                    if name in INDICES:
+                        index = INDICES[name]
+                        values = index.formula(reflectance).astype(np.float32)
+                        ok = valid & np.isfinite(values)
+                        values[~ok] = np.nan
+                        rgba[:] = luts[name][_to_bytes(values, index.vmin, index.vmax)]
+                        if name in rasters:
+                            rasters[name].write(values, 1, window=window)
+                    else:
+                        composite = COMPOSITES[name]
+                        for channel, band in enumerate(composite.bands):
+                            rgba[:, :, channel] = _to_bytes(
+                                raw[needed.index(band)].astype(np.float32), composite.vmin, composite.vmax
+                            )
+                        rgba[:, :, 3] = 255
+                        ok = valid
+                    rgba[~ok, 3] = 0
+                    writers[name].write_rows(rgba)
+
+            for writer in writers.values():
+                writer.close()
+
+    logger.info(f"Computed {', '.join(names)} from {Path(raw_path).name}")
+    return outputs
+
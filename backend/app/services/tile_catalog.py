@@ -0,0 +1,166 @@
+# backend/app/services/tile_catalog.py
+import json
+import logging
+import math
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import shapely
+from shapely.geometry import box
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+TileEntry = Tuple[str, Dict[str, Any]]
+
+
+class TileCatalog:
+    """
+    Compiled spatial index over a tile reference JSON
+    (``{"metadata": {...}, "tiles": {tile_id: {"bounds": {...}, ...}}}``).
+
+    Catalogs whose tiles sit on a regular lattice (LGRIP30, the Sentinel
+    reference) are addressed by direct grid arithmetic. Anything else falls
+    back to a packed STR R-tree over the tile boxes.
+    """
+
+    def __init__(self, reference: Dict[str, Any]):
+        self.metadata = reference.get('metadata', {})
+        self.tiles = reference['tiles']
+        self.tile_ids = list(self.tiles)
+        self.bounds = np.array(
+            [
+                [t['bounds']['minx'], t['bounds']['miny'], t['bounds']['maxx'], t['bounds']['maxy']]
+                for t in self.tiles.values()
+            ],
+            dtype=np.float64
+        ).reshape(-1, 4)
+
+        self._grid = None
+        self._tree = None
+        if not self._compile_grid():
+            self._tree = shapely.STRtree(shapely.box(*self.bounds.T))
+
+        logger.debug(
+            f"Compiled tile catalog with {len(self.tile_ids)} tiles "
+            f"({'grid' if self._grid is not None else 'r-tree'} index)"
+        )
+
+    @classmethod
+    def from_json(cls, path) -> "TileCatalog":
+        with open(path, 'r') as f:
+            return cls(json.load(f))
+
+    @property
+    def is_grid(self) -> bool:
+        return self._grid is not None
+
+    def _compile_grid(self) -> bool:
+        """Build a (rows, cols) array of tile indices if the tiles form a lattice"""
+        if not len(self.bounds):
+            return False
+
+        widths = self.bounds[:, 2] - self.bounds[:, 0]
+        heights = self.bounds[:, 3] - self.bounds[:, 1]
+        cell_w, cell_h = widths[0], heights[0]
+        if cell_w <= 0 or cell_h <= 0:
+            return False
+        if not (np.allclose(widths, cell_w) and np.allclose(heights, cell_h)):
+            return False
+
+        origin_x = self.bounds[:, 0].min()
+        origin_y = self.bounds[:, 1].min()
+        cols_f = (self.bounds[:, 0] - origin_x) / cell_w
+        rows_f = (self.bounds[:, 1] - origin_y) / cell_h
+        cols = np.rint(cols_f).astype(np.int64)
+        rows = np.rint(rows_f).astype(np.int64)
+        if not (np.allclose(cols, cols_f) and np.allclose(rows, rows_f)):
+            return False
+
+        grid = np.full((rows.max() + 1, cols.max() + 1), -1, dtype=np.int32)
+        if len(set(zip(rows.tolist(), cols.tolist()))) != len(rows):
+            # Overlapping tiles can't be addressed by a single cell lookup
+            return False
+        grid[rows, cols] = np.arange(len(rows), dtype=np.int32)
+
+        self._grid = grid
+        self._origin = (origin_x, origin_y)
+        self._cell = (cell_w, cell_h)
+        return True
+
+    def _grid_candidates(self, bounds) -> np.ndarray:
+        minx, miny, maxx, maxy = bounds
+        origin_x, origin_y = self._origin
+        cell_w, cell_h = self._cell
+        n_rows, n_cols = self._grid.shape
+
+        # Half-open cell ranges; bounds lying exactly on a tile edge do not
+        # pull in the neighbouring tile, matching the strict overlap test.
+        col_start = max(0, math.floor((minx - origin_x) / cell_w))
+        col_stop = min(n_cols, math.ceil((maxx - origin_x) / cell_w))
+        row_start = max(0, math.floor((miny - origin_y) / cell_h))
+        row_stop = min(n_rows, math.ceil((maxy - origin_y) / cell_h))
+        if col_stop <= col_start or row_stop <= row_start:
+            return np.empty(0, dtype=np.int32)
+
+        cells = self._grid[row_start:row_stop, col_start:col_stop].ravel()
+        return cells[cells >= 0]
+
+    def _overlapping(self, bounds) -> np.ndarray:
+        """Indices of tiles whose boxes strictly overlap ``bounds``"""
+        if self._grid is not None:
+            candidates = self._grid_candidates(bounds)
+        else:
+            candidates = self._tree.query(box(*bounds))
+
+        tb = self.bounds[candidates]
+        keep = (
+            (bounds[0] < tb[:, 2]) & (bounds[2] > tb[:, 0]) &
+            (bounds[1] < tb[:, 3]) & (bounds[3] > tb[:, 1])
+        )
+        return np.sort(candidates[keep])
+
+    def tiles_for_bounds(self, bounds) -> List[TileEntry]:
+        """Tiles whose extent overlaps the (minx, miny, maxx, maxy) box"""
+        return [
+            (self.tile_ids[i], self.tiles[self.tile_ids[i]])
+            for i in self._overlapping(bounds)
+        ]
+
+    def tiles_for_geometry(self, geom) -> List[TileEntry]:
+        """
+        Tiles the geometry actually intersects in their interior. Tiles that
+        only fall inside the geometry's bounding box, or merely share an
+        edge with it, are skipped.
+        """
+        candidates = self._overlapping(geom.bounds)
+        if len(candidates) <= 1:
+            return [(self.tile_ids[i], self.tiles[self.tile_ids[i]]) for i in candidates]
+
+        shapely.prepare(geom)
+        tile_boxes = shapely.box(*self.bounds[candidates].T)
+        hits = shapely.intersects(geom, tile_boxes) & ~shapely.touches(geom, tile_boxes)
+        return [
+            (self.tile_ids[i], self.tiles[self.tile_ids[i]])
+            for i in candidates[hits]
+        ]
+
+    def get(self, tile_id: str) -> Optional[Dict[str, Any]]:
+        return self.tiles.get(tile_id)
+
+
+@lru_cache(maxsize=None)
+def load_catalog(path: str) -> TileCatalog:
+    """Load and compile a tile reference JSON once per process"""
+    return TileCatalog.from_json(Path(path))
+
+
+def lgrip_catalog() -> TileCatalog:
+    return load_catalog(str(settings.LGRIP_TILES_PATH))
+
+
+def sentinel_catalog() -> TileCatalog:
+    return load_catalog(str(settings.SENTINEL_TILES_PATH))
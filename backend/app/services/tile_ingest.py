@@ -0,0 +1,224 @@
+# backend/app/services/tile_ingest.py
+import fcntl
+import logging
+import os
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, Optional
+
+import numpy as np
+import rasterio
+import rasterio.shutil
+from rasterio.windows import Window
+
+from app.core.config import settings
+from app.services.pixel_area import row_areas
+from app.services.raster_analysis import class_histogram
+from app.services.tile_store import disk_bytes, tile_store
+
+logger = logging.getLogger(__name__)
+
+# Internal block size of ingested tiles, also the chunk of the class index
+CHUNK = 512
+
+INGESTED_SUFFIX = '.cog.tif'
+INDEX_SUFFIX = '.chunks.npz'
+
+# Size of an ingested copy relative to the raw tile: DEFLATE compresses
+# about as well as the source, and overviews add up to a third
+INGESTED_SIZE_FACTOR = 4 / 3
+
+
+def ingested_path(raw_path) -> Path:
+    """Where the ingested copy of a raw LGRIP30 tile lives"""
+    raw_path = Path(raw_path)
+    if raw_path.name.endswith(INGESTED_SUFFIX):
+        return raw_path
+    return raw_path.with_name(raw_path.stem + INGESTED_SUFFIX)
+
+
+def index_path(tile_path) -> Path:
+    tile_path = Path(tile_path)
+    return tile_path.with_name(tile_path.name + INDEX_SUFFIX)
+
+
+def is_ingested(raw_path) -> bool:
+    path = ingested_path(raw_path)
+    return path.exists() and index_path(path).exists()
+
+
+def ingest_tile(raw_path) -> Path:
+    """
+    Convert a raw LGRIP30 tile into the analysis layout and return its path.
+
+    The output is a COG with 512 px blocks, DEFLATE compression and
+    nearest-neighbour overviews, plus a ``.chunks.npz`` index holding the
+    class counts and areas of every 512 px chunk. Both are written to
+    temporary names and renamed into place; the index lands last, so a tile
+    counts as ingested only once both exist. Space for the copy is reserved
+    in the tile store first, with the raw tile pinned. Once the copy is
+    verified against the raw tile, the raw tile is deleted (later, if an
+    analysis still has it pinned). Blocking.
+    """
+    raw_path = Path(raw_path)
+    target = ingested_path(raw_path)
+    lock_path = target.with_name(target.name + '.lock')
+
+    with open(lock_path, 'a') as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            if is_ingested(raw_path):
+                remove_raw(raw_path)
+                return target
+
+            logger.info(f"Ingesting {raw_path.name}")
+            tmp_tile = target.with_name(target.name + '.tmp')
+            with tile_store.pin(raw_path):
+                tile_store.ensure_space(int(disk_bytes(raw_path) * INGESTED_SIZE_FACTOR))
+                with rasterio.open(raw_path) as src:
+                    rasterio.shutil.copy(
+                        src,
+                        str(tmp_tile),
+                        driver='COG',
+                        compress='DEFLATE',
+                        blocksize=CHUNK,
+                        overviews='AUTO',
+                        overview_resampling='NEAREST',
+                        bigtiff='IF_SAFER',
+                        num_threads='ALL_CPUS'
+                    )
+            os.replace(tmp_tile, target)
+
+            index = build_chunk_index(target)
+            try:
+                verify_ingested(raw_path, target, index)
+            except ValueError:
+                target.unlink()
+                raise
+            tmp_index = index_path(target).with_name(index_path(target).name + '.tmp.npz')
+            np.savez_compressed(tmp_index, **index)
+            os.replace(tmp_index, index_path(target))
+
+            logger.info(f"Ingested {raw_path.name} -> {target.name}")
+            remove_raw(raw_path)
+            return target
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def verify_ingested(raw_path, target, index: Dict[str, np.ndarray]):
+    """Raise ValueError unless the ingested copy has the raw tile's grid and every pixel is indexed"""
+    with rasterio.open(raw_path) as raw, rasterio.open(target) as copy:
+        for name in ('width', 'height', 'transform', 'crs', 'nodata', 'dtypes'):
+            if getattr(raw, name) != getattr(copy, name):
+                raise ValueError(f"Ingested copy of {Path(raw_path).name} differs in {name}")
+        pixels = raw.width * raw.height
+    if int(index['counts'].sum()) != pixels:
+        raise ValueError(f"Chunk index of {Path(target).name} covers {int(index['counts'].sum())} of {pixels} pixels")
+
+
+def remove_raw(raw_path):
+    """Delete a raw tile whose ingested copy is complete; a pinned one goes on a later call"""
+    raw_path = Path(raw_path)
+    if raw_path == ingested_path(raw_path) or not raw_path.exists():
+        return
+    freed = tile_store.remove(raw_path)
+    if freed:
+        logger.info(f"Removed raw tile {raw_path.name} ({freed / 1024 ** 2:.0f} MB), superseded by its ingested copy")
+    else:
+        logger.info(f"Raw tile {raw_path.name} is in use; it will be removed when next requested")
+
+
+def build_chunk_index(tile_path) -> Dict[str, np.ndarray]:
+    """
+    Per-chunk class summaries of a tile for the CHUNK x CHUNK blocks in
+    row-major order (edge chunks are smaller): ``counts[row, col, class]``
+    and ``areas[row, col, class]``, the ellipsoidal area in m² weighted by
+    each pixel row's latitude. The class axis is trimmed to the highest
+    code present.
+    """
+    with rasterio.open(tile_path) as src:
+        n_rows = -(-src.height // CHUNK)
+        n_cols = -(-src.width // CHUNK)
+        weights = row_areas(src.transform, src.height)
+        counts = np.zeros((n_rows, n_cols, 256), dtype=np.uint32)
+        areas = np.zeros((n_rows, n_cols, 256), dtype=np.float64)
+        for row in range(n_rows):
+            # One strip of chunks at a time keeps memory at CHUNK rows
+            top = row * CHUNK
+            height = min(CHUNK, src.height - top)
+            strip = src.read(1, window=Window(0, top, src.width, height))
+            for col in range(n_cols):
+                chunk_counts, chunk_areas = class_histogram(
+                    strip[:, col * CHUNK:(col + 1) * CHUNK],
+                    weights[top:top + height]
+                )
+                counts[row, col] = chunk_counts[:256]
+                areas[row, col] = chunk_areas[:256]
+        nodata = src.nodata if src.nodata is not None else -1
+
+    present = np.nonzero(counts.any(axis=(0, 1)))[0]
+    n_bins = int(present[-1]) + 1 if len(present) else 1
+    return {
+        'counts': counts[:, :, :n_bins],
+        'areas': areas[:, :, :n_bins],
+        'chunk': np.array(CHUNK),
+        'nodata': np.array(nodata)
+    }
+
+
+def load_chunk_index(tile_path) -> Optional[Dict[str, np.ndarray]]:
+    """Chunk index of an ingested tile, or None if it has none"""
+    path = index_path(tile_path)
+    if not path.exists():
+        return None
+    return _load_index(str(path), path.stat().st_mtime_ns)
+
+
+@lru_cache(maxsize=16)
+def _load_index(path: str, mtime_ns: int) -> Dict[str, np.ndarray]:
+    with np.load(path) as index:
+        return {key: index[key] for key in index.files}
+
+
+_executor: Optional[ThreadPoolExecutor] = None
+_pending: Dict[str, Future] = {}
+_lock = threading.Lock()
+
+
+def schedule_ingest(raw_path) -> Optional[Future]:
+    """
+    Ingest a tile in the background, once per process. Analyses keep using
+    the raw tile until the ingested copy is complete.
+    """
+    global _executor
+    if not settings.LGRIP_INGEST or is_ingested(raw_path):
+        return None
+
+    key = str(raw_path)
+    with _lock:
+        if key in _pending:
+            return _pending[key]
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="tile-ingest")
+        future = _executor.submit(ingest_tile, raw_path)
+        _pending[key] = future
+
+    def done(f: Future):
+        with _lock:
+            _pending.pop(key, None)
+        if f.exception() is not None:
+            logger.error(f"Error ingesting {Path(raw_path).name}: {str(f.exception())}")
+
+    future.add_done_callback(done)
+    return future
+
+
+def shutdown_ingest():
+    global _executor
+    with _lock:
+        if _executor is not None:
+            _executor.shutdown(wait=False, cancel_futures=True)
+            _executor = None
@@ -0,0 +1,184 @@
+# backend/app/services/tile_pool.py
+import logging
+import multiprocessing
+import os
+import threading
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import rasterio
+import shapely.wkb
+
+from app.core.config import settings
+from app.services.raster_analysis import class_areas, read_polygon_window, read_polygon_window_summarized
+from app.services.tile_ingest import load_chunk_index
+
+logger = logging.getLogger(__name__)
+
+# LGRIP30 pixel size in degrees (~30 m at the equator)
+RES = 0.000277778
+
+# Bytes held per window pixel while a tile is processed: the uint8 window,
+# the rasterized polygon mask and the copy pickled back to the parent.
+BYTES_PER_PIXEL = 4
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+
+def process_tile(tile_id: str, file_path: str, geom_wkb: bytes) -> Dict[str, Any]:
+    """
+    Mask one LGRIP30 tile to the polygon and count its classes.
+
+    Runs in a worker process, so it takes the geometry as WKB and returns
+    only picklable values. ``dataset`` is None when the polygon misses the
+    tile's raster extent.
+    """
+    geom = shapely.wkb.loads(geom_wkb)
+
+    index = load_chunk_index(file_path)
+
+    with rasterio.open(file_path) as src:
+        if index is not None and 'areas' in index:
+            # Ingested tile: interior chunks come from the summary index
+            windowed = read_polygon_window_summarized(src, geom, index, nodata=src.nodata)
+            if windowed is None:
+                return {'tile_id': tile_id, 'dataset': None, 'result': None}
+            data, out_transform, nodata, counts, class_area = windowed
+        else:
+            windowed = read_polygon_window(src, geom, nodata=src.nodata)
+            if windowed is None:
+                return {'tile_id': tile_id, 'dataset': None, 'result': None}
+            data, out_transform, nodata = windowed
+
+            # Per-class counts and ellipsoidal areas (m²), weighted row by row
+            counts, class_area = class_areas(data, out_transform)
+        has_nodata = 0 <= nodata < len(counts)
+        nodata_count = counts[int(nodata)] if has_nodata else 0
+
+        areas = {
+            'no_data': class_area[int(nodata)] if has_nodata else 0.0,
+            1: class_area[1],
+            2: class_area[2],
+            3: class_area[3]
+        }
+
+        return {
+            'tile_id': tile_id,
+            'dataset': {
+                'data': data,
+                'transform': out_transform,
+                'nodata': nodata,
+                'crs': src.crs
+            },
+            'result': {
+                'areas': areas,
+                'total_pixels': data.size,
+                'valid_pixels': data.size - nodata_count
+            }
+        }
+
+
+def estimate_tile_bytes(geom_bounds, tile_bounds: Dict[str, float]) -> int:
+    """Upper bound on the memory a worker needs for the polygon window of one tile"""
+    width = min(geom_bounds[2], tile_bounds['maxx']) - max(geom_bounds[0], tile_bounds['minx'])
+    height = min(geom_bounds[3], tile_bounds['maxy']) - max(geom_bounds[1], tile_bounds['miny'])
+    pixels = (max(width, 0) / RES + 1) * (max(height, 0) / RES + 1)
+    return int(pixels * BYTES_PER_PIXEL)
+
+
+def plan_workers(tile_bytes: List[int]) -> int:
+    """Number of tiles to process at once, bounded by CPUs and the memory budget"""
+    if not tile_bytes:
+        return 1
+    budget = settings.TILE_MEMORY_BUDGET_MB * 1024 * 1024
+    by_memory = budget // max(max(tile_bytes), 1)
+    return int(max(1, min(settings.TILE_WORKERS, os.cpu_count() or 1, len(tile_bytes), by_memory)))
+
+
+def get_pool() -> ProcessPoolExecutor:
+    """Process-wide worker pool, created on first use"""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            # spawn: jobs call this from threads, where forking is unsafe
+            _pool = ProcessPoolExecutor(
+                max_workers=max(1, settings.TILE_WORKERS),
+                mp_context=multiprocessing.get_context('spawn')
+            )
+        return _pool
+
+
+def shutdown_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+            _pool = None
+
+
+def process_tiles(
+    tiles: List[Tuple[str, str, Dict[str, Any]]],
+    geom,
+    max_workers: Optional[int] = None,
+    on_tile_done: Optional[Callable[[str], None]] = None
+) -> List[Dict[str, Any]]:
+    """
+    Run process_tile for each (tile_id, file_path, tile_info), fanning out
+    across the process pool.
+
+    Outcomes come back in input order whatever the worker count, so the
+    reduction and mosaic are identical to the sequential path. A failed
+    tile yields an outcome with an ``error`` instead of raising.
+    ``on_tile_done`` may raise (e.g. JobCancelled) to abandon the
+    remaining tiles.
+    """
+    if not tiles:
+        return []
+
+    geom_wkb = geom.wkb
+    if max_workers is None:
+        max_workers = plan_workers([estimate_tile_bytes(geom.bounds, info['bounds']) for _, _, info in tiles])
+
+    outcomes: List[Optional[Dict[str, Any]]] = [None] * len(tiles)
+
+    if max_workers <= 1 or len(tiles) == 1:
+        for idx, (tile_id, file_path, _) in enumerate(tiles):
+            try:
+                outcomes[idx] = process_tile(tile_id, file_path, geom_wkb)
+            except Exception as e:
+                logger.error(f"Error processing tile {tile_id}: {str(e)}")
+                outcomes[idx] = {'tile_id': tile_id, 'error': str(e)}
+            if on_tile_done:
+                on_tile_done(tile_id)
+        return outcomes
+
+    logger.info(f"Processing {len(tiles)} tiles with {max_workers} workers")
+    pool = get_pool()
+    pending = {}
+    next_idx = 0
+    try:
+        while next_idx < len(tiles) or pending:
+            # Keep at most max_workers windows in memory at once
+            while next_idx < len(tiles) and len(pending) < max_workers:
+                tile_id, file_path, _ = tiles[next_idx]
+                future = pool.submit(process_tile, tile_id, file_path, geom_wkb)
+                pending[future] = next_idx
+                next_idx += 1
+
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                idx = pending.pop(future)
+                tile_id = tiles[idx][0]
+                try:
+                    outcomes[idx] = future.result()
+                except Exception as e:
+                    logger.error(f"Error processing tile {tile_id}: {str(e)}")
+                    outcomes[idx] = {'tile_id': tile_id, 'error': str(e)}
+                if on_tile_done:
+                    on_tile_done(tile_id)
+    finally:
+        for future in pending:
+            future.cancel()
+
+    return outcomes
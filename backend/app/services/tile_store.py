@@ -0,0 +1,203 @@
+# backend/app/services/tile_store.py
+import argparse
+import asyncio
+import fcntl
+import logging
+import os
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+# Files kept next to a tile: the ingested copy's chunk index
+SIDECAR_SUFFIXES = ('.chunks.npz',)
+
+
+def disk_bytes(path) -> int:
+    """Space a file takes on disk; sparse .part files only count written blocks"""
+    return os.stat(path).st_blocks * 512
+
+
+def _bytes_if_exists(path) -> int:
+    try:
+        return disk_bytes(path)
+    except FileNotFoundError:
+        return 0
+
+
+class TileStore:
+    """
+    Byte-budgeted disk cache of downloaded LGRIP30 tiles and their
+    ingested copies.
+
+    Recency is the file's access time, set explicitly on every use, so it
+    is shared by all worker processes without an index file. Tiles in use
+    are pinned with a shared flock on ``{tile}.lock`` (the lock the
+    downloader holds exclusively), so eviction skips tiles that another
+    job or process is reading or downloading, and pins vanish with a
+    crashed process.
+    """
+
+    def __init__(self, root: Path, max_bytes: int):
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+        self.root.mkdir(parents=True, exist_ok=True)
+
+    def tiles(self) -> List[Path]:
+        """
+        Complete tiles in the store. Lock files, download manifests and the
+        temporary files of an ingest in progress are not tiles.
+        """
+        return [p for p in self.root.iterdir() if p.suffix == '.tif' and p.is_file()]
+
+    def tile_bytes(self, path) -> int:
+        """Disk space of a complete tile and its sidecar files"""
+        path = Path(path)
+        return _bytes_if_exists(path) + sum(
+            _bytes_if_exists(path.with_name(path.name + suffix)) for suffix in SIDECAR_SUFFIXES
+        )
+
+    def usage(self) -> Dict[str, Any]:
+        tiles = self.tiles()
+        partial = [p for p in self.root.iterdir() if p.suffix == '.part' and p.is_file()]
+        return {
+            'tiles': len(tiles),
+            'bytes': sum(self.tile_bytes(p) for p in tiles),
+            'partial_bytes': sum(_bytes_if_exists(p) for p in partial),
+            'max_bytes': self.max_bytes
+        }
+
+    def touch(self, path):
+        """Record an access, keeping the modification time"""
+        try:
+            stat = os.stat(path)
+            os.utime(path, (time.time(), stat.st_mtime))
+        except FileNotFoundError:
+            pass
+
+    @contextmanager
+    def pin(self, path):
+        """Keep a tile from being evicted while the block runs"""
+        path = Path(path)
+        lock_path = path.with_name(path.name + '.lock')
+        with open(lock_path, 'a') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_SH)
+            try:
+                self.touch(path)
+                yield path
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def ensure_space(self, incoming_bytes: int = 0, partial: Optional[Path] = None) -> int:
+        """
+        Evict least recently used, unpinned tiles until ``incoming_bytes``
+        more fit in the budget. ``partial`` is the .part file of a download
+        being resumed: the bytes it already holds are in the usage, so they
+        are not counted again as incoming. Returns the number of bytes
+        freed; the budget may stay exceeded if every remaining tile is
+        pinned.
+        """
+        usage = self.usage()
+        if partial is not None:
+            incoming_bytes = max(0, incoming_bytes - _bytes_if_exists(partial))
+        excess = usage['bytes'] + usage['partial_bytes'] + incoming_bytes - self.max_bytes
+        if excess <= 0:
+            return 0
+
+        freed = 0
+        for path in sorted(self.tiles(), key=lambda p: p.stat().st_atime):
+            if freed >= excess:
+                break
+            size = self._evict(path)
+            if size:
+                logger.info(f"Evicted tile {path.name} ({size / 1024 ** 3:.2f} GB)")
+                freed += size
+
+        if freed < excess:
+            logger.warning(
+                f"Tile store over budget by {(excess - freed) / 1024 ** 3:.2f} GB; "
+                f"all remaining tiles are in use"
+            )
+        return freed
+
+    def remove(self, path) -> int:
+        """Delete a tile unless it is pinned; returns the bytes freed (0 if pinned or gone)"""
+        return self._evict(Path(path))
+
+    def _evict(self, path: Path) -> int:
+        lock_path = path.with_name(path.name + '.lock')
+        with open(lock_path, 'a') as lock_file:
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                return 0  # pinned or being downloaded
+            try:
+                size = self.tile_bytes(path)
+                path.unlink()
+                for suffix in SIDECAR_SUFFIXES:
+                    sidecar = path.with_name(path.name + suffix)
+                    if sidecar.exists():
+                        sidecar.unlink()
+                return size
+            except FileNotFoundError:
+                return 0
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+tile_store = TileStore(settings.LGRIP_TILE_DIR, int(settings.TILE_CACHE_MAX_GB * 1024 ** 3))
+
+
+async def prefetch(bounds, progress_callback=None) -> Dict[str, Any]:
+    """Download every LGRIP30 tile intersecting ``bounds`` (minx, miny, maxx, maxy)"""
+    from app.services.file_manager import LGRIPFileManager
+    from app.services.tile_catalog import lgrip_catalog
+    from app.services.tile_ingest import ingest_tile
+
+    tiles = lgrip_catalog().tiles_for_bounds(bounds)
+    expected = sum(int(info.get('file_size_gb', 0) * 1024 ** 3) for _, info in tiles)
+    if expected > tile_store.max_bytes:
+        logger.warning(
+            f"Region needs ~{expected / 1024 ** 3:.1f} GB but the tile store budget is "
+            f"{tile_store.max_bytes / 1024 ** 3:.1f} GB; early tiles may be evicted"
+        )
+
+    manager = LGRIPFileManager()
+    statuses = {}
+    for tile_id, tile_info in tiles:
+        file_path, status = await manager.get_file_path(tile_info, progress_callback)
+        if file_path and settings.LGRIP_INGEST and status != "ingested":
+            # Ingest now; this process exits before a background ingest would finish
+            await asyncio.to_thread(ingest_tile, file_path)
+            status = f"{status}+ingested"
+        statuses[tile_id] = status
+        logger.info(f"Tile {tile_id}: {status}")
+    return {'tiles': statuses, 'usage': tile_store.usage()}
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description='Manage the LGRIP30 tile store')
+    parser.add_argument('--bbox', nargs=4, type=float, metavar=('MINX', 'MINY', 'MAXX', 'MAXY'),
+                        help='Prefetch the tiles covering this lon/lat box')
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+    if args.bbox:
+        result = asyncio.run(prefetch(tuple(args.bbox)))
+        for tile_id, status in result['tiles'].items():
+            print(f"{tile_id}: {status}")
+
+    usage = tile_store.usage()
+    print(
+        f"{usage['tiles']} tiles, {usage['bytes'] / 1024 ** 3:.1f} of "
+        f"{usage['max_bytes'] / 1024 ** 3:.1f} GB used"
+    )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,61 @@
+# backend/benchmarks/bench_carbon_batch.py
+"""
+Batch carbon engine against the per-polygon estimate loop.
+
+Builds synthetic sentinel.analyze results for N polygons, then times
+awaiting carbon.estimate once per polygon versus one estimate_batch call
+on columnar inputs. Monte Carlo bounds are switched off
+(CARBON_MC_ESTIMATE=0) so both paths use the fixed margin. Parity of the
+two paths is covered by tests/test_carbon.py.
+
+Run from backend/:
+    PYTHONPATH=. python benchmarks/bench_carbon_batch.py --polygons 20000
+"""
+import argparse
+import asyncio
+import time
+
+import numpy as np
+import pandas as pd
+
+from app.services import carbon
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--polygons', type=int, default=20000)
+    args = parser.parse_args()
+    carbon.settings.CARBON_MC_ESTIMATE = False
+
+    rng = np.random.default_rng(0)
+    results = [
+        {
+            "area_km2": float(area),
+            "timestamp": "2024-06-01T00:00:00Z",
+            "data": {"ndvi_mean": float(ndvi), "cloud_cover": 0.0, "ndvi": {"std": 0.1}}
+        }
+        for area, ndvi in zip(rng.uniform(0.01, 5, args.polygons), rng.uniform(0, 0.9, args.polygons))
+    ]
+
+    async def loop():
+        return [await carbon.estimate(None, r) for r in results]
+
+    started = time.perf_counter()
+    asyncio.run(loop())
+    loop_time = time.perf_counter() - started
+
+    started = time.perf_counter()
+    inputs = pd.DataFrame(carbon.batch_inputs(results))
+    convert_time = time.perf_counter() - started
+    started = time.perf_counter()
+    carbon.estimate_batch(inputs)
+    batch_time = time.perf_counter() - started
+
+    print(f"{args.polygons} polygons")
+    print(f"  per-polygon estimate loop  {loop_time * 1000:9.1f} ms")
+    print(f"  dicts -> DataFrame         {convert_time * 1000:9.1f} ms")
+    print(f"  estimate_batch             {batch_time * 1000:9.1f} ms")
+
+
+if __name__ == '__main__':
+    main()
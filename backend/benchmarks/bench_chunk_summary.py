@@ -0,0 +1,83 @@
+# backend/benchmarks/bench_chunk_summary.py
+"""
+Chunk-summary fast path versus brute-force masking and counting.
+
+Ingests a synthetic LGRIP30-like tile (512 px COG + per-chunk summary
+index), then for polygons of growing size times
+read_polygon_window + class_areas against read_polygon_window_summarized.
+The polygons are irregular, so edge chunks are rasterized on their own.
+Parity of the two paths is covered by tests/test_chunk_summary.py.
+
+Run from backend/:
+    PYTHONPATH=. python benchmarks/bench_chunk_summary.py --size 8000
+"""
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import rasterio
+from rasterio.transform import from_origin
+from shapely.geometry import Polygon
+
+from app.services.raster_analysis import class_areas, read_polygon_window, read_polygon_window_summarized
+from app.services.tile_ingest import ingest_tile, load_chunk_index
+
+RES = 1 / 3600
+
+
+def make_tile(path: Path, size: int):
+    rng = np.random.default_rng(0)
+    # Blocky classes, like real land cover, with a nodata strip
+    coarse = rng.integers(0, 4, size=(size // 50 + 1, size // 50 + 1), dtype=np.uint8)
+    data = np.kron(coarse, np.ones((50, 50), dtype=np.uint8))[:size, :size]
+    data[:, :size // 20] = 255
+    with rasterio.open(
+        path, 'w', driver='GTiff', width=size, height=size, count=1, dtype='uint8',
+        crs='EPSG:4326', transform=from_origin(30.0, 10.0, RES, RES), nodata=255
+    ) as dst:
+        dst.write(data, 1)
+
+
+def star(cx, cy, radius, points=40):
+    angles = np.linspace(0, 2 * np.pi, points, endpoint=False)
+    radii = radius * (0.8 + 0.2 * np.cos(5 * angles))
+    return Polygon(zip(cx + radii * np.cos(angles), cy + radii * np.sin(angles)))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--size', type=int, default=8000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        raw = Path(tmp) / 'LGRIP30_test.tif'
+        make_tile(raw, args.size)
+        start = time.perf_counter()
+        tile = ingest_tile(raw)
+        print(f"ingest: {time.perf_counter() - start:.1f}s")
+        index = load_chunk_index(tile)
+
+        extent = args.size * RES
+        for fraction in (0.05, 0.2, 0.45):
+            geom = star(30.0 + extent / 2, 10.0 - extent / 2, extent * fraction)
+
+            with rasterio.open(tile) as src:
+                start = time.perf_counter()
+                data, transform, _ = read_polygon_window(src, geom, nodata=src.nodata)
+                class_areas(data, transform)
+                brute = time.perf_counter() - start
+
+                start = time.perf_counter()
+                read_polygon_window_summarized(src, geom, index, nodata=src.nodata)
+                fast = time.perf_counter() - start
+
+            print(
+                f"polygon {data.shape[0]}x{data.shape[1]} px: brute {brute * 1000:.0f} ms, "
+                f"summarized {fast * 1000:.0f} ms"
+            )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,66 @@
+# backend/benchmarks/bench_class_histogram.py
+"""
+Microbenchmarks for the LGRIP class histogram kernel.
+
+Compares the previous per-class np.sum comparisons and np.unique against
+class_histogram (with and without per-row latitude weights) on square
+uint8 rasters.
+
+Run from backend/:
+    PYTHONPATH=. python benchmarks/bench_class_histogram.py --sizes 1000 5000 20000
+"""
+import argparse
+import time
+
+import numpy as np
+
+from app.services.raster_analysis import class_histogram
+
+
+def per_class_sums(data, nodata=0):
+    return (
+        np.sum(data == nodata),
+        np.sum(data == 1),
+        np.sum(data == 2),
+        np.sum(data == 3),
+        np.sum(data != nodata)
+    )
+
+
+def unique_counts(data):
+    return np.unique(data[data != 0], return_counts=True)
+
+
+def best_of(fn, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 5000, 20000])
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    print(f"{'size':>7} {'np.sum x5':>10} {'np.unique':>10} {'bincount':>10} {'weighted':>10}")
+    for size in args.sizes:
+        data = rng.integers(0, 4, size=(size, size), dtype=np.uint8)
+        weights = np.linspace(900.0, 700.0, size)
+
+        timings = [
+            best_of(lambda: per_class_sums(data), args.repeat),
+            best_of(lambda: unique_counts(data), args.repeat),
+            best_of(lambda: class_histogram(data), args.repeat),
+            best_of(lambda: class_histogram(data, weights), args.repeat),
+        ]
+        print(f"{size:>7} " + " ".join(f"{t:>10.4f}" for t in timings))
+        del data
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+# backend/benchmarks/bench_direct_download.py
+"""
+Direct getDownloadURL fast path against a local Earth Engine stand-in.
+
+A ThreadingHTTPServer plays the download endpoint and serves a rendered
+GeoTIFF; a fake image hands out its URL from getDownloadURL. Prints which
+AOI sizes take the direct path and times download_direct. The size limit
+and the fallback to exports are covered by tests/test_direct_download.py.
+
+Run from backend/:
+    PYTHONPATH=. python benchmarks/bench_direct_download.py
+"""
+import io
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import numpy as np
+import rasterio
+from rasterio.transform import from_origin
+
+from app.services import satellite
+
+
+def make_geotiff(size: int, count: int) -> bytes:
+    data = np.random.default_rng(0).integers(0, 255, size=(count, size, size), dtype=np.uint8)
+    buffer = io.BytesIO()
+    with rasterio.MemoryFile() as memfile:
+        with memfile.open(
+            driver='GTiff', width=size, height=size, count=count, dtype='uint8',
+            crs='EPSG:4326', transform=from_origin(30.0, 10.0, 1e-4, 1e-4)
+        ) as dst:
+            dst.write(data)
+        buffer.write(memfile.read())
+    return buffer.getvalue()
+
+
+class Handler(BaseHTTPRequestHandler):
+    payload = b''
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        body = Handler.payload
+        self.send_response(200)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class FakeImage:
+    def __init__(self, url):
+        self.url = url
+
+    def getDownloadURL(self, params):
+        return self.url
+
+
+def main():
+    print("AOI side (km)  bands  direct")
+    for side_km in (1, 5, 14, 20, 40):
+        degrees = side_km / 111.32
+        for bands in (3, 12):
+            fits = satellite.direct_download_fits((30.0, 0.0, 30.0 + degrees, degrees), bands)
+            print(f"{side_km:13d}  {bands:5d}  {fits}")
+
+    Handler.payload = make_geotiff(1000, 12)
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{server.server_address[1]}"
+
+    with tempfile.TemporaryDirectory() as tmp:
+        started = time.perf_counter()
+        path = satellite.download_direct(FakeImage(f"{base}/download"), None, 'direct.tif', output_dir=tmp)
+        elapsed = time.perf_counter() - started
+        print(f"direct download: {Path(path).stat().st_size / 1024 / 1024:.1f} MB in {elapsed * 1000:.0f} ms")
+
+    server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,107 @@
+# backend/benchmarks/bench_ee_poller.py
+"""
+Shared Earth Engine task poller against per-task status loops.
+
+Uses a local fake client (no credentials needed) whose tasks complete
+after a random delay and whose status calls cost a fixed round-trip.
+N concurrent waiters on one TaskPoller are compared with the old
+pattern of one ``while True: status(); sleep(5)`` loop per task:
+status requests issued and how late each waiter wakes after its task
+completes.
+
+Run from backend/:
+    PYTHONPATH=. python benchmarks/bench_ee_poller.py --tasks 40
+"""
+import argparse
+import asyncio
+import random
+import threading
+import time
+
+from app.services.ee_tasks import TaskPoller
+
+
+class FakeEEClient:
+    def __init__(self, latency: float):
+        self.latency = latency
+        self.done_at = {}
+        self.calls = 0
+        self.ids = 0
+        self._lock = threading.Lock()
+
+    def start(self, duration: float) -> str:
+        with self._lock:
+            self.ids += 1
+            task_id = f"TASK{self.ids}"
+            self.done_at[task_id] = time.monotonic() + duration
+        return task_id
+
+    def status(self, task_id: str) -> dict:
+        return self.statuses([task_id])[task_id]
+
+    def statuses(self, task_ids):
+        with self._lock:
+            self.calls += 1
+        time.sleep(self.latency)
+        now = time.monotonic()
+        return {
+            task_id: {'id': task_id, 'state': 'COMPLETED' if now >= self.done_at[task_id] else 'RUNNING'}
+            for task_id in task_ids
+        }
+
+
+async def run_poller(tasks: int, durations, latency: float):
+    client = FakeEEClient(latency)
+    poller = TaskPoller(client=client, min_interval=0.5, max_interval=5.0)
+    lateness = []
+
+    async def waiter(duration):
+        task_id = client.start(duration)
+        await poller.wait(task_id)
+        lateness.append(time.monotonic() - client.done_at[task_id])
+
+    started = time.monotonic()
+    await asyncio.gather(*(waiter(d) for d in durations))
+    poller.shutdown()
+    return client.calls, lateness, time.monotonic() - started
+
+
+async def run_loops(tasks: int, durations, latency: float, interval: float = 5.0):
+    client = FakeEEClient(latency)
+    lateness = []
+
+    async def waiter(duration):
+        task_id = client.start(duration)
+        while True:
+            # Blocking call on the event loop, as process_spectral_band did
+            if client.status(task_id)['state'] == 'COMPLETED':
+                break
+            await asyncio.sleep(interval)
+        lateness.append(time.monotonic() - client.done_at[task_id])
+
+    started = time.monotonic()
+    await asyncio.gather(*(waiter(d) for d in durations))
+    return client.calls, lateness, time.monotonic() - started
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--tasks', type=int, default=40)
+    parser.add_argument('--latency', type=float, default=0.05, help='seconds per status call')
+    parser.add_argument('--max-duration', type=float, default=10.0)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    durations = [rng.uniform(1.0, args.max_duration) for _ in range(args.tasks)]
+
+    for name, runner in (('per-task loops', run_loops), ('shared poller', run_poller)):
+        calls, lateness, elapsed = asyncio.run(runner(args.tasks, durations, args.latency))
+        lateness.sort()
+        print(
+            f"{name:15s} status calls {calls:5d}  wall {elapsed:6.1f}s  "
+            f"wake delay median {lateness[len(lateness) // 2]:.2f}s max {lateness[-1]:.2f}s"
+        )
+
+
+if __name__ == '__main__':
+    main()
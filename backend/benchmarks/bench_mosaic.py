@@ -0,0 +1,111 @@
+# backend/benchmarks/bench_mosaic.py
+"""
+In-memory mosaicking versus the temp-GeoTIFF round trip.
+
+Builds four masked tile windows meeting at a shared corner (as produced by
+a polygon straddling 10 degree tile edges) and times the previous path,
+which writes each window to an LZW GeoTIFF, reopens them and runs
+rasterio.merge, against mosaic_arrays + write_cog. Reports the bytes each
+path writes to disk and checks that both mosaics hold the same pixels.
+
+Run from backend/:
+    PYTHONPATH=. python benchmarks/bench_mosaic.py --size 4000
+"""
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import rasterio
+from rasterio.merge import merge
+from rasterio.transform import from_origin
+
+from app.services.mosaic import mosaic_arrays, write_cog
+
+RES = 1 / 3600
+
+
+def build_windows(size: int):
+    rng = np.random.default_rng(0)
+    windows = []
+    for row in range(2):
+        for col in range(2):
+            data = rng.integers(0, 4, size=(size, size), dtype=np.uint8)
+            # Mask a corner, as the polygon outline would
+            data[:size // 4, :size // 4] = 0
+            windows.append({
+                'data': data,
+                'transform': from_origin(col * size * RES, -row * size * RES, RES, RES),
+                'nodata': 0,
+                'crs': 'EPSG:4326'
+            })
+    return windows
+
+
+def temp_file_path(windows, out_dir: Path):
+    written = 0
+    sources = []
+    try:
+        for idx, dataset in enumerate(windows):
+            temp_path = out_dir / f"temp_{idx}.tif"
+            with rasterio.open(
+                temp_path, 'w', driver='GTiff', dtype=dataset['data'].dtype,
+                nodata=dataset['nodata'], width=dataset['data'].shape[1],
+                height=dataset['data'].shape[0], count=1, crs=dataset['crs'],
+                transform=dataset['transform'], compress='lzw'
+            ) as tmp:
+                tmp.write(dataset['data'], 1)
+            written += temp_path.stat().st_size
+            sources.append(rasterio.open(temp_path))
+
+        mosaic, transform = merge(sources, res=(RES, RES), method='first', nodata=0)
+        profile = sources[0].profile.copy()
+        profile.pop('blockxsize', None)
+        profile.pop('blockysize', None)
+        profile.update({
+            'height': mosaic.shape[1], 'width': mosaic.shape[2], 'transform': transform,
+            'compress': 'lzw', 'predictor': 2, 'tiled': True
+        })
+        out_path = out_dir / "merged_old.tif"
+        with rasterio.open(out_path, 'w', **profile) as dst:
+            dst.write(mosaic)
+        written += out_path.stat().st_size
+        return mosaic[0], written
+    finally:
+        for src in sources:
+            src.close()
+
+
+def in_memory_path(windows, out_dir: Path):
+    mosaic, transform = mosaic_arrays(windows)
+    out_path = out_dir / "merged_new.tif"
+    write_cog(out_path, mosaic, transform, windows[0]['crs'], windows[0]['nodata'])
+    return mosaic, out_path.stat().st_size
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--size', type=int, default=4000, help='Window width/height in pixels')
+    args = parser.parse_args()
+
+    windows = build_windows(args.size)
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+
+        start = time.perf_counter()
+        old, old_bytes = temp_file_path(windows, tmp)
+        old_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        new, new_bytes = in_memory_path(windows, tmp)
+        new_time = time.perf_counter() - start
+
+    print(f"{'path':>12} {'seconds':>9} {'MB written':>11}")
+    print(f"{'temp files':>12} {old_time:>9.3f} {old_bytes / 1e6:>11.1f}")
+    print(f"{'in memory':>12} {new_time:>9.3f} {new_bytes / 1e6:>11.1f}")
+    print(f"identical pixels: {'yes' if np.array_equal(old, new) else 'NO'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+# backend/benchmarks/bench_ndvi_stats.py
+"""
+Zonal NDVI statistics on a synthetic Sentinel-2 raster, with latency targets.
+
+Writes a 10 m UTM GeoTIFF with B4, B8 and SCL bands (cloud patches
+included), then times zonal_ndvi for irregular lon/lat polygons of
+growing area. Fails if a polygon misses its latency target. The
+statistics themselves are covered by tests/test_ndvi_stats.py.
+
+Run from backend/:
+    PYTHONPATH=. python benchmarks/bench_ndvi_stats.py --size 16000
+"""
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import rasterio
+from rasterio.transform import from_origin
+from rasterio.warp import transform_geom
+from shapely.geometry import Polygon, mapping, shape
+
+from app.services.ndvi_stats import zonal_ndvi
+
+# Polygon area (km²) -> latency target (s)
+TARGETS = {1: 0.1, 10: 0.25, 50: 0.75, 200: 2.0}
+
+CRS = 'EPSG:32636'
+ORIGIN = (500000.0, 100000.0)
+
+
+def make_raster(path: Path, size: int):
+    rng = np.random.default_rng(0)
+    blocks = size // 50 + 1
+    red = np.kron(rng.integers(300, 2000, (blocks, blocks)), np.ones((50, 50)))[:size, :size].astype(np.uint16)
+    nir = np.kron(rng.integers(1500, 5000, (blocks, blocks)), np.ones((50, 50)))[:size, :size].astype(np.uint16)
+    scl = np.full((size, size), 4, dtype=np.uint16)
+    for _ in range(40):
+        r, c = rng.integers(0, size - 400, 2)
+        scl[r:r + 400, c:c + 400] = rng.choice([3, 8, 9, 0])
+    # Keep the middle clear so the smallest polygon has pixels to count
+    mid = size // 2
+    scl[mid - 150:mid + 150, mid - 150:mid + 150] = 4
+    with rasterio.open(
+        path, 'w', driver='GTiff', width=size, height=size, count=3, dtype='uint16', crs=CRS,
+        transform=from_origin(ORIGIN[0], ORIGIN[1] + size * 10, 10, 10), tiled=True, compress='deflate'
+    ) as dst:
+        dst.write(np.stack([red, nir, scl]))
+        for i, band in enumerate(('B4', 'B8', 'SCL'), start=1):
+            dst.set_band_description(i, band)
+
+
+def polygon_lonlat(size: int, area_km2: float) -> Polygon:
+    """Irregular polygon of roughly ``area_km2`` in the middle of the raster"""
+    radius = np.sqrt(area_km2 * 1e6 / np.pi)
+    angles = np.linspace(0, 2 * np.pi, 60, endpoint=False)
+    wobble = 1 + 0.15 * np.sin(5 * angles)
+    cx, cy = ORIGIN[0] + size * 5, ORIGIN[1] + size * 5
+    utm = Polygon(zip(cx + radius * wobble * np.cos(angles), cy + radius * wobble * np.sin(angles)))
+    return shape(transform_geom(CRS, 'EPSG:4326', mapping(utm)))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--size', type=int, default=16000)
+    args = parser.parse_args()
+
+    ok = True
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / 'sentinel.tif'
+        make_raster(path, args.size)
+        sources = [(path, {'B4': 1, 'B8': 2, 'SCL': 3}, None)]
+
+        for area, target in TARGETS.items():
+            geom = polygon_lonlat(args.size, area)
+            zonal_ndvi(geom, sources)  # warm the GDAL block cache the same way for every size
+            started = time.perf_counter()
+            stats = zonal_ndvi(geom, sources)
+            elapsed = time.perf_counter() - started
+
+            fast = elapsed <= target
+            ok &= fast
+            print(
+                f"{area:4d} km²  {stats['pixel_count']:9d} px  {elapsed * 1000:7.1f} ms "
+                f"(target {target * 1000:.0f} ms) {'PASS' if fast else 'FAIL'}  "
+                f"ndvi mean {stats['mean']:.4f} valid {stats['valid_pixel_fraction']:.3f} "
+                f"cloud {stats['cloud_fraction']:.3f}"
+            )
+
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,88 @@
+# backend/benchmarks/bench_parallel_tiles.py
+"""
+Wall time of per-tile processing versus worker count.
+
+Writes four synthetic LGRIP30-like tiles in a 2x2 block and times the
+analysis of a polygon straddling the shared corner. That every worker
+count gives the sequential path's outcomes is covered by
+tests/test_tile_pool.py.
+
+Run from backend/:
+    PYTHONPATH=. python benchmarks/bench_parallel_tiles.py --size 6000
+"""
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import rasterio
+from rasterio.transform import from_origin
+from shapely.geometry import Point
+
+from app.core.config import settings
+from app.services.tile_pool import RES, process_tiles, shutdown_pool
+
+
+def build_tiles(tmp: Path, size: int):
+    """Four adjacent tiles, each ``size`` pixels square, meeting at (0, 0)"""
+    span = size * RES
+    tiles = []
+    rng = np.random.default_rng(0)
+    for row, miny in enumerate((0.0, -span)):
+        for col, minx in enumerate((-span, 0.0)):
+            tile_id = f"T{row}{col}"
+            path = tmp / f"{tile_id}.tif"
+            profile = {
+                'driver': 'GTiff',
+                'dtype': 'uint8',
+                'nodata': 0,
+                'width': size,
+                'height': size,
+                'count': 1,
+                'crs': 'EPSG:4326',
+                'transform': from_origin(minx, miny + span, RES, RES),
+                'tiled': True,
+                'blockxsize': 512,
+                'blockysize': 512,
+                'compress': 'deflate'
+            }
+            with rasterio.open(path, 'w', **profile) as dst:
+                dst.write(rng.integers(0, 4, size=(size, size), dtype=np.uint8), 1)
+            bounds = {'minx': minx, 'miny': miny, 'maxx': minx + span, 'maxy': miny + span}
+            tiles.append((tile_id, str(path), {'bounds': bounds}))
+    return tiles
+
+
+def run(tiles, geom, workers):
+    start = time.perf_counter()
+    outcomes = process_tiles(tiles, geom, max_workers=workers)
+    return time.perf_counter() - start, outcomes
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--size', type=int, default=6000, help='Tile width/height in pixels')
+    args = parser.parse_args()
+
+    # Size the shared pool for the largest worker count measured
+    settings.TILE_WORKERS = 4
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tiles = build_tiles(Path(tmp), args.size)
+        geom = Point(0, 0).buffer(args.size * RES * 0.9)
+
+        # Warm the pool so process start-up isn't counted
+        run(tiles, geom, 4)
+
+        baseline_time, _ = run(tiles, geom, 1)
+        print(f"{'workers':>8} {'seconds':>9} {'speedup':>8}")
+        print(f"{1:>8} {baseline_time:>9.3f} {1.0:>8.2f}")
+        for workers in (2, 4):
+            elapsed, _ = run(tiles, geom, workers)
+            print(f"{workers:>8} {elapsed:>9.3f} {baseline_time / elapsed:>8.2f}")
+    shutdown_pool()
+
+
+if __name__ == "__main__":
+    main()
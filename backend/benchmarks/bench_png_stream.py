@@ -0,0 +1,96 @@
+# backend/benchmarks/bench_png_stream.py
+"""
+Streaming GeoTIFF -> PNG conversion against the old whole-array one.
+
+Writes a synthetic uint16 reflectance GeoTIFF and an 8-bit visualized
+one, converts each with the previous approach (src.read() of every band,
+global min/max normalization, PIL) and with geotiff_to_png, and reports
+time and peak traced memory. Checks the streamed PNG decodes, that byte
+data passes through unchanged, and that the stacked split matches its
+source bands.
+
+Run from backend/:
+    PYTHONPATH=. python benchmarks/bench_png_stream.py --size 6000
+"""
+import argparse
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+import numpy as np
+import rasterio
+from PIL import Image
+from rasterio.plot import reshape_as_image
+from rasterio.transform import from_origin
+
+from app.services.png_stream import geotiff_to_png
+from app.services.satellite import split_visualizations
+
+Image.MAX_IMAGE_PIXELS = None
+
+
+def write_tif(path: Path, data: np.ndarray):
+    count, height, width = data.shape
+    with rasterio.open(
+        path, 'w', driver='GTiff', width=width, height=height, count=count, dtype=data.dtype,
+        crs='EPSG:4326', transform=from_origin(30.0, 10.0, 1e-4, 1e-4), tiled=True, compress='deflate'
+    ) as dst:
+        dst.write(data)
+
+
+def old_convert(tif_path, png_path):
+    with rasterio.open(tif_path) as src:
+        image_array = reshape_as_image(src.read())
+        image_array = ((image_array - image_array.min()) * (255.0 / (image_array.max() - image_array.min()))).astype(np.uint8)
+        Image.fromarray(image_array).save(png_path)
+
+
+def measure(fn, *args):
+    tracemalloc.start()
+    started = time.perf_counter()
+    fn(*args)
+    elapsed = time.perf_counter() - started
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return elapsed, peak
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--size', type=int, default=6000)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    coarse = rng.integers(0, 3000, size=(3, args.size // 40 + 1, args.size // 40 + 1), dtype=np.uint16)
+    reflectance = np.kron(coarse, np.ones((1, 40, 40), dtype=np.uint16))[:, :args.size, :args.size]
+    visualized = (reflectance // 12).astype(np.uint8)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        write_tif(tmp / 'reflectance.tif', reflectance)
+        write_tif(tmp / 'visualized.tif', visualized)
+
+        for name in ('reflectance', 'visualized'):
+            tif = tmp / f'{name}.tif'
+            old_t, old_peak = measure(old_convert, tif, tmp / f'{name}_old.png')
+            new_t, new_peak = measure(geotiff_to_png, tif, tmp / f'{name}_new.png')
+            print(
+                f"{name:12s} old {old_t:6.2f}s {old_peak / 1024 ** 2:7.1f} MB peak   "
+                f"streamed {new_t:6.2f}s {new_peak / 1024 ** 2:7.1f} MB peak"
+            )
+
+        decoded = np.asarray(Image.open(tmp / 'visualized_new.png'))
+        assert decoded.shape == (args.size, args.size, 3)
+        assert (decoded == reshape_as_image(visualized)).all()
+        print("byte data passes through unchanged")
+
+        stacked = np.concatenate([visualized, visualized[::-1]])
+        write_tif(tmp / 'sentinel_combined_x.tif', stacked)
+        paths = split_visualizations(tmp / 'sentinel_combined_x.tif', ['TrueColor', 'NDWI'], tmp)
+        assert (np.asarray(Image.open(paths[1])) == reshape_as_image(visualized[::-1])).all()
+        print("stacked split matches source bands")
+
+
+if __name__ == '__main__':
+    main()
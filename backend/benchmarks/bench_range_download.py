@@ -0,0 +1,121 @@
+# backend/benchmarks/bench_range_download.py
+"""
+RangeDownloader against a local HTTP stand-in that injects failures.
+
+Serves a random file with Range support from a ThreadingHTTPServer that
+can cut a share of responses off half way, and times the download with
+and without dropped responses. Retries, resuming from the .part file and
+discarding a stale one are covered by tests/test_range_download.py.
+
+Run from backend/:
+    PYTHONPATH=. python benchmarks/bench_range_download.py --size-mb 64
+"""
+import argparse
+import os
+import random
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import requests
+
+from app.services.range_download import RangeDownloader
+
+
+class StandIn:
+    payload = b''
+    etag = '"v1"'
+    failure_rate = 0.0
+    bytes_served = 0
+    lock = threading.Lock()
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, *args):
+        pass
+
+    def _headers(self, status, length, extra=None):
+        self.send_response(status)
+        self.send_header('Content-Length', str(length))
+        self.send_header('Accept-Ranges', 'bytes')
+        self.send_header('ETag', StandIn.etag)
+        for key, value in (extra or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+
+    def do_HEAD(self):
+        self._headers(200, len(StandIn.payload))
+
+    def do_GET(self):
+        payload = StandIn.payload
+        start, end = 0, len(payload) - 1
+        status = 200
+        extra = {}
+        if 'Range' in self.headers:
+            spec = self.headers['Range'].split('=', 1)[1]
+            first, last = spec.split('-')
+            start, end = int(first), min(int(last), len(payload) - 1)
+            status = 206
+            extra['Content-Range'] = f"bytes {start}-{end}/{len(payload)}"
+        body = payload[start:end + 1]
+        self._headers(status, len(body), extra)
+
+        if random.random() < StandIn.failure_rate:
+            # Send half, then drop the connection
+            body = body[:len(body) // 2]
+            self.wfile.write(body)
+            self.close_connection = True
+        else:
+            self.wfile.write(body)
+        with StandIn.lock:
+            StandIn.bytes_served += len(body)
+
+
+class Server(ThreadingHTTPServer):
+    def handle_error(self, request, client_address):
+        # Clients abandoning a dropped response reset the socket
+        pass
+
+
+def serve():
+    server = Server(('127.0.0.1', 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}/tile.tif"
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--size-mb', type=int, default=64)
+    parser.add_argument('--connections', type=int, default=4)
+    args = parser.parse_args()
+
+    random.seed(0)
+    StandIn.payload = os.urandom(args.size_mb * 1024 * 1024)
+    server, url = serve()
+    segment = 4 * 1024 * 1024
+
+    with tempfile.TemporaryDirectory() as tmp:
+        dest = Path(tmp) / 'tile.tif'
+        for failure_rate in (0.0, 0.3):
+            StandIn.failure_rate = failure_rate
+            downloader = RangeDownloader(
+                requests.Session(), segment_size=segment, connections=args.connections, max_retries=10
+            )
+            start = time.perf_counter()
+            downloader.download(url, dest)
+            elapsed = time.perf_counter() - start
+            print(
+                f"{args.size_mb} MB with {failure_rate:.0%} dropped responses: {elapsed:.2f}s "
+                f"({args.size_mb / elapsed:.0f} MB/s)"
+            )
+            dest.unlink()
+
+    server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
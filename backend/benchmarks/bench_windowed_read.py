@@ -0,0 +1,93 @@
+# backend/benchmarks/bench_windowed_read.py
+"""
+Compare rasterio.mask.mask against the windowed read used by analyze_polygon.
+
+Builds a synthetic LGRIP30-like tile (uint8 classes 0-3, 512 px internal
+blocks, 30 m pixels) and reports wall time and peak NumPy allocation for
+square polygons of increasing size.
+
+Run from backend/:
+    PYTHONPATH=. python benchmarks/bench_windowed_read.py --size 12000
+"""
+import argparse
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+import numpy as np
+import rasterio
+from rasterio.mask import mask
+from rasterio.transform import from_origin
+from shapely.geometry import box, mapping
+
+from app.services.raster_analysis import read_polygon_window
+
+RES = 0.000277778
+
+
+def build_tile(path: Path, size: int):
+    """Write a synthetic single-band tile in 512-row strips"""
+    profile = {
+        'driver': 'GTiff',
+        'dtype': 'uint8',
+        'nodata': 0,
+        'width': size,
+        'height': size,
+        'count': 1,
+        'crs': 'EPSG:4326',
+        'transform': from_origin(30.0, 10.0, RES, RES),
+        'tiled': True,
+        'blockxsize': 512,
+        'blockysize': 512,
+        'compress': 'deflate'
+    }
+    rng = np.random.default_rng(0)
+    with rasterio.open(path, 'w', **profile) as dst:
+        for row in range(0, size, 512):
+            height = min(512, size - row)
+            strip = rng.integers(0, 4, size=(height, size), dtype=np.uint8)
+            dst.write(strip, 1, window=rasterio.windows.Window(0, row, size, height))
+
+
+def measure(fn):
+    tracemalloc.start()
+    start = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--size', type=int, default=12000, help='Tile width/height in pixels')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tile_path = Path(tmp) / 'tile.tif'
+        build_tile(tile_path, args.size)
+
+        print(f"{'polygon px':>12} {'mask s':>9} {'mask MB':>9} {'window s':>9} {'window MB':>10}")
+        with rasterio.open(tile_path) as src:
+            left, bottom = src.bounds.left, src.bounds.bottom
+            for side_px in (100, 500, 2000, args.size // 2):
+                side = side_px * RES
+                x0, y0 = left + side / 4, bottom + side / 4
+                geom = box(x0, y0, x0 + side, y0 + side).buffer(-side / 10)
+
+                mask_time, mask_peak = measure(
+                    lambda: mask(src, [mapping(geom)], crop=True, all_touched=True, nodata=0)
+                )
+                window_time, window_peak = measure(
+                    lambda: read_polygon_window(src, geom, nodata=0)
+                )
+                print(
+                    f"{side_px:>12} {mask_time:>9.3f} {mask_peak / 1e6:>9.1f} "
+                    f"{window_time:>9.3f} {window_peak / 1e6:>10.1f}"
+                )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,6 @@
+# backend/tests/conftest.py
+import sys
+from pathlib import Path
+
+# Tests import the app as ``app.*``, as the API does when run from backend/
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
@@ -0,0 +1,110 @@
+# backend/tests/test_carbon.py
+import asyncio
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.services import carbon
+from app.services.carbon import CarbonEstimationService, batch_inputs, estimate_batch
+
+
+def sentinel_results(polygons, seed=0):
+    rng = np.random.default_rng(seed)
+    return [
+        {
+            "area_km2": float(area),
+            "timestamp": "2024-06-01T00:00:00Z",
+            "data": {"ndvi_mean": float(ndvi), "cloud_cover": 0.0, "ndvi": {"std": 0.1}}
+        }
+        for area, ndvi in zip(rng.uniform(0.01, 5, polygons), rng.uniform(0, 0.9, polygons))
+    ]
+
+
+@pytest.fixture
+def fixed_margin(monkeypatch):
+    monkeypatch.setattr(carbon.settings, 'CARBON_MC_ESTIMATE', False)
+
+
+def test_batch_matches_per_polygon_estimate(fixed_margin):
+    results = sentinel_results(200)
+
+    async def loop():
+        return [await carbon.estimate(None, r) for r in results]
+
+    singles = asyncio.run(loop())
+    batch = estimate_batch(pd.DataFrame(batch_inputs(results)))
+
+    assert np.array_equal([s["estimates"]["total_carbon_tons"] for s in singles], batch["total_carbon_tons"])
+    assert np.array_equal([s["estimates"]["confidence_interval"]["low"] for s in singles], batch["ci_low"])
+    assert np.array_equal([s["estimates"]["confidence_interval"]["high"] for s in singles], batch["ci_high"])
+    for pool in carbon.POOL_SHARES:
+        assert np.array_equal([s["breakdown"][pool] for s in singles], batch[pool])
+
+
+def test_estimate_shape(fixed_margin):
+    result = asyncio.run(carbon.estimate(None, sentinel_results(1)[0]))
+
+    assert result["status"] == "success"
+    assert result["timestamp"] == "2024-06-01T00:00:00Z"
+    assert result["source"] == carbon.MODEL_SOURCE
+    assert set(result["breakdown"]) == set(carbon.POOL_SHARES)
+    assert all(isinstance(v, float) for v in result["breakdown"].values())
+
+
+def test_total_is_density_per_ndvi_times_area():
+    inputs = {"area_km2": np.array([1.0, 2.5, 0.0]), "ndvi_mean": np.array([0.5, 0.2, 0.7])}
+    result = estimate_batch(inputs)
+
+    assert np.allclose(result["total_carbon_tons"], [75.0, 75.0, 0.0], rtol=1e-12)
+    assert np.allclose(result["carbon_density_tons_per_km2"], [75.0, 30.0, 105.0], rtol=1e-12)
+    assert np.allclose(result["ci_low"], result["total_carbon_tons"] * 0.9)
+    assert np.allclose(result["ci_high"], result["total_carbon_tons"] * 1.1)
+    assert np.allclose(result["soil"], result["total_carbon_tons"] * 0.1)
+
+
+def test_missing_values_count_as_zero():
+    inputs = batch_inputs([{"area_km2": None, "data": {"ndvi_mean": 0.5}}, {"area_km2": 2.0, "data": {}}])
+    result = estimate_batch(inputs)
+
+    assert np.isnan(inputs["ndvi_std"]).all()
+    assert np.array_equal(result["total_carbon_tons"], [0.0, 0.0])
+
+
+def test_dataframe_in_dataframe_out():
+    inputs = {"area_km2": np.array([1.0, 2.0]), "ndvi_mean": np.array([0.4, 0.6])}
+    frame = pd.DataFrame(inputs, index=["a", "b"])
+
+    as_dict = estimate_batch(inputs)
+    as_frame = estimate_batch(frame)
+
+    assert isinstance(as_dict, dict)
+    assert isinstance(as_frame, pd.DataFrame)
+    assert list(as_frame.index) == ["a", "b"]
+    for column, values in as_dict.items():
+        assert np.array_equal(as_frame[column].to_numpy(), values)
+
+
+def test_class_factors_weight_the_area():
+    inputs = {"area_km2": np.array([3.0, 2.0]), "ndvi_mean": np.array([0.5, 0.5])}
+    class_areas = np.array([[1.0, 2.0], [2.0, 0.0]])
+    result = estimate_batch(inputs, class_areas_km2=class_areas, class_factors=np.array([1.0, 0.5]))
+
+    # (1 * 1 + 2 * 0.5) km² and 2 km² effective at 75 t/km²
+    assert np.allclose(result["total_carbon_tons"], [150.0, 150.0])
+    assert np.allclose(result["carbon_density_tons_per_km2"], [50.0, 75.0])
+
+    unweighted = estimate_batch(inputs, class_areas_km2=class_areas)
+    assert np.allclose(unweighted["total_carbon_tons"], [225.0, 150.0])
+
+
+def test_service_soc_and_portfolio():
+    results = sentinel_results(5)
+    service = CarbonEstimationService()
+
+    portfolio = service.estimate_portfolio(results)
+    assert isinstance(portfolio, pd.DataFrame)
+    assert len(portfolio) == 5
+    assert service.estimate_soc(None, results[2]) == pytest.approx(portfolio["soil"].iloc[2], rel=1e-12)
+    expected = results[2]["area_km2"] * 150 * results[2]["data"]["ndvi_mean"] * 0.1
+    assert service.estimate_soc(None, results[2]) == pytest.approx(expected, rel=1e-12)
@@ -0,0 +1,174 @@
+# backend/tests/test_carbon_uncertainty.py
+import asyncio
+
+import numpy as np
+import pytest
+
+from app.services import carbon, carbon_uncertainty
+from app.services.carbon import DENSITY_PER_NDVI, POOL_SHARES, CarbonEstimationService
+from app.services.carbon_uncertainty import (
+    DEFAULT_MODEL, PERCENTILES, POOLS, coefficient_draws, column_name, monte_carlo, polygon_rng
+)
+
+SHARES = list(POOL_SHARES.values())
+DRAWS = 4000
+
+
+def portfolio(polygons, seed=0):
+    rng = np.random.default_rng(seed)
+    return {
+        "area_km2": rng.uniform(0.01, 5, polygons),
+        "ndvi_mean": rng.uniform(0, 0.9, polygons),
+        "ndvi_std": np.where(rng.random(polygons) < 0.1, np.nan, rng.uniform(0.02, 0.2, polygons))
+    }
+
+
+def direct(inputs, draws, seed):
+    """Every polygon's draws in one array, straight from the model"""
+    model = DEFAULT_MODEL
+    density, shares = coefficient_draws(draws, seed, DENSITY_PER_NDVI, SHARES, model)
+    noise = np.stack([polygon_rng(seed, i).standard_normal((2, draws)) for i in range(len(inputs["area_km2"]))])
+    sigma = np.sqrt(model.ndvi_error ** 2 + (model.ndvi_seasonal * np.nan_to_num(inputs["ndvi_std"])) ** 2)
+    ndvi = np.clip(inputs["ndvi_mean"][:, None] + sigma[:, None] * noise[:, 0], -1, 1)
+    area = inputs["area_km2"][:, None] * np.maximum(1 + model.area_error * noise[:, 1], 0)
+    total = area * ndvi * density
+    pools = [total] + [total * shares[:, j] for j in range(len(SHARES))]
+    columns = {}
+    for name, values in zip(POOLS, pools):
+        columns[f"{name}_mean"] = values.mean(axis=1)
+        for q in PERCENTILES:
+            columns[column_name(name, q)] = np.percentile(values, q, axis=1)
+    return columns, [values.sum(axis=0) for values in pools]
+
+
+@pytest.fixture(scope='module')
+def small():
+    inputs = portfolio(60)
+    return inputs, direct(inputs, DRAWS, seed=7)
+
+
+def assert_matches(result, expected, sums):
+    for column, values in expected.items():
+        assert np.array_equal(result["polygons"][column], values), column
+    for j, name in enumerate(POOLS):
+        assert result["portfolio"][name]["mean"] == pytest.approx(sums[j].mean(), rel=1e-9)
+        for q in PERCENTILES:
+            assert result["portfolio"][name]["percentiles"][f"{q:g}"] == pytest.approx(
+                np.percentile(sums[j], q), rel=1e-9
+            )
+
+
+@pytest.mark.parametrize('budget_mb', [1000, 1, 0.2], ids=['one-chunk', 'chunked', 'one-polygon-chunks'])
+def test_matches_direct_simulation_for_any_chunk_size(small, budget_mb):
+    inputs, (expected, sums) = small
+    result = monte_carlo(inputs, DENSITY_PER_NDVI, SHARES, draws=DRAWS, seed=7, memory_budget_mb=budget_mb)
+    assert_matches(result, expected, sums)
+
+
+def test_matches_direct_simulation_on_the_process_pool(small, monkeypatch):
+    inputs, (expected, sums) = small
+    carbon_uncertainty.shutdown_simulation_pool()
+    monkeypatch.setattr(carbon_uncertainty.settings, 'CARBON_MC_WORKERS', 2)
+    # The simulation pool is sized on its own, not by the raster tile pool's setting
+    monkeypatch.setattr(carbon_uncertainty.settings, 'TILE_WORKERS', 1)
+    try:
+        result = monte_carlo(inputs, DENSITY_PER_NDVI, SHARES, draws=DRAWS, seed=7, memory_budget_mb=1, workers=2)
+        assert carbon_uncertainty.simulation_pool_size() == 2
+    finally:
+        carbon_uncertainty.shutdown_simulation_pool()
+    assert_matches(result, expected, sums)
+
+
+def test_chunks_are_sized_by_the_pool_not_the_requested_workers(monkeypatch):
+    budgets = []
+    real_chunk_rows = carbon_uncertainty.chunk_rows
+
+    def spy(draws, classes, memory_budget_mb):
+        budgets.append(memory_budget_mb)
+        return real_chunk_rows(draws, classes, memory_budget_mb)
+
+    monkeypatch.setattr(carbon_uncertainty, 'chunk_rows', spy)
+    monkeypatch.setattr(carbon_uncertainty, 'simulation_pool_size', lambda: 1)
+    monte_carlo(portfolio(10), DENSITY_PER_NDVI, SHARES, draws=100, memory_budget_mb=64, workers=16)
+
+    # A one-process pool runs one chunk at a time, so it gets the whole budget
+    assert budgets == [64]
+
+
+def test_percentiles_are_ordered_and_bracket_the_mean():
+    result = monte_carlo(portfolio(40), DENSITY_PER_NDVI, SHARES, draws=DRAWS, seed=1)
+    polygons = result["polygons"]
+    for name in POOLS:
+        low, mid, high = (polygons[column_name(name, q)] for q in PERCENTILES)
+        assert np.all(low <= mid) and np.all(mid <= high)
+        assert np.all(low <= polygons[f"{name}_mean"]) and np.all(polygons[f"{name}_mean"] <= high)
+        total = result["portfolio"][name]
+        assert total["percentiles"]["2.5"] <= total["mean"] <= total["percentiles"]["97.5"]
+
+
+def test_portfolio_is_narrower_than_summed_polygon_intervals():
+    result = monte_carlo(portfolio(200), DENSITY_PER_NDVI, SHARES, draws=DRAWS, seed=3)
+    polygons = result["polygons"]
+    total = result["portfolio"]["total_carbon_tons"]
+
+    assert total["mean"] == pytest.approx(polygons["total_carbon_tons_mean"].sum(), rel=1e-9)
+    # Polygon errors partly cancel; the shared coefficients keep some spread
+    summed_width = (polygons["total_carbon_tons_p97.5"] - polygons["total_carbon_tons_p2.5"]).sum()
+    width = total["percentiles"]["97.5"] - total["percentiles"]["2.5"]
+    assert 0 < width < summed_width
+
+
+def test_same_seed_same_result_and_other_seed_differs():
+    inputs = portfolio(20)
+    first = monte_carlo(inputs, DENSITY_PER_NDVI, SHARES, draws=500, seed=5)
+    again = monte_carlo(inputs, DENSITY_PER_NDVI, SHARES, draws=500, seed=5)
+    other = monte_carlo(inputs, DENSITY_PER_NDVI, SHARES, draws=500, seed=6)
+
+    assert np.array_equal(first["polygons"]["soil_p50"], again["polygons"]["soil_p50"])
+    assert not np.array_equal(first["polygons"]["soil_p50"], other["polygons"]["soil_p50"])
+
+
+def sentinel_result():
+    return {
+        "area_km2": 2.0,
+        "timestamp": "2024-06-01T00:00:00Z",
+        "data": {"ndvi_mean": 0.5, "cloud_cover": 0.0, "ndvi": {"std": 0.1}}
+    }
+
+
+def test_estimate_keeps_the_fixed_margin_by_default(monkeypatch):
+    monkeypatch.setattr(carbon.settings, 'CARBON_MC_ESTIMATE', False)
+    interval = asyncio.run(carbon.estimate(None, sentinel_result()))["estimates"]["confidence_interval"]
+
+    assert interval == {"low": pytest.approx(135.0), "high": pytest.approx(165.0)}
+
+
+def test_estimate_opts_in_to_monte_carlo_bounds_off_the_event_loop(monkeypatch):
+    monkeypatch.setattr(carbon.settings, 'CARBON_MC_ESTIMATE', True)
+    monkeypatch.setattr(carbon.settings, 'CARBON_MC_DRAWS', 2000)
+    threads = []
+    real_to_thread = asyncio.to_thread
+
+    async def to_thread(func, *args, **kwargs):
+        threads.append(func)
+        return await real_to_thread(func, *args, **kwargs)
+
+    monkeypatch.setattr(carbon.asyncio, 'to_thread', to_thread)
+    result = asyncio.run(carbon.estimate(None, sentinel_result()))
+    interval = result["estimates"]["confidence_interval"]
+
+    assert threads == [carbon.estimate_batch]
+    assert result["estimates"]["total_carbon_tons"] == pytest.approx(150.0)
+    assert interval["low"] < 150.0 < interval["high"]
+    assert interval != {"low": pytest.approx(135.0), "high": pytest.approx(165.0)}
+
+
+def test_calculate_uncertainty_from_sentinel_results():
+    results = [sentinel_result(), dict(sentinel_result(), area_km2=1.0)]
+    uncertainty = CarbonEstimationService().calculate_uncertainty(results, draws=1000, seed=0, workers=1)
+
+    assert uncertainty["draws"] == 1000
+    assert list(uncertainty["polygons"].index) == [0, 1]
+    assert set(uncertainty["portfolio"]) == set(POOLS)
+    soil = uncertainty["polygons"]["soil_p50"]
+    assert soil[0] == pytest.approx(2 * soil[1], rel=0.1)
@@ -0,0 +1,70 @@
+# backend/tests/test_chunk_summary.py
+import numpy as np
+import pytest
+import rasterio
+from rasterio.transform import from_origin
+from shapely.geometry import Polygon, box
+
+from app.services import tile_ingest
+from app.services.raster_analysis import class_areas, read_polygon_window, read_polygon_window_summarized
+from app.services.tile_store import TileStore
+
+RES = 1 / 3600
+SIZE = 1800  # 4 x 4 chunks of 512 px, the last ones partial
+
+
+@pytest.fixture(scope='module')
+def tile(tmp_path_factory):
+    tmp = tmp_path_factory.mktemp('tiles')
+    rng = np.random.default_rng(0)
+    coarse = rng.integers(0, 4, size=(SIZE // 30 + 1, SIZE // 30 + 1), dtype=np.uint8)
+    data = np.kron(coarse, np.ones((30, 30), dtype=np.uint8))[:SIZE, :SIZE]
+    data[:, :SIZE // 20] = 255
+    raw = tmp / 'LGRIP30_test.tif'
+    with rasterio.open(
+        raw, 'w', driver='GTiff', width=SIZE, height=SIZE, count=1, dtype='uint8',
+        crs='EPSG:4326', transform=from_origin(30.0, 10.0, RES, RES), nodata=255
+    ) as dst:
+        dst.write(data, 1)
+
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setattr(tile_ingest, 'tile_store', TileStore(tmp, max_bytes=1 << 40))
+        path = tile_ingest.ingest_tile(raw)
+    return path, tile_ingest.load_chunk_index(path)
+
+
+def star(cx, cy, radius, points=40):
+    angles = np.linspace(0, 2 * np.pi, points, endpoint=False)
+    radii = radius * (0.8 + 0.2 * np.cos(5 * angles))
+    return Polygon(zip(cx + radii * np.cos(angles), cy + radii * np.sin(angles)))
+
+
+EXTENT = SIZE * RES
+CENTER = (30.0 + EXTENT / 2, 10.0 - EXTENT / 2)
+
+
+@pytest.mark.parametrize('geom', [
+    star(*CENTER, EXTENT * 0.05),                      # inside one chunk: edge chunks only
+    star(*CENTER, EXTENT * 0.45),                      # interior, edge and clear chunks
+    star(30.0, 10.0 - EXTENT / 2, EXTENT * 0.3),       # crosses the tile's west edge
+    box(29.9, 10.0 - EXTENT - 0.1, 30.1 + EXTENT, 10.1),  # covers the whole tile
+], ids=['small', 'large', 'tile-edge', 'whole-tile'])
+def test_matches_brute_force_masking_and_counting(tile, geom):
+    path, index = tile
+    with rasterio.open(path) as src:
+        data, transform, nodata = read_polygon_window(src, geom, nodata=src.nodata)
+        counts, areas = class_areas(data, transform)
+        fast_data, fast_transform, fast_nodata, fast_counts, fast_areas = read_polygon_window_summarized(
+            src, geom, index, nodata=src.nodata
+        )
+
+    assert fast_transform == transform and fast_nodata == nodata
+    assert np.array_equal(fast_data, data)
+    assert np.array_equal(fast_counts, counts[:256])
+    assert np.allclose(fast_areas, areas[:256], rtol=1e-9, atol=1e-3)
+
+
+def test_polygon_off_the_tile_returns_none(tile):
+    path, index = tile
+    with rasterio.open(path) as src:
+        assert read_polygon_window_summarized(src, box(40.0, 0.0, 40.1, 0.1), index) is None
@@ -0,0 +1,56 @@
+# backend/tests/test_class_histogram.py
+import numpy as np
+import pytest
+
+from app.services.raster_analysis import class_histogram
+
+
+def per_class_masks(data, classes):
+    """The per-class np.sum comparisons class_histogram replaced"""
+    return np.array([np.sum(data == c) for c in classes])
+
+
+@pytest.mark.parametrize('shape', [(1, 1), (7, 13), (257, 255), (300, 301)])
+@pytest.mark.parametrize('chunk_pixels', [64, 1 << 22])
+def test_counts_match_per_class_masks(shape, chunk_pixels):
+    rng = np.random.default_rng(0)
+    data = rng.choice(np.array([0, 1, 2, 3, 255], dtype=np.uint8), size=shape)
+
+    counts, areas = class_histogram(data, chunk_pixels=chunk_pixels)
+
+    assert areas is None
+    assert len(counts) == 256
+    assert counts.sum() == data.size
+    assert np.array_equal(counts[[0, 1, 2, 3, 255]], per_class_masks(data, [0, 1, 2, 3, 255]))
+
+
+@pytest.mark.parametrize('chunk_pixels', [50, 1 << 22])
+def test_weighted_areas_match_row_by_row_masks(chunk_pixels):
+    rng = np.random.default_rng(1)
+    data = rng.integers(0, 4, size=(120, 97), dtype=np.uint8)
+    weights = np.linspace(900.0, 700.0, data.shape[0])
+
+    counts, areas = class_histogram(data, weights, chunk_pixels=chunk_pixels)
+
+    expected = sum(per_class_masks(row, range(4)) * w for row, w in zip(data, weights))
+    assert np.array_equal(counts[:4], per_class_masks(data, range(4)))
+    assert np.allclose(areas[:4], expected, rtol=1e-12)
+    assert not areas[4:].any()
+
+
+def test_wider_integer_codes_get_enough_bins():
+    data = np.array([[0, 300], [300, 7]], dtype=np.uint16)
+    counts, _ = class_histogram(data)
+    assert len(counts) == 301
+    assert (counts[0], counts[7], counts[300]) == (1, 1, 2)
+
+
+@pytest.mark.parametrize('data, weights', [
+    (np.zeros((2, 2, 2), dtype=np.uint8), None),
+    (np.zeros((2, 2), dtype=np.float32), None),
+    (np.array([[-1, 0]], dtype=np.int16), None),
+    (np.zeros((3, 2), dtype=np.uint8), np.ones(2)),
+])
+def test_rejects_invalid_input(data, weights):
+    with pytest.raises(ValueError):
+        class_histogram(data, weights)
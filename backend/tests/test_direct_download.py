@@ -0,0 +1,165 @@
+# backend/tests/test_direct_download.py
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from app.services import satellite
+from app.services.ee_tasks import TaskPoller
+
+KM = 1 / 111.32  # degrees of latitude per km
+
+
+def square(side_km):
+    return (30.0, 0.0, 30.0 + side_km * KM, side_km * KM)
+
+
+@pytest.mark.parametrize('side_km, bands, fits', [
+    (1, 3, True),
+    (5, 12, True),
+    (20, 12, False),   # 2000 px square x 12 bands is over 32 MB
+    (30, 1, True),
+    (60, 1, False),    # 6000 px square is over 32 MB even for one band
+])
+def test_direct_download_fits_the_size_limit(side_km, bands, fits):
+    assert satellite.direct_download_fits(square(side_km), bands) is fits
+
+
+def test_direct_download_fits_the_side_limit(monkeypatch):
+    monkeypatch.setattr(satellite.settings, 'SATELLITE_DIRECT_MAX_MB', 10 ** 6)
+    assert satellite.direct_download_fits(square(99), 1)
+    # Past Earth Engine's 10000 px side limit at 10 m, whatever the byte budget
+    assert not satellite.direct_download_fits((30.0, 0.0, 30.0 + 101 * KM, 1 * KM), 1)
+
+
+class FakeImage:
+    def getDownloadURL(self, params):
+        assert params['format'] == 'GEO_TIFF'
+        return 'https://earthengine.example/download'
+
+
+class FakeSession:
+    def __init__(self, payload=b'', status=200):
+        self.payload = payload
+        self.status = status
+        self.urls = []
+
+    def get(self, url, stream, timeout):
+        self.urls.append(url)
+        session = self
+
+        class Response:
+            def __enter__(self):
+                return self
+
+            def __exit__(self, *exc):
+                return False
+
+            def raise_for_status(self):
+                if session.status >= 400:
+                    raise satellite.requests.HTTPError(f"{session.status}")
+
+            def iter_content(self, chunk_size):
+                for i in range(0, len(session.payload), chunk_size):
+                    yield session.payload[i:i + chunk_size]
+
+        return Response()
+
+
+def test_download_direct_writes_the_streamed_bytes(tmp_path):
+    payload = bytes(range(256)) * 10000
+    session = FakeSession(payload)
+    path = satellite.download_direct(FakeImage(), None, 'scene.tif', session=session, output_dir=tmp_path)
+    assert session.urls == ['https://earthengine.example/download']
+    assert (tmp_path / 'scene.tif').read_bytes() == payload
+    assert path == str(tmp_path / 'scene.tif')
+
+
+class FakeTaskClient:
+    def __init__(self, state='COMPLETED'):
+        self.state = state
+        self.polled = set()
+
+    def statuses(self, task_ids):
+        self.polled.update(task_ids)
+        return {task_id: {'id': task_id, 'state': self.state} for task_id in task_ids}
+
+
+@pytest.fixture
+def fake_export(monkeypatch, tmp_path):
+    """Mocked ee export, Drive download and task poller; records what ran"""
+    calls = SimpleNamespace(exports=[], cancelled=[], marks=[], direct=[])
+    exported = tmp_path / 'exported.tif'
+    exported.write_bytes(b'exported')
+
+    def to_drive(**kwargs):
+        task_id = f"TASK{len(calls.exports)}"
+        calls.exports.append(kwargs)
+        return SimpleNamespace(
+            id=task_id, operation_name=f"projects/p/operations/{task_id}",
+            start=lambda: None, cancel=lambda: calls.cancelled.append(task_id)
+        )
+
+    async def from_drive(file_name, folder_name):
+        return str(exported)
+
+    monkeypatch.setattr(
+        satellite, 'ee', SimpleNamespace(batch=SimpleNamespace(Export=SimpleNamespace(image=SimpleNamespace(toDrive=to_drive))))
+    )
+    monkeypatch.setattr(satellite, 'find_and_download_file', from_drive)
+    poller = TaskPoller(client=FakeTaskClient(), min_interval=0.01, max_interval=0.02)
+    monkeypatch.setattr(satellite, 'task_poller', lambda: poller)
+    calls.exported = str(exported)
+    calls.poller = poller
+    yield calls
+    poller.shutdown()
+
+
+def fetch(calls, bounds, band_count=3):
+    return asyncio.run(satellite.fetch_geotiff(
+        FakeImage(), None, bounds, band_count, 'scene.tif', 'folder',
+        lambda status, error=None: calls.marks.append(status)
+    ))
+
+
+def test_small_aoi_is_fetched_directly(fake_export, monkeypatch):
+    monkeypatch.setattr(satellite, 'download_direct', lambda *args: fake_export.direct.append(args) or 'direct.tif')
+    assert fetch(fake_export, square(2)) == 'direct.tif'
+    assert len(fake_export.direct) == 1 and fake_export.exports == []
+    assert fake_export.marks == ['completed']
+
+
+def test_rejected_direct_download_falls_back_to_one_export(fake_export, monkeypatch):
+    def rejected(*args):
+        fake_export.direct.append(args)
+        raise satellite.requests.HTTPError('400 Total request size must be less than or equal to 33554432 bytes')
+
+    monkeypatch.setattr(satellite, 'download_direct', rejected)
+    assert fetch(fake_export, square(2)) == fake_export.exported
+    assert len(fake_export.direct) == 1 and len(fake_export.exports) == 1
+    assert fake_export.marks == ['completed']
+
+
+def test_large_aoi_goes_straight_to_export(fake_export, monkeypatch):
+    monkeypatch.setattr(satellite, 'download_direct', lambda *args: pytest.fail('direct download attempted'))
+    assert fetch(fake_export, square(60), band_count=12) == fake_export.exported
+    assert len(fake_export.exports) == 1
+    # Tasks are polled by operation name
+    assert fake_export.poller.client.polled == {'projects/p/operations/TASK0'}
+
+
+def test_failed_export_is_marked_failed(fake_export):
+    fake_export.poller.client.state = 'UNKNOWN'
+    assert fetch(fake_export, square(60), band_count=12) is None
+    assert fake_export.marks == ['failed']
+
+
+def test_export_that_never_finishes_is_cancelled(fake_export, monkeypatch):
+    class StuckPoller:
+        async def wait(self, task_id):
+            raise asyncio.TimeoutError
+
+    monkeypatch.setattr(satellite, 'task_poller', lambda: StuckPoller())
+    assert fetch(fake_export, square(60), band_count=12) is None
+    assert fake_export.cancelled == ['TASK0']
+    assert fake_export.marks == ['failed']
@@ -0,0 +1,34 @@
+# backend/tests/test_earthdata.py
+from types import SimpleNamespace
+
+import pytest
+import requests
+
+from app.services.earthdata import URS_HOST, EarthdataSession
+
+
+def redirected(source: str, target: str) -> requests.PreparedRequest:
+    """Apply the session's redirect auth handling to a hop from source to target"""
+    session = EarthdataSession()
+    session.trust_env = False
+    prepared = requests.Request('GET', target, headers={'Authorization': 'Basic c2VjcmV0'}).prepare()
+    session.rebuild_auth(prepared, SimpleNamespace(request=SimpleNamespace(url=source)))
+    return prepared
+
+
+@pytest.mark.parametrize('source, target', [
+    ('https://e4ftl01.cr.usgs.gov/tile.tif', f'https://{URS_HOST}/oauth/authorize'),
+    (f'https://{URS_HOST}/oauth/authorize', 'https://e4ftl01.cr.usgs.gov/tile.tif'),
+])
+def test_keeps_credentials_on_the_login_hops(source, target):
+    assert 'Authorization' in redirected(source, target).headers
+
+
+@pytest.mark.parametrize('source, target', [
+    (f'https://{URS_HOST}/oauth/authorize', 'https://attacker.example.com/'),
+    (f'https://{URS_HOST}/oauth/authorize', 'http://e4ftl01.cr.usgs.gov/tile.tif'),
+    ('https://e4ftl01.cr.usgs.gov/tile.tif', f'http://{URS_HOST}/oauth/authorize'),
+    ('https://e4ftl01.cr.usgs.gov/tile.tif', 'https://mirror.example.com/tile.tif'),
+])
+def test_strips_credentials_elsewhere(source, target):
+    assert 'Authorization' not in redirected(source, target).headers
@@ -0,0 +1,132 @@
+# backend/tests/test_ee_tasks.py
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from app.services import ee_tasks
+from app.services.ee_tasks import EarthEngineTaskClient, TaskPoller
+
+
+class FakeClient:
+    """Serves fixed states; ids not in ``states`` are missing from the listing"""
+
+    def __init__(self, states):
+        self.states = states
+        self.calls = []
+
+    def statuses(self, task_ids):
+        self.calls.append(list(task_ids))
+        return {i: {'id': i, 'state': self.states[i]} for i in task_ids if i in self.states}
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def make_poller(client, **kwargs):
+    return TaskPoller(client=client, min_interval=0.01, max_interval=0.02, **kwargs)
+
+
+def test_completed_tasks_resolve_from_one_call_per_poll():
+    client = FakeClient({'A': 'COMPLETED', 'B': 'FAILED'})
+    poller = make_poller(client)
+
+    async def both():
+        return await asyncio.gather(poller.wait('A', timeout=5), poller.wait('B', timeout=5))
+
+    try:
+        a, b = run(both())
+    finally:
+        poller.shutdown()
+    assert (a['state'], b['state']) == ('COMPLETED', 'FAILED')
+    assert all(len(call) <= 2 for call in client.calls)
+
+
+def test_unknown_state_is_terminal():
+    poller = make_poller(FakeClient({'A': 'UNKNOWN'}))
+    try:
+        status = run(poller.wait('A', timeout=5))
+    finally:
+        poller.shutdown()
+    assert status['state'] == 'UNKNOWN'
+
+
+def test_task_missing_from_listing_resolves_unknown():
+    client = FakeClient({})
+    poller = make_poller(client, missing_polls=3)
+    try:
+        status = run(poller.wait('LOST', timeout=5))
+    finally:
+        poller.shutdown()
+    assert status['state'] == 'UNKNOWN'
+    assert len(client.calls) == 3
+
+
+def test_wait_times_out_on_a_task_that_never_finishes():
+    poller = make_poller(FakeClient({'A': 'RUNNING'}))
+    try:
+        with pytest.raises(asyncio.TimeoutError):
+            run(poller.wait('A', timeout=0.1))
+    finally:
+        poller.shutdown()
+
+
+def operation(task_id, state, error=None):
+    operation = {
+        'name': f'projects/p/operations/{task_id}',
+        'done': state not in ('PENDING', 'RUNNING'),
+        'metadata': {'state': state, 'description': task_id}
+    }
+    if error:
+        operation['error'] = {'message': error}
+    return operation
+
+
+@pytest.fixture
+def operations(monkeypatch):
+    """Served by a stubbed ee.data.getOperation; names not in it fail as not found"""
+    import ee
+
+    served = {}
+    fetched = []
+
+    def get_operation(name):
+        fetched.append(name)
+        if name not in served:
+            raise ee.EEException(f"Operation {name} not found")
+        return served[name]
+
+    monkeypatch.setattr(ee.data, 'getOperation', get_operation)
+    monkeypatch.setattr(ee.data, 'listOperations', lambda *args: pytest.fail("listed every operation"))
+    monkeypatch.setattr('app.services.satellite.init_earth_engine', lambda: None)
+    return SimpleNamespace(served=served, fetched=fetched)
+
+
+def test_client_fetches_only_the_tracked_operations(operations):
+    for op in (operation('A', 'SUCCEEDED'), operation('B', 'RUNNING'), operation('C', 'FAILED', 'Quota exceeded')):
+        operations.served[op['name']] = op
+    a, b, c, lost = (f'projects/p/operations/{i}' for i in 'ABCZ')
+
+    statuses = EarthEngineTaskClient().statuses([a, b, c, lost])
+
+    assert operations.fetched == [a, b, c, lost]
+    assert set(statuses) == {a, b, c}
+    assert statuses[a]['state'] == 'COMPLETED' and statuses[a]['id'] == 'A'
+    assert statuses[b]['state'] == 'RUNNING'
+    assert statuses[c]['state'] == 'FAILED' and statuses[c]['error_message'] == 'Quota exceeded'
+
+
+def test_client_raises_when_no_operation_can_be_fetched(operations):
+    import ee
+
+    with pytest.raises(ee.EEException):
+        EarthEngineTaskClient().statuses(['projects/p/operations/Z'])
+
+
+def test_operation_states_map_to_task_states():
+    assert ee_tasks.operation_status(operation('A', 'PENDING'))['state'] == 'READY'
+    assert ee_tasks.operation_status(operation('A', 'CANCELLING'))['state'] == 'CANCEL_REQUESTED'
+    assert ee_tasks.operation_status(operation('A', 'CANCELLED'))['state'] == 'CANCELLED'
+    assert ee_tasks.operation_status(operation('A', 'SOMETHING_NEW'))['state'] == 'UNKNOWN'
+    assert 'UNKNOWN' in ee_tasks.TERMINAL_STATES
@@ -0,0 +1,119 @@
+# backend/tests/test_file_manager.py
+import asyncio
+import fcntl
+import threading
+import time
+
+import pytest
+
+from app.services import file_manager
+from app.services.file_manager import LGRIPFileManager
+from app.services.range_download import DownloadError
+
+FILENAME = "LGRIP30_2015_N00E30_001_2023014175240.tif"
+TILE = {'path': f"https://e4ftl01.cr.usgs.gov/DP109/COMMUNITY/LGRIP30.001/2014.01.01/{FILENAME}"}
+
+
+@pytest.fixture
+def manager(tmp_path, monkeypatch):
+    # Keep the .netrc the manager writes out of the real home directory
+    monkeypatch.setenv('HOME', str(tmp_path))
+    monkeypatch.setattr(file_manager.settings, 'LGRIP_TILE_DIR', tmp_path / 'tiles')
+    manager = LGRIPFileManager()
+    manager.session = object()
+    yield manager
+    assert file_manager._inflight == {}
+
+
+class FakeDownload:
+    """Stands in for _download_exclusive; blocks until released"""
+
+    def __init__(self, manager, error=None):
+        self.manager = manager
+        self.error = error
+        self.calls = 0
+        self.release = threading.Event()
+
+    def __call__(self, tile_info, local_path, progress_callback):
+        self.calls += 1
+        assert self.release.wait(5)
+        progress_callback(100)
+        if self.error is not None:
+            raise self.error
+        local_path.write_bytes(b'tile')
+        return str(local_path)
+
+
+async def download_together(manager, fake, callers):
+    progress = [[] for _ in range(callers)]
+    tasks = [asyncio.create_task(manager.download_file(TILE, progress[i].append)) for i in range(callers)]
+    # Release the download once every caller has joined it
+    while len(getattr(file_manager._inflight.get(FILENAME), 'callbacks', [])) < callers:
+        await asyncio.sleep(0.01)
+    flight = file_manager._inflight[FILENAME]
+    fake.release.set()
+    return await asyncio.gather(*tasks), progress, flight
+
+
+def test_concurrent_callers_share_one_download(manager, monkeypatch):
+    fake = FakeDownload(manager)
+    monkeypatch.setattr(manager, '_download_exclusive', fake)
+
+    results, progress, _ = asyncio.run(download_together(manager, fake, 4))
+
+    assert fake.calls == 1
+    assert results == [str(manager.local_dir / FILENAME)] * 4
+    assert progress == [[100]] * 4
+
+
+def test_failure_reaches_every_waiter_and_a_retry_downloads_again(manager, monkeypatch):
+    error = DownloadError("Checksum mismatch")
+    fake = FakeDownload(manager, error=error)
+    monkeypatch.setattr(manager, '_download_exclusive', fake)
+
+    results, _, flight = asyncio.run(download_together(manager, fake, 3))
+
+    assert fake.calls == 1
+    assert results == [None] * 3
+    assert flight.future.exception() is error
+    assert FILENAME not in file_manager._inflight
+
+    fake.error = None
+    assert asyncio.run(manager.download_file(TILE)) == str(manager.local_dir / FILENAME)
+    assert fake.calls == 2
+
+
+def test_missing_session_fails_every_waiter(manager, monkeypatch):
+    manager.session = None
+
+    async def no_session():
+        return None
+
+    monkeypatch.setattr(manager, 'get_session', no_session)
+    assert asyncio.run(manager.download_file(TILE)) is None
+
+
+def test_lock_file_serializes_processes(manager, monkeypatch):
+    local_path = manager.local_dir / FILENAME
+
+    class NoDownload:
+        def __init__(self, *args, **kwargs):
+            raise AssertionError("the tile was already downloaded by the lock holder")
+
+    monkeypatch.setattr(file_manager, 'RangeDownloader', NoDownload)
+
+    result = []
+    # flock locks conflict across open file descriptions, as between processes
+    with open(local_path.with_name(FILENAME + '.lock'), 'a') as held:
+        fcntl.flock(held, fcntl.LOCK_EX)
+        waiter = threading.Thread(target=lambda: result.append(manager._download_exclusive(TILE, local_path, None)))
+        waiter.start()
+        time.sleep(0.2)
+        assert waiter.is_alive() and result == []
+
+        # The other process finishes the tile, then releases the lock
+        local_path.write_bytes(b'tile')
+        fcntl.flock(held, fcntl.LOCK_UN)
+
+    waiter.join(5)
+    assert result == [str(local_path)]
@@ -0,0 +1,146 @@
+# backend/tests/test_ndvi_stats.py
+import asyncio
+
+import numpy as np
+import pytest
+import rasterio
+from geoalchemy2.shape import from_shape
+from rasterio.features import geometry_mask
+from rasterio.transform import from_origin
+from rasterio.warp import transform_geom
+from shapely.geometry import box, mapping, shape
+
+from app.services import sentinel
+from app.services.ndvi_stats import PERCENTILES, SCL_CLOUD, SCL_NO_DATA, summarize_ndvi, zonal_ndvi
+
+CRS = 'EPSG:32636'
+ORIGIN = (500000.0, 100000.0)
+SIZE = 200  # 2 km square at 10 m
+
+
+@pytest.fixture
+def raster(tmp_path):
+    """B4/B8/SCL raster with a cloud patch, an SCL no-data patch and zero (nodata) reflectance"""
+    rng = np.random.default_rng(0)
+    red = rng.integers(300, 2000, (SIZE, SIZE)).astype(np.uint16)
+    nir = rng.integers(1500, 5000, (SIZE, SIZE)).astype(np.uint16)
+    scl = np.full((SIZE, SIZE), 4, dtype=np.uint16)
+    scl[20:60, 20:60] = 9       # high cloud
+    scl[20:60, 140:180] = 3     # cloud shadow
+    scl[140:180, 20:60] = 1     # saturated / defective
+    red[140:180, 140:180] = 0   # nodata reflectance
+
+    path = tmp_path / 'sentinel.tif'
+    with rasterio.open(
+        path, 'w', driver='GTiff', width=SIZE, height=SIZE, count=3, dtype='uint16', crs=CRS,
+        transform=from_origin(ORIGIN[0], ORIGIN[1] + SIZE * 10, 10, 10)
+    ) as dst:
+        dst.write(np.stack([red, nir, scl]))
+        for i, band in enumerate(('B4', 'B8', 'SCL'), start=1):
+            dst.set_band_description(i, band)
+    return path
+
+
+def sources(path, timestamp='2024-06-01T08:00:00Z'):
+    return [(path, {'B4': 1, 'B8': 2, 'SCL': 3}, timestamp)]
+
+
+def lonlat(minx, miny, maxx, maxy):
+    """Lon/lat polygon of a UTM box given in metres from the raster's lower-left corner"""
+    utm = box(ORIGIN[0] + minx, ORIGIN[1] + miny, ORIGIN[0] + maxx, ORIGIN[1] + maxy)
+    return shape(transform_geom(CRS, 'EPSG:4326', mapping(utm)))
+
+
+def brute_force(path, geom):
+    with rasterio.open(path) as src:
+        red, nir, scl = src.read()
+        utm = transform_geom('EPSG:4326', src.crs, mapping(geom))
+        inside = ~geometry_mask([utm], out_shape=red.shape, transform=src.transform)
+    cloud = inside & np.isin(scl, SCL_CLOUD)
+    valid = inside & (red != 0) & (nir != 0) & ~cloud & ~np.isin(scl, SCL_NO_DATA)
+    r = red[valid].astype(np.float32) / 10000
+    n = nir[valid].astype(np.float32) / 10000
+    return ((n - r) / (n + r)).astype(np.float64), inside.sum(), cloud.sum()
+
+
+def test_masks_cloud_scl_nodata_and_zero_pixels(raster):
+    geom = lonlat(50, 50, 1950, 1950)
+    stats = zonal_ndvi(geom, sources(raster))
+    values, inside, cloudy = brute_force(raster, geom)
+
+    assert stats['pixel_count'] == inside
+    assert stats['valid_pixel_count'] == values.size < inside
+    assert stats['cloud_fraction'] == pytest.approx(cloudy / inside)
+    assert stats['valid_pixel_fraction'] == pytest.approx(values.size / inside)
+    assert stats['mean'] == pytest.approx(values.mean(), rel=1e-9)
+    assert stats['median'] == pytest.approx(np.median(values), rel=1e-9)
+    assert stats['percentiles']['90'] == pytest.approx(np.percentile(values, 90), rel=1e-9)
+    assert sum(stats['histogram']['counts']) == values.size
+    assert stats['coverage_fraction'] == pytest.approx(1.0)
+    assert stats['sources'] == ['sentinel.tif']
+    assert stats['timestamp'] == '2024-06-01T08:00:00Z'
+
+
+@pytest.mark.parametrize('window', [
+    (1450, 1450, 1750, 1750),  # inside the cloud-shadow patch
+    (250, 250, 550, 550),      # inside the SCL no-data patch
+    (1450, 250, 1750, 550),    # inside the zero-reflectance patch
+])
+def test_all_invalid_window_has_no_statistics(raster, window):
+    stats = zonal_ndvi(lonlat(*window), sources(raster))
+
+    assert stats['pixel_count'] > 0
+    assert stats['valid_pixel_count'] == 0 and stats['valid_pixel_fraction'] == 0.0
+    assert stats['mean'] is None and stats['std'] is None and stats['median'] is None
+    assert all(v is None for v in stats['percentiles'].values())
+    assert sum(stats['histogram']['counts']) == 0
+
+
+def test_polygon_outside_every_raster_returns_none(raster):
+    assert zonal_ndvi(lonlat(5000, 5000, 6000, 6000), sources(raster)) is None
+
+
+def test_summarize_ndvi():
+    values = np.array([-0.5, 0.0, 0.25, 0.5, 1.0], dtype=np.float32)
+    stats = summarize_ndvi(values, polygon_pixels=10, cloudy_pixels=2)
+
+    assert stats['valid_pixel_fraction'] == 0.5 and stats['cloud_fraction'] == 0.2
+    assert stats['mean'] == pytest.approx(0.25)
+    assert (stats['median'], stats['min'], stats['max']) == (0.25, -0.5, 1.0)
+    assert set(stats['percentiles']) == {str(p) for p in PERCENTILES}
+    assert sum(stats['histogram']['counts']) == 5
+
+    empty = summarize_ndvi(np.empty(0, dtype=np.float32), 0, 0)
+    assert empty['mean'] is None and empty['valid_pixel_fraction'] == 0.0 and empty['cloud_fraction'] == 0.0
+
+
+def analyze(geom):
+    return asyncio.run(sentinel.analyze(from_shape(geom, srid=4326)))
+
+
+def test_analyze_keeps_its_output_shape(raster, monkeypatch):
+    monkeypatch.setattr(sentinel, 'zonal_ndvi', lambda geom: zonal_ndvi(geom, sources(raster)))
+    geom = lonlat(50, 50, 1950, 1950)
+    result = analyze(geom)
+
+    assert set(result) == {'bounds', 'area_km2', 'status', 'source', 'timestamp', 'data'}
+    assert set(result['bounds']) == {'minx', 'miny', 'maxx', 'maxy'}
+    assert result['status'] == 'success' and result['source'] == 'sentinel-2'
+    assert result['area_km2'] == pytest.approx(1.9 * 1.9, rel=0.01)
+    assert result['timestamp'] == '2024-06-01T08:00:00Z'
+    data = result['data']
+    assert {'ndvi_mean', 'cloud_cover', 'bands', 'ndvi'} <= set(data)
+    assert data['ndvi_mean'] == data['ndvi']['mean']
+    assert data['cloud_cover'] == data['ndvi']['cloud_fraction']
+
+
+def test_analyze_raises_without_imagery(monkeypatch):
+    monkeypatch.setattr(sentinel, 'zonal_ndvi', lambda geom: None)
+    with pytest.raises(ValueError, match='No cached Sentinel-2 imagery'):
+        analyze(lonlat(0, 0, 100, 100))
+
+
+def test_analyze_raises_without_clear_pixels(raster, monkeypatch):
+    monkeypatch.setattr(sentinel, 'zonal_ndvi', lambda geom: zonal_ndvi(geom, sources(raster)))
+    with pytest.raises(ValueError, match='No cloud-free'):
+        analyze(lonlat(1450, 1450, 1750, 1750))
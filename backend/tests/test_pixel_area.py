@@ -0,0 +1,65 @@
+# backend/tests/test_pixel_area.py
+import math
+
+import numpy as np
+import pytest
+from rasterio.transform import Affine, from_origin
+from shapely.geometry import box
+
+from app.services.pixel_area import (
+    GEOD, WGS84_A, _authalic_q, cell_areas, geometry_area_m2, row_areas
+)
+
+RES = 0.000277778
+
+# WGS84 ellipsoid surface area (m²)
+WGS84_SURFACE = 5.10065621724e14
+
+
+def geodesic_box_area(minx, miny, maxx, maxy, points=400):
+    """Area of a lon/lat box; its parallels are densified, since GEOD joins vertices by geodesics"""
+    lons = np.linspace(minx, maxx, points)
+    area, _ = GEOD.polygon_area_perimeter(
+        np.concatenate([lons, lons[::-1]]), np.concatenate([np.full(points, miny), np.full(points, maxy)])
+    )
+    return abs(area)
+
+
+def test_authalic_q_spans_the_ellipsoid():
+    assert _authalic_q(np.array([0.0]))[0] == 0.0
+    q_pole = _authalic_q(np.array([math.pi / 2]))[0]
+    assert 2 * math.pi * WGS84_A ** 2 * q_pole == pytest.approx(WGS84_SURFACE, rel=1e-9)
+    # Odd in latitude, so both hemispheres match
+    lats = np.radians(np.array([-60.0, -10.0, 10.0, 60.0]))
+    assert np.allclose(_authalic_q(lats), -_authalic_q(-lats))
+
+
+@pytest.mark.parametrize('lat', [0.0, 23.5, 45.0, -52.0, 70.0])
+def test_cell_areas_match_geodesic_polygons(lat):
+    edges = lat + np.arange(4) * 0.1
+    expected = [geodesic_box_area(30.0, lo, 30.1, hi) for lo, hi in zip(edges[:-1], edges[1:])]
+    assert np.allclose(cell_areas(edges, 0.1), expected, rtol=1e-9)
+
+
+def test_row_areas_sum_to_the_raster_footprint():
+    height, width = 3600, 3600
+    transform = from_origin(30.0, 10.0, RES, RES)
+    areas = row_areas(transform, height)
+
+    assert areas.shape == (height,)
+    assert not areas.flags.writeable
+    assert np.all(np.diff(areas) > 0)  # rows get larger towards the equator
+    footprint = geodesic_box_area(30.0, 10.0 - height * RES, 30.0 + width * RES, 10.0)
+    assert areas.sum() * width == pytest.approx(footprint, rel=1e-9)
+
+
+def test_row_areas_reject_rotated_transforms():
+    with pytest.raises(ValueError):
+        row_areas(Affine(RES, 0.1, 30.0, 0.0, -RES, 10.0), 10)
+
+
+def test_geometry_area_matches_pixel_areas():
+    geom = box(30.0, 0.0, 30.0 + 100 * RES, 100 * RES)
+    areas = row_areas(from_origin(30.0, 100 * RES, RES, RES), 100)
+    # The box's edges are geodesics rather than parallels, a ~1e-8 difference at this size
+    assert geometry_area_m2(geom) == pytest.approx(areas.sum() * 100, rel=1e-6)
@@ -0,0 +1,182 @@
+# backend/tests/test_range_download.py
+import hashlib
+import json
+import random
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+
+from app.services import range_download
+from app.services.range_download import DownloadError, RangeDownloader
+
+SIZE = 256 * 1024
+SEGMENT = 32 * 1024
+
+
+class StandIn:
+    """Remote file with Range support that can cut responses off half way"""
+
+    def __init__(self, payload: bytes):
+        self.payload = payload
+        self.etag = '"v1"'
+        self.failure_rate = 0.0
+        self.bytes_served = 0
+        self.dropped = 0
+        self.random = random.Random(0)
+        self.lock = threading.Lock()
+
+
+def make_handler(remote: StandIn):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def log_message(self, *args):
+            pass
+
+        def _headers(self, status, length, extra=None):
+            self.send_response(status)
+            self.send_header('Content-Length', str(length))
+            self.send_header('Accept-Ranges', 'bytes')
+            self.send_header('ETag', remote.etag)
+            for key, value in (extra or {}).items():
+                self.send_header(key, value)
+            self.end_headers()
+
+        def do_HEAD(self):
+            self._headers(200, len(remote.payload))
+
+        def do_GET(self):
+            payload = remote.payload
+            start, end, status, extra = 0, len(payload) - 1, 200, {}
+            if 'Range' in self.headers:
+                first, last = self.headers['Range'].split('=', 1)[1].split('-')
+                start, end = int(first), min(int(last), len(payload) - 1)
+                status = 206
+                extra['Content-Range'] = f"bytes {start}-{end}/{len(payload)}"
+            body = payload[start:end + 1]
+            self._headers(status, len(body), extra)
+
+            with remote.lock:
+                drop = remote.random.random() < remote.failure_rate
+                remote.dropped += drop
+            if drop:
+                # Send half, then drop the connection
+                body = body[:len(body) // 2]
+                self.close_connection = True
+            self.wfile.write(body)
+            with remote.lock:
+                remote.bytes_served += len(body)
+
+    return Handler
+
+
+class Server(ThreadingHTTPServer):
+    def handle_error(self, request, client_address):
+        # Clients abandoning a dropped response reset the socket
+        pass
+
+
+@pytest.fixture
+def remote():
+    remote = StandIn(random.Random(1).randbytes(SIZE))
+    server = Server(('127.0.0.1', 0), make_handler(remote))
+    threading.Thread(target=server.serve_forever, kwargs={'poll_interval': 0.05}, daemon=True).start()
+    remote.url = f"http://127.0.0.1:{server.server_address[1]}/tile.tif"
+    yield remote
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture(autouse=True)
+def no_backoff(monkeypatch):
+    monkeypatch.setattr(range_download.time, 'sleep', lambda seconds: None)
+
+
+def downloader(**kwargs):
+    kwargs.setdefault('segment_size', SEGMENT)
+    kwargs.setdefault('chunk_size', 4096)
+    return RangeDownloader(requests.Session(), **kwargs)
+
+
+def digest(payload: bytes) -> str:
+    return f"sha256:{hashlib.sha256(payload).hexdigest()}"
+
+
+class Interrupted(Exception):
+    pass
+
+
+def interrupt_half_way(remote, dest):
+    """Start a download and abort it once half the file is written"""
+    written = []
+
+    def stop_after_half(count):
+        written.append(count)
+        if sum(written) > SIZE // 2:
+            raise Interrupted
+
+    with pytest.raises(Interrupted):
+        downloader(connections=1).download(remote.url, dest, progress_callback=stop_after_half)
+    return sum(written)
+
+
+def test_retries_dropped_responses(remote, tmp_path):
+    remote.failure_rate = 0.3
+    dest = tmp_path / 'tile.tif'
+
+    assert downloader(connections=4, max_retries=20).download(remote.url, dest, checksum=digest(remote.payload)) == dest
+
+    assert remote.dropped > 0
+    assert dest.read_bytes() == remote.payload
+    assert not dest.with_name('tile.tif.part').exists()
+    assert not dest.with_name('tile.tif.part.json').exists()
+
+
+def test_gives_up_after_max_retries(remote, tmp_path):
+    remote.failure_rate = 1.0
+    dest = tmp_path / 'tile.tif'
+
+    with pytest.raises((requests.RequestException, DownloadError)):
+        downloader(connections=1, max_retries=2).download(remote.url, dest)
+    assert not dest.exists()
+
+
+def test_resumes_from_the_partial_file(remote, tmp_path):
+    dest = tmp_path / 'tile.tif'
+    written = interrupt_half_way(remote, dest)
+
+    manifest = json.loads(dest.with_name('tile.tif.part.json').read_text())
+    assert not dest.exists()
+    assert sum(manifest['done']) == written
+
+    remote.bytes_served = 0
+    resumed = []
+    downloader(connections=4).download(remote.url, dest, checksum=digest(remote.payload), progress_callback=resumed.append)
+
+    assert dest.read_bytes() == remote.payload
+    # Only the missing bytes are fetched again; progress starts at what was already there
+    assert remote.bytes_served == SIZE - written
+    assert resumed[0] == written and sum(resumed) == SIZE
+
+
+def test_discards_a_stale_partial_file(remote, tmp_path):
+    dest = tmp_path / 'tile.tif'
+    interrupt_half_way(remote, dest)
+
+    remote.payload = random.Random(2).randbytes(SIZE)
+    remote.etag = '"v2"'
+    remote.bytes_served = 0
+    downloader(connections=4).download(remote.url, dest, checksum=digest(remote.payload))
+
+    assert dest.read_bytes() == remote.payload
+    assert remote.bytes_served == SIZE
+
+
+def test_checksum_mismatch_keeps_the_destination_untouched(remote, tmp_path):
+    dest = tmp_path / 'tile.tif'
+
+    with pytest.raises(DownloadError, match="Checksum mismatch"):
+        downloader().download(remote.url, dest, checksum=digest(b'something else'))
+    assert not dest.exists()
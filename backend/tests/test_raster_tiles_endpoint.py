@@ -0,0 +1,58 @@
+# backend/tests/test_raster_tiles_endpoint.py
+import os
+
+import numpy as np
+import pytest
+import rasterio
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from rasterio.transform import from_origin
+
+from app.routers import polygons
+
+POLYGON_ID = 7
+TILE_URL = f"/{POLYGON_ID}/tiles/0/0/0.png"
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    monkeypatch.setattr(polygons, 'DATA_DIR', tmp_path)
+    app = FastAPI()
+    app.include_router(polygons.router)
+    return TestClient(app)
+
+
+def write_raster(tmp_path, value):
+    path = tmp_path / str(POLYGON_ID) / f"masked_raster_{POLYGON_ID}.tif"
+    path.parent.mkdir(exist_ok=True)
+    with rasterio.open(
+        path, 'w', driver='GTiff', width=64, height=64, count=1, dtype='uint8',
+        crs='EPSG:4326', transform=from_origin(30.0, 10.0, 0.01, 0.01), nodata=0
+    ) as dst:
+        dst.write(np.full((64, 64), value, dtype=np.uint8), 1)
+    return path
+
+
+def test_tiles_are_revalidated_on_every_use(client, tmp_path):
+    write_raster(tmp_path, 1)
+
+    first = client.get(TILE_URL)
+    assert first.status_code == 200
+    assert first.headers['cache-control'] == 'no-cache'
+
+    unchanged = client.get(TILE_URL, headers={'If-None-Match': first.headers['etag']})
+    assert unchanged.status_code == 304
+    assert unchanged.headers['cache-control'] == 'no-cache'
+
+
+def test_reanalysis_changes_the_etag(client, tmp_path):
+    path = write_raster(tmp_path, 1)
+    etag = client.get(TILE_URL).headers['etag']
+
+    write_raster(tmp_path, 2)
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+    again = client.get(TILE_URL, headers={'If-None-Match': etag})
+
+    assert again.status_code == 200
+    assert again.headers['etag'] != etag
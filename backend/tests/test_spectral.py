@@ -0,0 +1,54 @@
+# backend/tests/test_spectral.py
+import numpy as np
+import rasterio
+from PIL import Image
+from rasterio.transform import from_origin
+
+from app.services.spectral import INDICES, REFLECTANCE_SCALE, compute_indices, required_bands
+
+
+def write_raw(path, bands, size=64, zero=None):
+    """uint16 stack named through band descriptions; ``zero`` band is 0 in the top-left quarter"""
+    rng = np.random.default_rng(0)
+    raw = rng.integers(100, 6000, size=(len(bands), size, size), dtype=np.uint16)
+    if zero is not None:
+        raw[bands.index(zero), :size // 2, :size // 2] = 0
+    with rasterio.open(
+        path, 'w', driver='GTiff', width=size, height=size, count=len(bands), dtype='uint16',
+        crs='EPSG:4326', transform=from_origin(30.0, 1.0, 1e-4, 1e-4)
+    ) as dst:
+        dst.write(raw)
+        for i, band in enumerate(bands, start=1):
+            dst.set_band_description(i, band)
+    return raw
+
+
+def test_indices_match_whole_array_formulas(tmp_path):
+    names = list(INDICES)
+    bands = required_bands(names)
+    raw = write_raw(tmp_path / 'raw.tif', bands)
+    outputs = compute_indices(tmp_path / 'raw.tif', names, tmp_path, 'scene', chunk_rows=20)
+
+    reflectance = {b: raw[i].astype(np.float32) / REFLECTANCE_SCALE for i, b in enumerate(bands)}
+    for name, index in INDICES.items():
+        expected = index.formula(reflectance).astype(np.float32)
+        expected[~np.isfinite(expected)] = np.nan
+        with rasterio.open(outputs[name]['tif']) as src:
+            assert np.array_equal(src.read(1), expected, equal_nan=True), name
+
+
+def test_nodata_in_an_unused_band_does_not_mask_an_index(tmp_path):
+    names = ['NDVI', 'NDMI', 'TrueColor']
+    bands = required_bands(names)
+    write_raw(tmp_path / 'raw.tif', bands, zero='B11')
+    outputs = compute_indices(tmp_path / 'raw.tif', names, tmp_path, 'scene')
+
+    def alpha(name):
+        return np.asarray(Image.open(outputs[name]['png']))[:, :, 3]
+
+    # B11 only feeds NDMI
+    assert (alpha('NDMI')[:32, :32] == 0).all() and (alpha('NDMI')[32:, 32:] == 255).all()
+    assert (alpha('NDVI') == 255).all()
+    assert (alpha('TrueColor') == 255).all()
+    with rasterio.open(outputs['NDVI']['tif']) as src:
+        assert np.isfinite(src.read(1)).all()
@@ -0,0 +1,100 @@
+# backend/tests/test_tile_ingest.py
+import os
+import time
+
+import numpy as np
+import pytest
+import rasterio
+from rasterio.transform import from_origin
+
+from app.services import tile_ingest
+from app.services.tile_store import TileStore, disk_bytes
+
+
+def write_raw_tile(path, size=1024):
+    rng = np.random.default_rng(0)
+    data = rng.integers(0, 4, (size, size), dtype=np.uint8)
+    with rasterio.open(
+        path, 'w', driver='GTiff', width=size, height=size, count=1, dtype='uint8',
+        crs='EPSG:4326', transform=from_origin(30.0, 1.0, 0.000277778, 0.000277778), nodata=0
+    ) as dst:
+        dst.write(data, 1)
+
+
+def test_ingest_reserves_space_for_the_copy(tmp_path, monkeypatch):
+    raw = tmp_path / 'LGRIP30_2015_N00E30_001.tif'
+    write_raw_tile(raw)
+    old = tmp_path / 'old.tif'
+    old.write_bytes(os.urandom(disk_bytes(raw)))
+    os.utime(old, (time.time() - 1000, time.time() - 1000))
+    # The raw tile is least recently used; pinning must keep it
+    os.utime(raw, (time.time() - 2000, time.time() - 2000))
+
+    # Room for both raw files, but not for the ingested copy as well
+    store = TileStore(tmp_path, max_bytes=disk_bytes(raw) + disk_bytes(old) + 4096)
+    monkeypatch.setattr(tile_ingest, 'tile_store', store)
+    reserved = []
+    ensure_space = store.ensure_space
+    monkeypatch.setattr(store, 'ensure_space', lambda n: reserved.append(n) or ensure_space(n))
+
+    raw_bytes = disk_bytes(raw)
+    target = tile_ingest.ingest_tile(raw)
+
+    assert reserved == [int(raw_bytes * tile_ingest.INGESTED_SIZE_FACTOR)]
+    assert not old.exists()
+    assert target.exists() and tile_ingest.is_ingested(raw)
+
+
+def use_store(tmp_path, monkeypatch):
+    store = TileStore(tmp_path, max_bytes=1 << 40)
+    monkeypatch.setattr(tile_ingest, 'tile_store', store)
+    return store
+
+
+def test_raw_tile_is_removed_once_the_copy_is_verified(tmp_path, monkeypatch):
+    store = use_store(tmp_path, monkeypatch)
+    raw = tmp_path / 'LGRIP30_2015_N00E30_001.tif'
+    write_raw_tile(raw)
+
+    target = tile_ingest.ingest_tile(raw)
+
+    assert not raw.exists()
+    assert [p.name for p in store.tiles()] == [target.name]
+    with rasterio.open(target) as copy:
+        assert (copy.width, copy.height, copy.nodata) == (1024, 1024, 0)
+    # Ingesting the copy itself never deletes it
+    assert tile_ingest.ingest_tile(target) == target and target.exists()
+
+
+def test_pinned_raw_tile_is_kept_until_it_is_released(tmp_path, monkeypatch):
+    store = use_store(tmp_path, monkeypatch)
+    raw = tmp_path / 'LGRIP30_2015_N00E30_001.tif'
+    write_raw_tile(raw)
+
+    with store.pin(raw):
+        tile_ingest.ingest_tile(raw)
+        assert raw.exists()
+
+    # The next request for the tile finds the copy and drops the raw file
+    tile_ingest.ingest_tile(raw)
+    assert not raw.exists()
+
+
+def test_copy_that_fails_verification_is_discarded(tmp_path, monkeypatch):
+    use_store(tmp_path, monkeypatch)
+    raw = tmp_path / 'LGRIP30_2015_N00E30_001.tif'
+    write_raw_tile(raw)
+    build = tile_ingest.build_chunk_index
+
+    def short_index(path):
+        index = build(path)
+        index['counts'][0, 0] = 0
+        return index
+
+    monkeypatch.setattr(tile_ingest, 'build_chunk_index', short_index)
+    with pytest.raises(ValueError, match="covers"):
+        tile_ingest.ingest_tile(raw)
+
+    assert raw.exists()
+    assert not tile_ingest.ingested_path(raw).exists()
+    assert not tile_ingest.is_ingested(raw)
@@ -0,0 +1,95 @@
+# backend/tests/test_tile_pool.py
+import numpy as np
+import pytest
+import rasterio
+from rasterio.transform import from_origin
+from shapely.geometry import Point
+
+from app.services import tile_pool
+from app.services.tile_pool import RES, process_tiles
+
+SIZE = 300
+
+
+@pytest.fixture(scope='module')
+def tiles(tmp_path_factory):
+    """Four adjacent tiles meeting at (0, 0), one far away and one missing file"""
+    tmp = tmp_path_factory.mktemp('tiles')
+    span = SIZE * RES
+    rng = np.random.default_rng(0)
+    corners = [(-span, 0.0), (0.0, 0.0), (-span, -span), (0.0, -span), (10.0, 10.0)]
+    tiles = []
+    for idx, (minx, miny) in enumerate(corners):
+        path = tmp / f"T{idx}.tif"
+        with rasterio.open(
+            path, 'w', driver='GTiff', dtype='uint8', nodata=0, width=SIZE, height=SIZE, count=1,
+            crs='EPSG:4326', transform=from_origin(minx, miny + span, RES, RES)
+        ) as dst:
+            dst.write(rng.integers(0, 4, size=(SIZE, SIZE), dtype=np.uint8), 1)
+        bounds = {'minx': minx, 'miny': miny, 'maxx': minx + span, 'maxy': miny + span}
+        tiles.append((f"T{idx}", str(path), {'bounds': bounds}))
+
+    missing = {'minx': 0.0, 'miny': 0.0, 'maxx': span, 'maxy': span}
+    tiles.insert(2, ("missing", str(tmp / "missing.tif"), {'bounds': missing}))
+    return tiles
+
+
+@pytest.fixture(scope='module')
+def pool():
+    # One spawn pool for the module; starting its processes dominates the run time
+    tile_pool.shutdown_pool()
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setattr(tile_pool.settings, 'TILE_WORKERS', 3)
+        yield
+        tile_pool.shutdown_pool()
+
+
+GEOM = Point(0, 0).buffer(SIZE * RES * 0.9)
+
+
+def run(tiles, workers):
+    done = []
+    outcomes = process_tiles(tiles, GEOM, max_workers=workers, on_tile_done=done.append)
+    return outcomes, done
+
+
+def test_parallel_outcomes_match_sequential(tiles, pool):
+    sequential, _ = run(tiles, 1)
+    parallel, done = run(tiles, 3)
+
+    assert [o['tile_id'] for o in parallel] == [tile_id for tile_id, _, _ in tiles]
+    assert sorted(done) == sorted(tile_id for tile_id, _, _ in tiles)
+    for expected, actual in zip(sequential, parallel):
+        assert actual.keys() == expected.keys()
+        if 'error' in expected:
+            continue
+        assert actual['result'] == expected['result']
+        if expected['dataset'] is None:
+            assert actual['dataset'] is None
+            continue
+        assert np.array_equal(actual['dataset']['data'], expected['dataset']['data'])
+        assert actual['dataset']['transform'] == expected['dataset']['transform']
+        assert actual['dataset']['nodata'] == expected['dataset']['nodata']
+
+
+@pytest.mark.parametrize('workers', [1, 3])
+def test_failing_tile_becomes_an_error_outcome(tiles, pool, workers):
+    outcomes, done = run(tiles, workers)
+    by_id = {o['tile_id']: o for o in outcomes}
+
+    assert 'error' in by_id['missing'] and 'result' not in by_id['missing']
+    assert 'missing' in done
+    # The polygon misses the far tile's extent; the rest hold its pixels
+    assert by_id['T4']['dataset'] is None
+    assert all(by_id[f"T{idx}"]['result']['valid_pixels'] > 0 for idx in range(4))
+
+
+def test_on_tile_done_can_abandon_the_remaining_tiles(tiles, pool):
+    class Stop(Exception):
+        pass
+
+    def stop(tile_id):
+        raise Stop
+
+    with pytest.raises(Stop):
+        process_tiles(tiles, GEOM, max_workers=3, on_tile_done=stop)
@@ -0,0 +1,84 @@
+# backend/tests/test_tile_store.py
+import os
+import time
+
+from app.services.tile_store import TileStore
+
+MB = 1024 ** 2
+
+
+def write_tile(path, size, accessed):
+    path.write_bytes(os.urandom(size))
+    os.utime(path, (accessed, accessed))
+
+
+def test_sparse_partial_download_counts_written_blocks(tmp_path):
+    store = TileStore(tmp_path, max_bytes=100 * MB)
+    part = tmp_path / 'tile.tif.part'
+    with open(part, 'wb') as f:
+        f.truncate(2 * 1024 * MB)  # preallocated like the range downloader
+        f.write(os.urandom(MB))
+
+    usage = store.usage()
+    assert MB <= usage['partial_bytes'] < 2 * MB
+
+
+def test_eviction_frees_only_what_is_needed_next_to_a_sparse_part(tmp_path):
+    store = TileStore(tmp_path, max_bytes=10 * MB)
+    now = time.time()
+    for i in range(4):
+        write_tile(tmp_path / f'tile{i}.tif', 2 * MB, now - 100 + i)
+    with open(tmp_path / 'new.tif.part', 'wb') as f:
+        f.truncate(1024 * MB)
+
+    # 8 MB of tiles + 3 MB incoming: one tile (the oldest) has to go
+    freed = store.ensure_space(3 * MB)
+
+    assert 2 * MB <= freed < 4 * MB
+    assert sorted(p.name for p in store.tiles()) == ['tile1.tif', 'tile2.tif', 'tile3.tif']
+
+
+def test_locks_manifests_and_temporary_files_are_not_tiles(tmp_path):
+    store = TileStore(tmp_path, max_bytes=100 * MB)
+    write_tile(tmp_path / 'a.tif', MB, time.time())
+    write_tile(tmp_path / 'a.tif.chunks.npz', 64 * 1024, time.time())
+    (tmp_path / 'a.tif.lock').write_bytes(b'')
+    (tmp_path / 'b.tif.part.json').write_bytes(os.urandom(64 * 1024))
+    (tmp_path / 'b.tif.part.json.tmp').write_bytes(os.urandom(64 * 1024))
+    (tmp_path / 'c.cog.tif.tmp').write_bytes(os.urandom(MB))
+
+    usage = store.usage()
+
+    assert [p.name for p in store.tiles()] == ['a.tif']
+    # The tile and its chunk index, nothing else
+    assert usage['bytes'] == store.tile_bytes(tmp_path / 'a.tif')
+    assert MB + 64 * 1024 <= usage['bytes'] < MB + 256 * 1024
+    assert usage['partial_bytes'] == 0
+
+
+def test_resumed_download_is_not_counted_twice(tmp_path):
+    store = TileStore(tmp_path, max_bytes=10 * MB)
+    now = time.time()
+    for i in range(3):
+        write_tile(tmp_path / f'tile{i}.tif', 2 * MB, now - 100 + i)
+    part = tmp_path / 'new.tif.part'
+    with open(part, 'wb') as f:
+        f.truncate(4 * MB)
+        f.write(os.urandom(3 * MB))
+
+    # 6 MB of tiles + 3 MB already downloaded + 1 MB still to come fits
+    assert store.ensure_space(4 * MB, partial=part) == 0
+    assert len(store.tiles()) == 3
+
+    # Counted as a fresh 4 MB download it would not
+    assert store.ensure_space(4 * MB) > 0
+
+
+def test_evicting_a_tile_frees_its_chunk_index(tmp_path):
+    store = TileStore(tmp_path, max_bytes=MB)
+    write_tile(tmp_path / 'a.cog.tif', MB, time.time())
+    write_tile(tmp_path / 'a.cog.tif.chunks.npz', 64 * 1024, time.time())
+    expected = store.tile_bytes(tmp_path / 'a.cog.tif')
+
+    assert store.ensure_space(MB) == expected
+    assert not (tmp_path / 'a.cog.tif.chunks.npz').exists()
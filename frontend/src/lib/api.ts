@@ -40,6 +40,27 @@ export interface AnalysisResult {
   message: string;
 }
 
+export interface JobProgress {
+  stage: string;
+  tiles_total: number;
+  tiles_done: number;
+  bytes_downloaded: number;
+}
+
+export interface AnalysisJob {
+  id: string;
+  polygon_id: number;
+  kind: string;
+  status: 'queued' | 'running' | 'succeeded' | 'failed' | 'cancelled';
+  progress: JobProgress;
+  result: any;
+  error?: string;
+  cancel_requested: boolean;
+  created_at: string;
+  started_at?: string;
+  finished_at?: string;
+}
+
 export const api = {
   async createPolygon(data: { name: string; geometry: any; sessionId: string }) {
     const response = await fetch(`${API_BASE}/api/polygons/`, {
@@ -68,9 +89,40 @@ export const api = {
       method: 'POST',
     });
     if (!response.ok) throw new Error('Failed to analyze polygon');
+    const { job_id } = await response.json();
+
+    // Analysis runs as a background job; poll until it finishes
+    const job = await this.waitForJob(job_id);
+    if (job.status !== 'succeeded') {
+      throw new Error(job.error || `Analysis ${job.status}`);
+    }
+    return job.result;
+  },
+
+  async getJob(jobId: string): Promise<AnalysisJob> {
+    const response = await fetch(`${API_BASE}/api/jobs/${jobId}`);
+    if (!response.ok) throw new Error('Failed to fetch job');
     return response.json();
   },
 
+  async cancelJob(jobId: string): Promise<AnalysisJob> {
+    const response = await fetch(`${API_BASE}/api/jobs/${jobId}`, {
+      method: 'DELETE',
+    });
+    if (!response.ok) throw new Error('Failed to cancel job');
+    return response.json();
+  },
+
+  async waitForJob(jobId: string, intervalMs: number = 2000): Promise<AnalysisJob> {
+    while (true) {
+      const job = await this.getJob(jobId);
+      if (['succeeded', 'failed', 'cancelled'].includes(job.status)) {
+        return job;
+      }
+      await new Promise(resolve => setTimeout(resolve, intervalMs));
+    }
+  },
+
   async getAllPolygons(): Promise<Polygon[]> {
     const response = await fetch(`${API_BASE}/api/polygons/`);
     if (!response.ok) throw new Error('Failed to fetch polygons');
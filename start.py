@@ -34,6 +34,19 @@ class ProjectController:
         self.uvicorn = self.venv_dir / "bin" / "uvicorn"
         self.log_file = self.project_dir / "daemon.log"
 
+    def prefetch_tiles(self, bbox):
+        """Download the LGRIP30 tiles covering a lon/lat box into the tile store"""
+        python = self.venv_dir / "bin" / "python"
+        command = [str(python), "-m", "app.services.tile_store"]
+        if bbox:
+            command += ["--bbox", *[str(v) for v in bbox]]
+        subprocess.run(
+            command,
+            cwd=self.backend_dir,
+            env={**os.environ, "PYTHONPATH": str(self.backend_dir)},
+            check=True
+        )
+
     def stop_service(self, service):
         """Stop specified service(s)"""
         try:
@@ -246,17 +259,23 @@ class ProjectController:
 
 def main():
     parser = argparse.ArgumentParser(description='Control project services')
-    parser.add_argument('action', choices=['start', 'stop', 'restart'],
+    parser.add_argument('action', choices=['start', 'stop', 'restart', 'prefetch'],
                       help='Action to perform')
-    parser.add_argument('service', choices=['front', 'back', 'both'],
+    parser.add_argument('service', nargs='?', choices=['front', 'back', 'both'],
                       help='Service to control')
     parser.add_argument('--daemon', action='store_true',
                       help='Run in daemon mode (for start/restart)')
+    parser.add_argument('--bbox', nargs=4, type=float, metavar=('MINX', 'MINY', 'MAXX', 'MAXY'),
+                      help='Region to prefetch LGRIP30 tiles for (prefetch)')
     
     args = parser.parse_args()
+    if args.action != 'prefetch' and not args.service:
+        parser.error(f"{args.action} requires a service")
     controller = ProjectController()
 
-    if args.action == 'stop':
+    if args.action == 'prefetch':
+        controller.prefetch_tiles(args.bbox)
+    elif args.action == 'stop':
         controller.stop_service(args.service)
     elif args.action == 'start':
         controller.start_service(args.service, args.daemon)